@@ -0,0 +1,20 @@
+"""
+Micro-benchmarks for the sympy_view and render hot paths.
+
+These are not collected by the default test run (see testpaths in pyproject.toml).
+Run them explicitly and keep the results so regressions are visible across commits:
+
+    python -m pytest benchmarks --benchmark-autosave
+
+Each run is stored under .benchmarks/<machine>/ with the commit id in its name.
+Compare the current tree against the last stored run with:
+
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+import sys
+from pathlib import Path
+
+# The legacy single-file module lives at the repository root; workloads.py lives here.
+for _path in (Path(__file__).resolve().parents[1], Path(__file__).resolve().parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
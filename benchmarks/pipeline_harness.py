@@ -0,0 +1,240 @@
+"""
+End-to-end benchmark harness for sympy_paper_printer.report.build_report.
+
+By default the external tools are replaced by the stand-ins in standin_tools.py
+(put first on PATH), so the numbers isolate the orchestration cost of
+build_report: process launches, markdown sanitizing, file I/O and cleanup.
+Pass --real-tools to use jupytext/jupyter/pandoc from PATH when they are present.
+
+    python benchmarks/pipeline_harness.py --cells 10 100 1000 --repeat 3
+    python benchmarks/pipeline_harness.py --cells 50 --nbconvert-delay 0.5 --json results.json
+    python benchmarks/pipeline_harness.py --cells 100 --intermediate ipynb
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import sympy_paper_printer.report as report  # noqa: E402
+from standin_tools import TOOLS, install_stand_ins  # noqa: E402
+
+
+@dataclass
+class PipelineSample:
+    cells: int
+    total: float
+    stages: dict[str, float] = field(default_factory=dict)
+    sanitize: float = 0.0
+    cleanup: float = 0.0
+    bytes_written: int = 0
+
+    @property
+    def orchestration(self) -> float:
+        """Wall time of build_report that is not spent waiting on an external tool."""
+        return self.total - sum(self.stages.values())
+
+
+def make_document(path: Path, cells: int) -> Path:
+    """
+    Write a percent-format script with `cells` code cells, each preceded by a markdown cell.
+    """
+    parts = ["# %%\nimport sympy as sp\nimport sympy_paper_printer as spp\nt = sp.Symbol('t')\n\n"]
+    for i in range(cells):
+        parts.append(f"# %% [markdown]\n# Section {i}\n\n")
+        parts.append(f"# %%\nq_{i} = sp.Function('q_{i}')(t)\nspp.eq('x_{i}', sp.diff(q_{i}, t) / {i + 1})\n\n")
+    path.write_text("".join(parts), encoding="utf-8")
+    return path
+
+
+@contextmanager
+def toolchain(*, real_tools: bool, delays: dict[str, float], figure_every: int, figure_bytes: int) -> Iterator[str]:
+    """
+    Put stand-in tools first on PATH (unless real tools were requested and are all present).
+    Yields "real" or "stand-in".
+    """
+    if real_tools and all(shutil.which(tool) for tool in TOOLS):
+        yield "real"
+        return
+
+    saved = dict(os.environ)
+    with tempfile.TemporaryDirectory(prefix="spp-standins-") as tmp:
+        bin_dir = install_stand_ins(Path(tmp))
+        os.environ["PATH"] = str(bin_dir) + os.pathsep + os.environ.get("PATH", "")
+        for stage, seconds in delays.items():
+            os.environ[f"SPP_STANDIN_{stage.upper()}_DELAY"] = str(seconds)
+        os.environ["SPP_STANDIN_FIGURE_EVERY"] = str(figure_every)
+        os.environ["SPP_STANDIN_FIGURE_BYTES"] = str(figure_bytes)
+        try:
+            yield "stand-in"
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+
+
+@contextmanager
+def instrumented(sample: PipelineSample) -> Iterator[None]:
+    """
+    Time every report._run call (per stage), _sanitize_markdown and _cleanup_build_artifacts,
+    and record the bytes of the intermediates just before they are cleaned up.
+    """
+    orig_run = report._run
+    orig_sanitize = report._sanitize_markdown
+    orig_cleanup = report._cleanup_build_artifacts
+
+    def run(cmd: Sequence[str], **kwargs):
+        stage = cmd[1] if cmd[0] == "jupyter" and len(cmd) > 1 else cmd[0]
+        start = time.perf_counter()
+        try:
+            return orig_run(cmd, **kwargs)
+        finally:
+            sample.stages[stage] = sample.stages.get(stage, 0.0) + time.perf_counter() - start
+
+    def sanitize(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return orig_sanitize(*args, **kwargs)
+        finally:
+            sample.sanitize += time.perf_counter() - start
+
+    def cleanup(paths, *args, **kwargs):
+        sample.bytes_written += sum(_tree_size(p) for p in paths)
+        start = time.perf_counter()
+        try:
+            return orig_cleanup(paths, *args, **kwargs)
+        finally:
+            sample.cleanup += time.perf_counter() - start
+
+    report._run = run
+    report._sanitize_markdown = sanitize
+    report._cleanup_build_artifacts = cleanup
+    try:
+        yield
+    finally:
+        report._run = orig_run
+        report._sanitize_markdown = orig_sanitize
+        report._cleanup_build_artifacts = orig_cleanup
+
+
+def run_once(workdir: Path, cells: int, *, fmt: str = "pdf", intermediate: report.Intermediate = "markdown") -> PipelineSample:
+    doc_dir = workdir / f"doc_{cells}"
+    if doc_dir.exists():
+        shutil.rmtree(doc_dir)
+    doc_dir.mkdir(parents=True)
+    py = make_document(doc_dir / f"report_{cells}.py", cells)
+
+    sample = PipelineSample(cells=cells, total=0.0)
+    with instrumented(sample):
+        start = time.perf_counter()
+        out = report.build_report(py, fmt=fmt, intermediate=intermediate)
+        sample.total = time.perf_counter() - start
+    sample.bytes_written += out.stat().st_size
+    return sample
+
+
+def run_benchmark(
+    cell_counts: Sequence[int],
+    *,
+    repeat: int = 3,
+    real_tools: bool = False,
+    delays: Optional[dict[str, float]] = None,
+    figure_every: int = 5,
+    figure_bytes: int = 20_000,
+    intermediate: report.Intermediate = "markdown",
+) -> tuple[str, list[PipelineSample]]:
+    """
+    Run build_report `repeat` times per document size and return (toolchain kind, median samples).
+    """
+    results: list[PipelineSample] = []
+    with toolchain(real_tools=real_tools, delays=delays or {}, figure_every=figure_every, figure_bytes=figure_bytes) as kind:
+        with tempfile.TemporaryDirectory(prefix="spp-pipeline-") as tmp:
+            for cells in cell_counts:
+                samples = [run_once(Path(tmp), cells, intermediate=intermediate) for _ in range(repeat)]
+                results.append(_median_sample(samples))
+    return kind, results
+
+
+def format_table(kind: str, samples: Sequence[PipelineSample]) -> str:
+    stages = sorted({s for sample in samples for s in sample.stages})
+    header = ["cells", "total ms"] + [f"{s} ms" for s in stages] + ["orchestration ms", "sanitize ms", "cleanup ms", "KiB written"]
+    rows = [header]
+    for sample in samples:
+        rows.append(
+            [str(sample.cells), f"{sample.total * 1e3:.1f}"]
+            + [f"{sample.stages.get(s, 0.0) * 1e3:.1f}" for s in stages]
+            + [
+                f"{sample.orchestration * 1e3:.1f}",
+                f"{sample.sanitize * 1e3:.2f}",
+                f"{sample.cleanup * 1e3:.2f}",
+                f"{sample.bytes_written / 1024:.1f}",
+            ]
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = [f"toolchain: {kind}"]
+    lines += ["  ".join(cell.rjust(w) for cell, w in zip(row, widths)) for row in rows]
+    return "\n".join(lines)
+
+
+def _median_sample(samples: Sequence[PipelineSample]) -> PipelineSample:
+    stages = {s for sample in samples for s in sample.stages}
+    return PipelineSample(
+        cells=samples[0].cells,
+        total=statistics.median(s.total for s in samples),
+        stages={k: statistics.median(s.stages.get(k, 0.0) for s in samples) for k in stages},
+        sanitize=statistics.median(s.sanitize for s in samples),
+        cleanup=statistics.median(s.cleanup for s in samples),
+        bytes_written=int(statistics.median(s.bytes_written for s in samples)),
+    )
+
+
+def _tree_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cells", type=int, nargs="+", default=[10, 100, 1000], help="document sizes (code cells)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--real-tools", action="store_true", help="use the real toolchain when it is on PATH")
+    parser.add_argument("--jupytext-delay", type=float, default=0.0, help="stand-in latency in seconds")
+    parser.add_argument("--nbconvert-delay", type=float, default=0.0, help="stand-in latency in seconds")
+    parser.add_argument("--pandoc-delay", type=float, default=0.0, help="stand-in latency in seconds")
+    parser.add_argument("--figure-every", type=int, default=5, help="stand-in nbconvert emits a figure every N code cells")
+    parser.add_argument("--figure-bytes", type=int, default=20_000)
+    parser.add_argument("--intermediate", choices=("markdown", "ipynb"), default="markdown", help="what pandoc reads")
+    parser.add_argument("--json", type=Path, default=None, help="also write the samples to this file")
+    args = parser.parse_args(argv)
+
+    kind, samples = run_benchmark(
+        args.cells,
+        repeat=args.repeat,
+        real_tools=args.real_tools,
+        delays={"jupytext": args.jupytext_delay, "nbconvert": args.nbconvert_delay, "pandoc": args.pandoc_delay},
+        figure_every=args.figure_every,
+        figure_bytes=args.figure_bytes,
+        intermediate=args.intermediate,
+    )
+    print(format_table(kind, samples))
+    if args.json is not None:
+        payload = {"toolchain": kind, "samples": [asdict(s) | {"orchestration": s.orchestration} for s in samples]}
+        args.json.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Stand-in executables for jupytext, jupyter (nbconvert) and pandoc.
+
+They simulate the latency and the output files of each build stage so that the
+orchestration in sympy_paper_printer.report can be measured without the real
+toolchain. Latency is configured through environment variables read by the
+stand-in process:
+
+    SPP_STANDIN_<TOOL>_DELAY           fixed seconds per invocation
+    SPP_STANDIN_<TOOL>_DELAY_PER_CELL  extra seconds per notebook cell
+    SPP_STANDIN_FIGURE_EVERY           emit a figure for every Nth code cell (0 disables)
+    SPP_STANDIN_FIGURE_BYTES           size of each emitted figure
+
+where <TOOL> is JUPYTEXT, NBCONVERT or PANDOC.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+from typing import Sequence
+
+TOOLS = ("jupytext", "jupyter", "pandoc")
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def install_stand_ins(bin_dir: Path) -> Path:
+    """
+    Write one launcher per tool into bin_dir and return bin_dir (to be put first on PATH).
+    """
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    here = Path(__file__).resolve().parent
+    for tool in TOOLS:
+        if os.name == "nt":
+            launcher = bin_dir / f"{tool}.cmd"
+            launcher.write_text(f'@"{sys.executable}" "{here / "standin_tools.py"}" {tool} %*\n', encoding="utf-8")
+        else:
+            launcher = bin_dir / tool
+            launcher.write_text(
+                f"#!{sys.executable}\n"
+                "import sys\n"
+                f"sys.path.insert(0, {str(here)!r})\n"
+                "from standin_tools import main\n"
+                f"sys.exit(main({tool!r}, sys.argv[1:]))\n",
+                encoding="utf-8",
+            )
+            launcher.chmod(launcher.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return bin_dir
+
+
+def main(tool: str, argv: Sequence[str]) -> int:
+    if tool == "jupytext":
+        return _jupytext(argv)
+    if tool == "jupyter":
+        if not argv or argv[0] != "nbconvert":
+            print(f"stand-in jupyter only supports nbconvert, got {list(argv)}", file=sys.stderr)
+            return 2
+        return _nbconvert(argv[1:])
+    if tool == "pandoc":
+        return _pandoc(argv)
+    print(f"unknown stand-in tool: {tool}", file=sys.stderr)
+    return 2
+
+
+def _delay(stage: str, n_cells: int = 0) -> None:
+    fixed = float(os.environ.get(f"SPP_STANDIN_{stage}_DELAY", "0") or 0)
+    per_cell = float(os.environ.get(f"SPP_STANDIN_{stage}_DELAY_PER_CELL", "0") or 0)
+    total = fixed + per_cell * n_cells
+    if total > 0:
+        time.sleep(total)
+
+
+def _option(argv: Sequence[str], name: str) -> str | None:
+    for i, arg in enumerate(argv):
+        if arg == name and i + 1 < len(argv):
+            return argv[i + 1]
+        if arg.startswith(name + "="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+def _positionals(argv: Sequence[str], takes_value: Sequence[str]) -> list[str]:
+    out: list[str] = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+            continue
+        if arg in takes_value:
+            skip = True
+            continue
+        if arg.startswith("-"):
+            continue
+        out.append(arg)
+    return out
+
+
+def _split_percent_cells(text: str) -> list[tuple[str, str]]:
+    cells: list[tuple[str, list[str]]] = []
+    current: list[str] = []
+    kind = "code"
+    for line in text.splitlines(True):
+        if line.startswith("# %%"):
+            if any(ln.strip() for ln in current):
+                cells.append((kind, current))
+            kind = "markdown" if "[markdown]" in line else "code"
+            current = []
+            continue
+        current.append(line)
+    if any(ln.strip() for ln in current):
+        cells.append((kind, current))
+    return [(k, "".join(src)) for k, src in cells]
+
+
+def _jupytext(argv: Sequence[str]) -> int:
+    src = _positionals(argv, ("--to", "--output", "-o"))[0]
+    out = _option(argv, "--output") or _option(argv, "-o")
+    cells = _split_percent_cells(Path(src).read_text(encoding="utf-8"))
+    _delay("JUPYTEXT", len(cells))
+    nb = {
+        "cells": [
+            {"cell_type": kind, "metadata": {}, "source": source}
+            | ({"execution_count": None, "outputs": []} if kind == "code" else {})
+            for kind, source in cells
+        ],
+        "metadata": {},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    Path(out).write_text(json.dumps(nb, indent=1), encoding="utf-8")
+    return 0
+
+
+def _nbconvert(argv: Sequence[str]) -> int:
+    nb_path = Path(_positionals(argv, ("--to", "--output"))[0])
+    nb = json.loads(nb_path.read_text(encoding="utf-8"))
+    cells = nb["cells"]
+    _delay("NBCONVERT", len(cells) if "--execute" in argv else 0)
+
+    figure_every = int(os.environ.get("SPP_STANDIN_FIGURE_EVERY", "0") or 0)
+    figure_bytes = int(os.environ.get("SPP_STANDIN_FIGURE_BYTES", "20000") or 0)
+
+    if _option(argv, "--to") == "notebook":
+        # Simulated execution: give every code cell a small output (and every Nth a figure)
+        # and write the notebook back.
+        for i, cell in enumerate((c for c in cells if c["cell_type"] == "code"), start=1):
+            cell["outputs"] = [{
+                "output_type": "display_data",
+                "metadata": {},
+                "data": {"text/latex": f"$\\displaystyle x_{{{i}}} = \\frac{{\\dot{{q}}}}{{{i}}}$"},
+            }]
+            if figure_every and i % figure_every == 0:
+                png = _PNG_SIGNATURE + b"\0" * max(0, figure_bytes - len(_PNG_SIGNATURE))
+                cell["outputs"].append({
+                    "output_type": "display_data",
+                    "metadata": {},
+                    "data": {"image/png": base64.b64encode(png).decode("ascii"), "text/plain": "<Figure>"},
+                })
+        target = nb_path if "--inplace" in argv else nb_path.with_name(_option(argv, "--output") or nb_path.name)
+        target.write_text(json.dumps(nb, indent=1), encoding="utf-8")
+        return 0
+
+    stem = nb_path.stem
+    files_dir = Path.cwd() / f"{stem}_files"
+
+    lines: list[str] = []
+    code_index = 0
+    for cell in cells:
+        if cell["cell_type"] == "markdown":
+            lines.append(cell["source"].rstrip("\n") + "\n\n")
+            continue
+        code_index += 1
+        lines.append("%\n")
+        lines.append(f"$\\displaystyle x_{{{code_index}}} = \\frac{{\\dot{{q}}}}{{{code_index}}}$\n\n")
+        if figure_every and code_index % figure_every == 0:
+            files_dir.mkdir(exist_ok=True)
+            name = f"{stem}_{code_index}_0.png"
+            (files_dir / name).write_bytes(_PNG_SIGNATURE + b"\0" * max(0, figure_bytes - len(_PNG_SIGNATURE)))
+            lines.append(f"![png]({files_dir.name}/{name})\n\n")
+
+    (Path.cwd() / f"{stem}.md").write_text("".join(lines), encoding="utf-8")
+    return 0
+
+
+def _pandoc(argv: Sequence[str]) -> int:
+    out = _option(argv, "-o")
+    inputs = _positionals(argv, ("-o", "-V", "-f", "-t"))
+    size = 0
+    for name in inputs:
+        p = Path(name)
+        if p.is_file():
+            size += p.stat().st_size
+    _delay("PANDOC")
+    Path(out).write_bytes(b"%PDF-1.5\n" + b"\0" * size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1], sys.argv[2:]))
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+
+import pipeline_harness as harness
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def stand_ins():
+    with harness.toolchain(real_tools=False, delays={}, figure_every=5, figure_bytes=20_000) as kind:
+        yield kind
+
+
+@pytest.mark.benchmark(group="build-report")
+@pytest.mark.parametrize("cells", [10, 200])
+def test_build_report_orchestration(benchmark, stand_ins, tmp_path: Path, cells):
+    sample = benchmark.pedantic(harness.run_once, args=(tmp_path, cells), rounds=3, iterations=1)
+    assert set(sample.stages) == {"jupytext", "nbconvert", "pandoc"}
+    benchmark.extra_info["orchestration_s"] = sample.orchestration
+    benchmark.extra_info["bytes_written"] = sample.bytes_written
+
+
+@pytest.mark.benchmark(group="build-report")
+@pytest.mark.parametrize("cells", [10, 200])
+def test_build_report_orchestration_ipynb(benchmark, stand_ins, tmp_path: Path, cells):
+    sample = benchmark.pedantic(harness.run_once, args=(tmp_path, cells), kwargs={"intermediate": "ipynb"}, rounds=3, iterations=1)
+    assert set(sample.stages) == {"jupytext", "nbconvert", "pandoc"}
+    benchmark.extra_info["orchestration_s"] = sample.orchestration
+    benchmark.extra_info["bytes_written"] = sample.bytes_written
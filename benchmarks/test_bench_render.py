@@ -0,0 +1,98 @@
+import pytest
+import sympy as sp
+
+import sympy_paper_printer.render as render
+from sympy_paper_printer.latex import iterative_latex
+
+import workloads as wl
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.benchmark(group="normalize")
+def test_normalize_equation_string_lhs_matrix_rhs(benchmark):
+    m = wl.large_matrix(8)
+    lhs, rhs = benchmark(render._normalize_equation, "A", m)
+    assert isinstance(lhs, sp.MatrixSymbol)
+
+
+@pytest.mark.benchmark(group="normalize")
+def test_normalize_equation_eq(benchmark):
+    e = sp.Eq(sp.Symbol("y"), wl.many_time_derivatives(20))
+    benchmark(render._normalize_equation, e, None)
+
+
+@pytest.mark.benchmark(group="to-display")
+@pytest.mark.parametrize("n", [10, 100])
+def test_to_display_many_time_derivatives(benchmark, n):
+    expr = wl.many_time_derivatives(n)
+    benchmark(render._to_display, sp.Symbol("y"), expr, t=wl.t)
+
+
+@pytest.mark.benchmark(group="to-display")
+def test_to_display_deep_applied_undef(benchmark):
+    expr = wl.deep_applied_undef(100)
+    benchmark(render._to_display, sp.Symbol("y"), expr, t=wl.t)
+
+
+@pytest.mark.benchmark(group="to-display")
+def test_to_display_large_matrix(benchmark):
+    m = wl.large_matrix(12)
+    lhs, rhs = render._normalize_equation("A", m)
+    benchmark(render._to_display, lhs, rhs, t=wl.t)
+
+
+@pytest.mark.benchmark(group="latex")
+@pytest.mark.parametrize("n", [10, 100])
+def test_latex_cleaned_time_derivatives(benchmark, n):
+    lhs, rhs = render._to_display(sp.Symbol("y"), wl.many_time_derivatives(n), t=wl.t)
+    benchmark(sp.latex, sp.Eq(lhs, rhs))
+
+
+@pytest.mark.benchmark(group="latex")
+def test_latex_deep_applied_undef(benchmark):
+    lhs, rhs = render._to_display(sp.Symbol("y"), wl.deep_applied_undef(25), t=wl.t)
+    benchmark(sp.latex, sp.Eq(lhs, rhs))
+
+
+@pytest.mark.benchmark(group="latex")
+def test_latex_shared_subtree_dag(benchmark):
+    lhs, rhs = render._to_display(sp.Symbol("y"), wl.shared_subtree_dag(8), t=wl.t)
+    benchmark(sp.latex, sp.Eq(lhs, rhs))
+
+
+@pytest.mark.benchmark(group="latex")
+def test_latex_large_matrix(benchmark):
+    lhs, rhs = render._to_display(*render._normalize_equation("A", wl.large_matrix(12)), t=wl.t)
+    benchmark(sp.latex, sp.Eq(lhs, rhs))
+
+
+@pytest.mark.benchmark(group="latex-iterative")
+@pytest.mark.parametrize("depth", [25, 100])
+def test_iterative_latex_deep_applied_undef(benchmark, depth):
+    lhs, rhs = render._to_display(sp.Symbol("y"), wl.deep_applied_undef(depth), t=wl.t)
+    benchmark(iterative_latex, sp.Eq(lhs, rhs))
+
+
+@pytest.mark.benchmark(group="latex-iterative")
+@pytest.mark.parametrize("levels", [8, 12])
+def test_iterative_latex_shared_subtree_dag(benchmark, levels):
+    lhs, rhs = render._to_display(sp.Symbol("y"), wl.shared_subtree_dag(levels), t=wl.t)
+    benchmark(iterative_latex, sp.Eq(lhs, rhs))
+
+
+@pytest.mark.benchmark(group="latex-iterative")
+def test_iterative_latex_large_matrix(benchmark):
+    lhs, rhs = render._to_display(*render._normalize_equation("A", wl.large_matrix(12)), t=wl.t)
+    benchmark(iterative_latex, sp.Eq(lhs, rhs))
+
+
+@pytest.mark.benchmark(group="matrix-blocks")
+@pytest.mark.parametrize("blocks", [False, True])
+def test_eq_large_sparse_matrix(benchmark, monkeypatch, blocks):
+    # Block-diagonal 32 x 32 with a repeated 8 x 8 tile: block mode prints one tile.
+    monkeypatch.setattr(render, "is_interactive", lambda: True)
+    monkeypatch.setattr("IPython.display.display", lambda obj, raw=False: None)
+    tile = wl.large_matrix(8)
+    m = sp.ImmutableMatrix(sp.diag(tile, tile, tile, tile))
+    benchmark(render.eq, "A", m, t=wl.t, blocks=blocks)
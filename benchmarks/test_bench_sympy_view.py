@@ -0,0 +1,65 @@
+import pytest
+import sympy as sp
+
+from sympy_paper_printer.sympy_view import clean_undefined_function_args, dotify_time_derivatives
+
+import workloads as wl
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.benchmark(group="dotify")
+@pytest.mark.parametrize("n", [10, 100])
+def test_dotify_many_time_derivatives(benchmark, n):
+    expr = wl.many_time_derivatives(n)
+    out = benchmark(dotify_time_derivatives, expr, wl.t)
+    assert not out.has(sp.Derivative(sp.Function("q_0")(wl.t), wl.t))
+
+
+@pytest.mark.benchmark(group="dotify")
+@pytest.mark.parametrize("levels", [8, 16])
+def test_dotify_shared_subtree_dag(benchmark, levels):
+    expr = wl.shared_subtree_dag(levels)
+    benchmark(dotify_time_derivatives, expr, wl.t)
+
+
+@pytest.mark.benchmark(group="dotify")
+def test_dotify_large_matrix(benchmark):
+    m = wl.large_matrix(12)
+    benchmark(dotify_time_derivatives, m, wl.t)
+
+
+@pytest.mark.benchmark(group="clean-args")
+@pytest.mark.parametrize("depth", [25, 100])
+def test_clean_args_deep_applied_undef(benchmark, depth):
+    expr = wl.deep_applied_undef(depth)
+    benchmark(clean_undefined_function_args, expr, remove=None)
+
+
+@pytest.mark.benchmark(group="clean-args")
+@pytest.mark.parametrize("depth", [25, 100])
+def test_clean_args_deep_applied_undef_remove_t(benchmark, depth):
+    expr = wl.deep_applied_undef(depth)
+    benchmark(clean_undefined_function_args, expr, remove=[wl.t])
+
+
+@pytest.mark.benchmark(group="clean-args")
+@pytest.mark.parametrize("levels", [8, 16])
+def test_clean_args_shared_subtree_dag(benchmark, levels):
+    expr = wl.shared_subtree_dag(levels)
+    benchmark(clean_undefined_function_args, expr, remove=None)
+
+
+@pytest.mark.benchmark(group="clean-args-vs-legacy")
+@pytest.mark.parametrize("n", [4, 8])
+def test_clean_args_legacy_sized(benchmark, n):
+    expr = wl.legacy_sized_expression(n)
+    benchmark(clean_undefined_function_args, expr, remove=[wl.x, wl.t])
+
+
+@pytest.mark.benchmark(group="clean-args-vs-legacy")
+@pytest.mark.parametrize("n", [4, 8])
+def test_legacy_clean_out_unwanted_arguments(benchmark, n):
+    legacy = pytest.importorskip("sympyPaperPrinter")
+    expr = wl.legacy_sized_expression(n)
+    benchmark(legacy.cleanOutUnwantedArguments, expr, [wl.x, wl.t])
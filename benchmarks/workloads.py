@@ -0,0 +1,74 @@
+"""
+Generated SymPy workloads for the micro-benchmarks.
+
+Every builder is deterministic for a given size so that results stored by
+pytest-benchmark can be compared across commits.
+"""
+from __future__ import annotations
+
+import sympy as sp
+
+t = sp.Symbol("t")
+s = sp.Symbol("s")
+x = sp.Symbol("x")
+
+
+def deep_applied_undef(depth: int) -> sp.Expr:
+    """
+    A deep (non-flat) tree with an undefined function call at every level:
+    f_n(t, s) * sin(f_{n-1}(t, s) * sin(... ) + g_{n-1}(t)) + g_n(t)
+    """
+    expr: sp.Expr = sp.Function("f_0")(t, s)
+    for i in range(1, depth + 1):
+        f = sp.Function(f"f_{i}")(t, s)
+        g = sp.Function(f"g_{i}")(t)
+        expr = f * sp.sin(expr) + g
+    return expr
+
+
+def many_time_derivatives(n: int) -> sp.Expr:
+    """
+    A flat sum over n functions of t with first, second and third time derivatives.
+    """
+    terms = []
+    for i in range(n):
+        q = sp.Function(f"q_{i}")(t)
+        terms.append(
+            sp.Derivative(q, t)
+            + x * sp.Derivative(q, (t, 2))
+            + sp.Derivative(q, (t, 3)) / (i + 1)
+            + q ** 2
+        )
+    return sp.Add(*terms)
+
+
+def shared_subtree_dag(levels: int) -> sp.Expr:
+    """
+    Each level reuses the previous level twice, so the expression tree grows
+    exponentially while the number of distinct subtrees grows linearly.
+    """
+    expr: sp.Expr = sp.Function("a_0")(t)
+    for i in range(1, levels + 1):
+        a = sp.Function(f"a_{i}")(t)
+        expr = expr * (expr + a) + sp.Derivative(a, t)
+    return expr
+
+
+def large_matrix(n: int) -> sp.ImmutableMatrix:
+    """
+    A dense n x n matrix whose entries mix undefined functions and their time derivatives.
+    """
+    qs = [sp.Function(f"q_{i}")(t) for i in range(n)]
+    return sp.ImmutableMatrix(
+        n,
+        n,
+        lambda i, j: qs[i] * sp.Derivative(qs[j], t) + sp.cos(qs[(i + j) % n]),
+    )
+
+
+def legacy_sized_expression(n: int) -> sp.Expr:
+    """
+    A small sum of n undefined functions; the legacy cleaner calls simplify()
+    once per function so it only gets workloads of this size.
+    """
+    return sp.Add(*(sp.Function(f"h_{i}")(x, t) * sp.cos(x) for i in range(n)))
@@ -1,7 +1,12 @@
 from .config import configure, configured, get_config, Config
-from .render import md, eq, show
+from .render import md, eq, eq_batch, show
+from .numeric import export_numeric, record_equations
 from .runtime import runtime_environment, is_interactive, is_jupyter_like
 from .report import build_report
+from .book import build_book
+from .metrics import BuildResult, StageEvent, StageMetrics
+from .dirscope import CleanDirectoryScope
+from .instrument import add_render_hook, remove_render_hook, render_stats
 
 __all__ = [
     "Config",
@@ -10,9 +15,20 @@ __all__ = [
     "get_config",
     "md",
     "eq",
+    "eq_batch",
     "show",
+    "export_numeric",
+    "record_equations",
     "runtime_environment",
     "is_interactive",
     "is_jupyter_like",
     "build_report",
+    "build_book",
+    "BuildResult",
+    "StageMetrics",
+    "StageEvent",
+    "add_render_hook",
+    "remove_render_hook",
+    "render_stats",
+    "CleanDirectoryScope",
 ]
@@ -0,0 +1,167 @@
+"""
+Figure handling for build_report(..., assets=True).
+
+Figures written by nbconvert (or embedded in the executed notebook) are keyed by a
+hash of their bytes plus the processing settings and stored once in a per-user
+cache. A build links the cached files into its workspace and rewrites the image
+paths, so identical figures are processed once across builds and documents, and a
+figure repeated within a document is embedded once. Oversized PNGs can be
+re-encoded at a target DPI (needs Pillow), and vector_figures=True asks matplotlib
+for SVG output through an injected setup cell.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import os
+import shutil
+import warnings
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Optional
+
+from .notebook import Notebook, insert_code_cell
+
+ASSETS_TAG = "spp-assets"
+
+IMAGE_SUFFIXES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".svg": "image/svg+xml", ".pdf": "application/pdf"}
+
+_VECTOR_SETUP = (
+    "try:\n"
+    "    from matplotlib_inline.backend_inline import set_matplotlib_formats as _spp_formats\n"
+    "    _spp_formats('svg')\n"
+    "except ImportError:\n"
+    "    pass\n"
+)
+
+
+@dataclass(frozen=True)
+class AssetPolicy:
+    """
+    How figures are processed. target_dpi re-encodes PNGs wider than
+    target_dpi * max_width_in pixels (the text width of the page).
+    """
+    target_dpi: Optional[int] = None
+    max_width_in: float = 6.5
+
+    @property
+    def key(self) -> str:
+        return f"dpi={self.target_dpi};width={self.max_width_in}"
+
+
+@dataclass
+class AssetStats:
+    figures: int = 0
+    cache_hits: int = 0
+    bytes_written: int = 0  # newly processed files added to the cache
+    bytes_saved: int = 0    # input bytes minus the bytes of the assets used
+
+
+def add_vector_setup(nb: Notebook) -> None:
+    """
+    Insert a setup cell asking matplotlib's inline backend for SVG figures.
+    """
+    insert_code_cell(nb, 0, _VECTOR_SETUP, tag=ASSETS_TAG)
+
+
+def cached_asset(data: bytes, suffix: str, cache_dir: Path, policy: AssetPolicy) -> tuple[Path, bool]:
+    """
+    Process a figure (or reuse an earlier result) and return (cached path, cache hit).
+    """
+    digest = hashlib.sha256(data)
+    digest.update(b"\0" + policy.key.encode("utf-8"))
+    name = digest.hexdigest()[:32]
+    cached = cache_dir / name[:2] / f"{name}{suffix}"
+    if cached.is_file():
+        return cached, True
+
+    if suffix == ".png" and policy.target_dpi:
+        reencoded = _reencode_png(data, policy)
+        if reencoded is None:
+            # Stored as an unprocessed figure, so a build with Pillow re-encodes it.
+            return cached_asset(data, suffix, cache_dir, replace(policy, target_dpi=None))
+        data = reencoded
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_name(f".{cached.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, cached)
+    return cached, False
+
+
+def collect_figures(files_dir: Path, assets_dir: Path, cache_dir: Path, policy: AssetPolicy) -> tuple[dict[str, str], AssetStats]:
+    """
+    Move the figures in files_dir through the cache into assets_dir (one file per
+    distinct figure) and return the markdown path rewrites ({stem}_files/x.png ->
+    {assets_dir.name}/<hash>.png) together with the stage statistics.
+    """
+    stats = AssetStats()
+    mapping: dict[str, str] = {}
+    if not files_dir.is_dir():
+        return mapping, stats
+    for figure in sorted(files_dir.iterdir()):
+        suffix = figure.suffix.lower()
+        if suffix not in IMAGE_SUFFIXES:
+            continue
+        data = figure.read_bytes()
+        cached, hit = cached_asset(data, suffix, cache_dir, policy)
+        _account(stats, data, cached, hit)
+        _link(cached, assets_dir / cached.name)
+        mapping[f"{files_dir.name}/{figure.name}"] = f"{assets_dir.name}/{cached.name}"
+    return mapping, stats
+
+
+def process_attachments(nb: Notebook, cache_dir: Path, policy: AssetPolicy) -> AssetStats:
+    """
+    Same as collect_figures for figures embedded as markdown cell attachments
+    (intermediate="ipynb"): payloads are replaced by the cached, processed bytes.
+    """
+    stats = AssetStats()
+    suffixes = {mime: suffix for suffix, mime in IMAGE_SUFFIXES.items() if suffix != ".jpeg"}
+    for cell in nb.get("cells", []):
+        attachments: dict[str, Any] = cell.get("attachments") or {}
+        for bundle in attachments.values():
+            for mime, payload in list(bundle.items()):
+                if mime not in suffixes:
+                    continue
+                data = base64.b64decode("".join(payload) if isinstance(payload, list) else payload)
+                cached, hit = cached_asset(data, suffixes[mime], cache_dir, policy)
+                _account(stats, data, cached, hit)
+                bundle[mime] = base64.b64encode(cached.read_bytes()).decode("ascii")
+    return stats
+
+
+def _account(stats: AssetStats, data: bytes, cached: Path, hit: bool) -> None:
+    size = cached.stat().st_size
+    stats.figures += 1
+    stats.cache_hits += int(hit)
+    stats.bytes_written += 0 if hit else size
+    stats.bytes_saved += len(data) - size
+
+
+def _link(src: Path, dst: Path) -> None:
+    if dst.exists():
+        return  # same content hash: the figure repeats within the document
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _reencode_png(data: bytes, policy: AssetPolicy) -> Optional[bytes]:
+    try:
+        from PIL import Image  # type: ignore
+    except ImportError:
+        warnings.warn("Pillow is not installed; figures are cached but not re-encoded (pip install Pillow)")
+        return None
+
+    max_px = int(policy.target_dpi * policy.max_width_in)
+    with Image.open(io.BytesIO(data)) as im:
+        if im.width <= max_px:
+            return data
+        height = max(1, round(im.height * max_px / im.width))
+        resized = im.resize((max_px, height), Image.LANCZOS)
+        buf = io.BytesIO()
+        resized.save(buf, format="PNG", optimize=True, dpi=(policy.target_dpi, policy.target_dpi))
+    return buf.getvalue()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from .notebook import cell_source, read_notebook
+
+# Pandoc citation keys: @key or @{key}; internal punctuation is allowed, trailing is not.
+# The lookbehind keeps e-mail addresses (name@host) from being read as citations.
+_CITATION = re.compile(r"(?<![\w@])@(?:\{(?P<braced>[^{}]+)\}|(?P<bare>[A-Za-z0-9_][\w:.#$%&\-+?<>~/]*))")
+_ENTRY_START = re.compile(r"@(?P<type>[A-Za-z]+)\s*(?P<open>[{(])")
+_XREF_FIELD = re.compile(r"\b(?:crossref|xref|xdata)\s*=\s*(?:\{(?P<braced>[^{}]*)\}|\"(?P<quoted>[^\"]*)\")", re.IGNORECASE)
+_ALWAYS_KEEP = ("string", "preamble")
+
+
+@dataclass(frozen=True)
+class BibEntry:
+    type: str
+    key: str
+    text: str
+    refs: tuple[str, ...]  # crossref / xref / xdata targets
+
+
+def cited_keys(document: Path) -> set[str]:
+    """
+    Citation keys used in a markdown file (read line by line), or in the markdown
+    cells of a .ipynb.
+    """
+    if document.suffix.lower() == ".ipynb":
+        cells = read_notebook(document).get("cells", [])
+        return _keys_in(
+            line
+            for cell in cells if cell.get("cell_type") == "markdown"
+            for line in cell_source(cell).splitlines()
+        )
+    with document.open(encoding="utf-8") as f:
+        return _keys_in(f)
+
+
+def _keys_in(lines: Iterable[str]) -> set[str]:
+    keys: set[str] = set()
+    for line in lines:
+        if "@" not in line:
+            continue
+        for m in _CITATION.finditer(line):
+            key = m.group("braced") or m.group("bare").rstrip(".:#$%&-+?<>~/")
+            if key:
+                keys.add(key)
+    return keys
+
+
+def parse_entries(text: str) -> list[BibEntry]:
+    """
+    Split BibTeX/BibLaTeX source into entries by brace matching (no field parsing beyond crossrefs).
+    """
+    entries: list[BibEntry] = []
+    pos = 0
+    while True:
+        m = _ENTRY_START.search(text, pos)
+        if m is None:
+            return entries
+        end = _matching_close(text, m.end() - 1)
+        if end < 0:
+            return entries
+        body = text[m.end():end]
+        etype = m.group("type").lower()
+        key = body.split(",", 1)[0].strip() if etype not in _ALWAYS_KEEP and etype != "comment" else ""
+        refs: list[str] = []
+        for x in _XREF_FIELD.finditer(body):
+            value = x.group("braced") if x.group("braced") is not None else x.group("quoted")
+            refs.extend(k.strip() for k in value.split(",") if k.strip())
+        entries.append(BibEntry(type=etype, key=key, text=text[m.start():end + 1], refs=tuple(refs)))
+        pos = end + 1
+
+
+def prune_bib(bib: Path, keys: Iterable[str], cache_dir: Path) -> tuple[Path, bool]:
+    """
+    Write (or reuse) a .bib containing only the cited entries, the entries they
+    crossref, and all @string/@preamble definitions.
+
+    The result is cached in cache_dir by (bib content hash, cited key set).
+    Returns (pruned bib path, cache hit).
+    """
+    data = bib.read_bytes()
+    wanted = sorted(set(keys))
+    digest = hashlib.sha256(data)
+    digest.update(b"\0" + "\n".join(wanted).encode("utf-8"))
+    pruned = cache_dir / f"{bib.stem}-{digest.hexdigest()[:16]}.bib"
+    if pruned.is_file():
+        return pruned, True
+
+    entries = parse_entries(data.decode("utf-8", errors="replace"))
+    by_key = {e.key: e for e in entries if e.key}
+
+    selected: set[str] = set()
+    todo = [k for k in wanted if k in by_key]
+    while todo:
+        key = todo.pop()
+        if key in selected:
+            continue
+        selected.add(key)
+        todo.extend(r for r in by_key[key].refs if r in by_key and r not in selected)
+
+    # Keep the original order; crossref'd entries must follow the entries citing them
+    # for BibTeX, which the source file already guarantees if it worked before.
+    chunks = [e.text for e in entries if e.type in _ALWAYS_KEEP or e.key in selected]
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # A unique temp name: concurrent builds of the same document prune the same bib.
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{pruned.stem}.", suffix=".tmp", dir=cache_dir)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(chunks) + "\n")
+        os.replace(tmp_name, pruned)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return pruned, False
+
+
+def _matching_close(text: str, open_index: int) -> int:
+    opener = text[open_index]
+    closer = "}" if opener == "{" else ")"
+    depth = 0
+    for i in range(open_index, len(text)):
+        c = text[i]
+        if c == "{" or (c == opener and opener == "("):
+            depth += 1
+        elif c == "}" or (c == closer and closer == ")"):
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
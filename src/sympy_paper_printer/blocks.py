@@ -0,0 +1,61 @@
+"""
+Tiling of large matrices for block-wise display (eq(..., blocks=True)).
+
+iter_blocks walks the matrix tile by tile in row-major order and only slices out
+the tile it is about to yield, so cleaning and printing happen one tile at a time.
+All-zero tiles are marked for elision and a tile equal to an earlier one refers
+back to it instead of being printed again.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+import sympy as sp
+
+
+@dataclass(frozen=True)
+class Block:
+    row: int   # top-left entry, 0-based
+    col: int
+    rows: int  # tiles at the right/bottom edge may be smaller than the block size
+    cols: int
+    matrix: Optional[sp.ImmutableMatrix] = None  # None for zero and repeated tiles
+    same_as: Optional[Block] = None
+
+    @property
+    def zero(self) -> bool:
+        return self.matrix is None and self.same_as is None
+
+    @property
+    def tex_index(self) -> str:
+        # 1-based inclusive ranges, as in the paper: rows 1:8, columns 9:16
+        return rf"[{self.row + 1}:{self.row + self.rows},\,{self.col + 1}:{self.col + self.cols}]"
+
+    @property
+    def py_index(self) -> str:
+        return f"[{self.row}:{self.row + self.rows}, {self.col}:{self.col + self.cols}]"
+
+
+def iter_blocks(matrix: Any, size: tuple[int, int]) -> Iterator[Block]:
+    rows, cols = matrix.shape
+    block_rows, block_cols = size
+    if block_rows < 1 or block_cols < 1:
+        raise ValueError(f"Block size must be positive: {size!r}")
+    seen: dict[tuple[int, int, tuple[Any, ...]], Block] = {}
+    for r0 in range(0, rows, block_rows):
+        for c0 in range(0, cols, block_cols):
+            r1, c1 = min(r0 + block_rows, rows), min(c0 + block_cols, cols)
+            entries = tuple(matrix[i, j] for i in range(r0, r1) for j in range(c0, c1))
+            shape = (r1 - r0, c1 - c0)
+            if all(e == 0 for e in entries):
+                yield Block(r0, c0, *shape)
+                continue
+            key = (*shape, entries)
+            earlier = seen.get(key)
+            if earlier is not None:
+                yield Block(r0, c0, *shape, same_as=earlier)
+                continue
+            block = Block(r0, c0, *shape, matrix=sp.ImmutableMatrix(*shape, entries))
+            seen[key] = block
+            yield block
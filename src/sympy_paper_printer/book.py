@@ -0,0 +1,188 @@
+"""
+Multi-chapter builds: build_book([ch1.py, ch2.py, ...], output="thesis.pdf").
+
+Each chapter is converted and executed on its own (several at once) into a
+persistent, locked book workspace, which keeps one directory per chapter with
+its markdown, figures and a stamp of what it was built from. Unchanged chapters
+are taken from there, so editing one chapter re-executes only that chapter. The
+chapters' markdown then goes through a single pandoc run, which gives the whole
+book one bibliography and continuous section numbering.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from . import postprocess, report
+from .metrics import BuildRecorder, BuildResult, ChildUsage, StageEvent, path_size
+from .notebook import insert_code_cell, read_notebook, write_notebook
+from .workspace import acquire_workspace, atomic_output, file_digest, workspace_root
+
+
+@dataclass
+class _Chapter:
+    source: Path
+    slot: Path  # the chapter's directory in the book workspace
+    stamp: str  # what the cached markdown was built from
+
+    @property
+    def md(self) -> Path:
+        return self.slot / f"{self.source.stem}.md"
+
+    @property
+    def stamp_file(self) -> Path:
+        return self.slot / f"{self.source.stem}.sha256"
+
+    def is_current(self) -> bool:
+        return (
+            self.md.is_file()
+            and self.stamp_file.is_file()
+            and self.stamp_file.read_text(encoding="utf-8").strip() == self.stamp
+        )
+
+
+def build_book(
+    chapters: Sequence[str | Path],
+    *,
+    output: str | Path,
+    fmt: Optional[str] = None,
+    bib: Optional[str | Path] = None,
+    csl: Optional[str | Path] = None,
+    execute: bool = True,
+    build_dir: str | Path = "_build_spp",
+    jobs: Optional[int] = None,
+    markdown_filters: Optional[Sequence[postprocess.LineFilter]] = None,
+    result: bool = False,
+    trace: Optional[str | Path] = None,
+    log: Optional[report.LogSink] = None,
+    progress: Optional[Callable[[StageEvent], None]] = None,
+) -> Path | BuildResult:
+    """
+    Build one document from several percent-format .py chapters (in the given order).
+
+    Notes:
+      - Chapters are built like build_report's markdown path (jupytext, nbconvert,
+        sanitize), up to `jobs` at a time (default: one per CPU). Their markdown is
+        cached in <output dir>/<build_dir>/<output stem>.book/, keyed by the chapter's
+        content, execute and the markdown filters, so only edited chapters run again.
+      - Each chapter's kernel runs in the chapter's own directory, so relative paths
+        resolve as in a standalone run; only its outputs go to the book workspace.
+      - bib/csl default to the single .bib/.csl next to the first chapter.
+      - The format follows the output suffix unless fmt is given.
+      - log and progress work as for build_report; chapter output is logged under
+        the stage name "chapters/<chapter stem>".
+
+    Returns the output path, or a BuildResult when result=True (the "chapters" stage
+    counts reused chapters as cache hits). trace=path writes a Chrome trace.
+    """
+    recorder = BuildRecorder(on_event=progress)
+    sources = [Path(c).resolve() for c in chapters]
+    if not sources:
+        raise ValueError("build_book needs at least one chapter")
+    for src in sources:
+        if not src.is_file():
+            raise FileNotFoundError(src)
+    if len(set(sources)) != len(sources):
+        raise ValueError("A chapter is listed twice")
+
+    report._require_tool("jupytext")
+    report._require_tool("jupyter")
+    report._require_tool("pandoc")
+
+    out = Path(output).resolve()
+    if fmt is not None and out.suffix.lower() != f".{fmt.lower()}":
+        out = out.with_suffix(f".{fmt}")
+    bib_path, csl_path = report._resolve_bib_csl(sources[0].parent, bib=bib, csl=csl)
+
+    ws = acquire_workspace(workspace_root(out.parent, build_dir), f"{out.stem}.book", mode="reuse")
+    fingerprint = _settings_fingerprint(execute, markdown_filters)
+    book = [
+        _Chapter(
+            source=src,
+            slot=ws.path / f"{src.stem}-{hashlib.sha256(str(src).encode('utf-8')).hexdigest()[:8]}",
+            stamp=f"{file_digest(src)};{fingerprint}",
+        )
+        for src in sources
+    ]
+
+    try:
+        with recorder.stage("chapters") as stage:
+            stale = [ch for ch in book if not ch.is_current()]
+            stage.cache_hits = len(book) - len(stale)
+            if stale:
+                workers = max(1, min(jobs or os.cpu_count() or 1, len(stale)))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    for usages in pool.map(lambda ch: _build_chapter(ch, execute, markdown_filters, log), stale):
+                        for usage in usages:
+                            stage.add_child_usage(usage)
+            stage.bytes_written = sum(path_size(ch.md) for ch in stale)
+
+        with recorder.stage("pandoc") as stage, atomic_output(out) as partial:
+            pandoc_cmd = [
+                "pandoc",
+                *(str(ch.md.relative_to(ws.path)) for ch in book),
+                "-s",
+                "-N",
+                "-o",
+                str(partial),
+                "-V",
+                "geometry:margin=1in",
+            ]
+            if bib_path and csl_path:
+                pandoc_cmd += ["--citeproc", f"--bibliography={bib_path}", f"--csl={csl_path}"]
+
+            stage.add_child_usage(report._run(pandoc_cmd, cwd=ws.path, log=report._stage_log(log, "pandoc")))
+            if not partial.is_file():
+                raise report.ReportBuildError(f"Expected output was not created: {out}")
+            stage.bytes_written = path_size(partial)
+    finally:
+        ws.release(clean=False)
+
+    if not (result or trace):
+        return out
+
+    build = recorder.finish(out)
+    if trace is not None:
+        build.write_trace(trace)
+    return build if result else out
+
+
+def _build_chapter(
+    chapter: _Chapter,
+    execute: bool,
+    filters: Optional[Sequence[postprocess.LineFilter]],
+    log: Optional[report.LogSink],
+) -> list[Optional[ChildUsage]]:
+    """
+    jupytext + nbconvert + sanitize for one chapter, inside its slot. The kernel runs
+    next to the chapter's source, as in build_report; figure paths are rewritten
+    relative to the book workspace, where pandoc runs.
+    """
+    src, slot = chapter.source, chapter.slot
+    slot.mkdir(parents=True, exist_ok=True)
+    chapter.stamp_file.unlink(missing_ok=True)
+    ipynb = slot / f"{src.stem}.ipynb"
+    chapter_log = report._stage_log(log, f"chapters/{src.stem}")
+
+    usages = [report._run(["jupytext", "--to", "ipynb", str(src), "--output", str(ipynb)], cwd=src.parent, log=chapter_log)]
+    nb = read_notebook(ipynb)
+    insert_code_cell(nb, 0, report._kernel_dir_source(src.parent.resolve()), tag=report.KERNEL_DIR_TAG)
+    write_notebook(ipynb, nb)
+    nbconvert_cmd = ["jupyter", "nbconvert", *(["--execute"] if execute else []), "--to", "markdown", "--no-input", str(ipynb)]
+    usages.append(report._run(nbconvert_cmd, cwd=slot, log=chapter_log))
+
+    figures = f"{src.stem}_files/"
+    relocate = postprocess.rewrite_image_paths(lambda p: f"{slot.name}/{p}" if p.startswith(figures) else p)
+    base = postprocess.DEFAULT_FILTERS if filters is None else filters
+    report._sanitize_markdown(chapter.md, (*base, relocate))
+
+    chapter.stamp_file.write_text(chapter.stamp, encoding="utf-8")
+    return usages
+
+
+def _settings_fingerprint(execute: bool, filters: Optional[Sequence[postprocess.LineFilter]]) -> str:
+    return f"execute={execute};filters={postprocess.filters_key(filters)}"
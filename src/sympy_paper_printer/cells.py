@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+CellKind = Literal["code", "markdown"]
+
+_MARKER = re.compile(r"^#\s*%%(?P<rest>.*)$")
+
+
+@dataclass(frozen=True)
+class SourceCell:
+    """
+    One percent-format cell of a .py script. Lines are 1-based and inclusive,
+    and include the '# %%' marker line itself.
+    """
+    kind: CellKind
+    start_line: int
+    end_line: int
+    source: str
+
+
+def split_percent_cells(text: str) -> list[SourceCell]:
+    """
+    Split a percent-format script into cells the way jupytext does:
+    every '# %%' line starts a cell ('# %% [markdown]' starts a markdown cell),
+    and non-blank content before the first marker forms a leading code cell.
+    """
+    cells: list[SourceCell] = []
+    kind: CellKind = "code"
+    start = 1
+    body: list[str] = []
+    seen_marker = False
+
+    def flush(end: int) -> None:
+        if seen_marker or any(ln.strip() for ln in body):
+            cells.append(SourceCell(kind=kind, start_line=start, end_line=max(start, end), source="".join(body)))
+
+    lines = text.splitlines(True)
+    for lineno, line in enumerate(lines, start=1):
+        m = _MARKER.match(line.rstrip("\r\n"))
+        if m is None:
+            body.append(line)
+            continue
+        flush(lineno - 1)
+        seen_marker = True
+        kind = "markdown" if "[markdown]" in m.group("rest") else "code"
+        start = lineno
+        body = []
+
+    flush(len(lines))
+    return cells
+
+
+def read_percent_cells(path: str | Path) -> list[SourceCell]:
+    return split_percent_cells(Path(path).read_text(encoding="utf-8"))
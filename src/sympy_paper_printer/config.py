@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, replace
 from contextlib import contextmanager
-from typing import Iterator, Optional
+from typing import Iterator, Literal, Optional
 
 
 @dataclass(frozen=True)
@@ -12,6 +12,22 @@ class Config:
     dotify_time_symbol: str = "t"
     # When cleaning arguments from undefined functions, which symbols to remove by default:
     clean_args_remove: Optional[tuple[str, ...]] = None  # None => remove all args (display-only)
+    # Expressions with more nodes than this are printed by the non-recursive LaTeX printer:
+    iterative_latex_threshold: Optional[int] = 2000  # None => always try sympy's printer first
+    # eq() shows equations with more nodes than this as common subexpressions + reduced equation:
+    cse_threshold: Optional[int] = None  # None => only when eq(..., cse=True)
+    cse_symbol: str = "c"  # subexpressions are named c_1, c_2, ...
+    # eq_batch() only starts worker processes for batches with more nodes than this:
+    batch_parallel_threshold: Optional[int] = 5000  # None => always use the pool
+    # eq/md/show(..., display_id=...): which earlier output a repeat render replaces in place.
+    # "cell": only one shown by the same execution (loops); a re-run cell shows it afresh.
+    # "session": wherever it is (VS Code interactive window, consoles keeping old outputs).
+    display_updates: Literal["cell", "session"] = "cell"
+    skip_unchanged_displays: bool = True  # don't resend a display whose content is unchanged
+    # eq()/show() display matrices with more entries than this block by block:
+    matrix_block_threshold: Optional[int] = None  # None => only when eq/show(..., blocks=True)
+    matrix_block_size: tuple[int, int] = (8, 8)
+    matrix_max_blocks: Optional[int] = 64  # nonzero blocks shown per matrix; None => all
 
 
 _CONFIG = Config()
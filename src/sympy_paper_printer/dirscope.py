@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import fnmatch
+import os
+import struct
+import sys
+import warnings
+from pathlib import Path
+from typing import Iterable, Literal, Optional
+
+Tracking = Literal["snapshot", "inotify", "auto"]
+
+
+class CleanDirectoryScope:
+    """
+    Record a directory on entry and, on exit, delete the files (and then-empty
+    directories) that appeared inside the scope.
+
+    with CleanDirectoryScope(src_dir, keep=["report.pdf"], ignore=[".git", ".venv"]):
+        ...  # run tools that litter src_dir
+
+    track="snapshot" takes os.scandir snapshots into sets on entry and exit
+    (limited by max_depth and ignore patterns). track="inotify" (Linux) also
+    watches the directories, so exit only looks at what the scope created;
+    entries present on entry are never deleted, even if they were replaced.
+    If a watch cannot be added or the event queue overflows, the scope falls
+    back to the snapshot comparison. "auto" uses inotify when available.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        keep: Iterable[str | Path] = (),
+        *,
+        enabled: bool = True,
+        max_depth: Optional[int] = None,
+        ignore: Iterable[str] = (),
+        track: Tracking = "snapshot",
+    ) -> None:
+        self.directory = Path(directory).resolve()
+        self.keep = {str(self.directory / k) for k in keep}
+        self.enabled = enabled
+        self.max_depth = max_depth
+        self.ignore = tuple(ignore)
+        if track == "auto":
+            track = "inotify" if _Inotify.available() else "snapshot"
+        self.track: Tracking = track
+        self._files: set[str] = set()
+        self._dirs: set[str] = set()
+        self._watcher: Optional[_Inotify] = None
+        self.removed: list[str] = []
+
+    def __enter__(self) -> CleanDirectoryScope:
+        if not self.enabled:
+            return self
+        self._files, self._dirs = self.snapshot()
+        if self.track == "inotify":
+            self._watcher = _Inotify()
+            try:
+                for d in [str(self.directory), *self._dirs]:
+                    self._watcher.watch(d)
+            except OSError as exc:
+                warnings.warn(f"cannot watch {self.directory} ({exc}); comparing snapshots instead")
+                self._watcher.close()
+                self._watcher = None
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        if not self.enabled:
+            return
+        if self._watcher is not None:
+            try:
+                created = self._watcher.created()
+            finally:
+                self._watcher.close()
+                self._watcher = None
+            if created is not None:
+                new_files, new_dirs = self._expand_created(created)
+                self._remove(new_files - self._files, new_dirs - self._dirs)
+                return
+            warnings.warn(f"inotify queue overflowed; comparing snapshots of {self.directory} instead")
+        files, dirs = self.snapshot()
+        self._remove(files - self._files, dirs - self._dirs)
+
+    def snapshot(self) -> tuple[set[str], set[str]]:
+        """
+        (files, directories) below the scope directory, as absolute path strings.
+        """
+        files: set[str] = set()
+        dirs: set[str] = set()
+        stack = [(str(self.directory), 0)]
+        while stack:
+            current, depth = stack.pop()
+            try:
+                it = os.scandir(current)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if self._ignored(entry.name, entry.path):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.add(entry.path)
+                        if self.max_depth is None or depth < self.max_depth:
+                            stack.append((entry.path, depth + 1))
+                    else:
+                        files.add(entry.path)
+        return files, dirs
+
+    def _expand_created(self, created: set[str]) -> tuple[set[str], set[str]]:
+        # Everything below a directory created in the scope is new as well.
+        files: set[str] = set()
+        dirs: set[str] = set()
+        for path in created:
+            if self._ignored(os.path.basename(path), path) or self._too_deep(path):
+                continue
+            if os.path.isdir(path) and not os.path.islink(path):
+                dirs.add(path)
+                for root, subdirs, names in os.walk(path):
+                    dirs.update(os.path.join(root, d) for d in subdirs)
+                    files.update(os.path.join(root, n) for n in names)
+            elif os.path.lexists(path):
+                files.add(path)
+        return files, dirs
+
+    def _remove(self, files: set[str], dirs: set[str]) -> None:
+        for f in files:
+            if f in self.keep:
+                continue
+            try:
+                if os.path.isfile(f) or os.path.islink(f):
+                    os.remove(f)
+                    self.removed.append(f)
+            except OSError:
+                pass
+        # Deepest first; only directories that are empty once their new files are gone.
+        for d in sorted(dirs, key=len, reverse=True):
+            try:
+                if not any(os.scandir(d)):
+                    os.rmdir(d)
+                    self.removed.append(d)
+            except OSError:
+                pass
+
+    def _ignored(self, name: str, path: str) -> bool:
+        if not self.ignore:
+            return False
+        rel = os.path.relpath(path, self.directory)
+        return any(fnmatch.fnmatch(name, pat) or fnmatch.fnmatch(rel, pat) for pat in self.ignore)
+
+    def _too_deep(self, path: str) -> bool:
+        if self.max_depth is None:
+            return False
+        return os.path.relpath(path, self.directory).count(os.sep) > self.max_depth
+
+
+class _Inotify:
+    """
+    Minimal ctypes binding: records IN_CREATE / IN_MOVED_TO events of watched directories.
+    """
+
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+    _EVENT = struct.Struct("iIII")
+
+    _libc: Optional[ctypes.CDLL] = None
+
+    @classmethod
+    def available(cls) -> bool:
+        return sys.platform.startswith("linux") and cls._load() is not None
+
+    @classmethod
+    def _load(cls) -> Optional[ctypes.CDLL]:
+        if cls._libc is None:
+            name = ctypes.util.find_library("c")
+            try:
+                libc = ctypes.CDLL(name or "libc.so.6", use_errno=True)
+                libc.inotify_init1  # noqa: B018 - probe the symbol
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            except (OSError, AttributeError):
+                return None
+            cls._libc = libc
+        return cls._libc
+
+    def __init__(self) -> None:
+        libc = self._load()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+        self._paths: dict[int, str] = {}
+
+    def watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.IN_CREATE | self.IN_MOVED_TO)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), directory)
+        self._paths[wd] = directory
+
+    def created(self) -> Optional[set[str]]:
+        """
+        Paths created in watched directories since the watches were added (None on overflow).
+        """
+        out: set[str] = set()
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return out
+            if not buf:
+                return out
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _cookie, length = self._EVENT.unpack_from(buf, offset)
+                offset += self._EVENT.size
+                name = buf[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    return None
+                parent = self._paths.get(wd)
+                if parent is not None and name:
+                    out.add(os.path.join(parent, os.fsdecode(name)))
+
+    def close(self) -> None:
+        os.close(self._fd)
+
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, ContextManager, Iterator, Optional
+
+import sympy as sp
+
+RenderHook = Callable[["RenderCall"], None]
+
+# Registered callbacks. render.py checks this list before doing any bookkeeping,
+# so instrumentation costs one truthiness test per call while nothing is registered.
+_HOOKS: list[RenderHook] = []
+_STATS: list["RenderStats"] = []
+_SIZE_REQUESTS = 0
+
+_NULL = nullcontext()
+
+
+@dataclass
+class RenderCall:
+    """
+    One md/eq/show call: seconds spent per phase ('normalize', 'clean', 'latex', 'display'),
+    plus expression sizes when requested.
+    """
+    kind: str
+    label: str
+    phases: dict[str, float] = field(default_factory=dict)
+    nodes: Optional[int] = None
+    ops: Optional[int] = None
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def measure(self, expr: Any) -> None:
+        if _SIZE_REQUESTS <= 0 or not isinstance(expr, sp.Basic):
+            return
+        self.nodes = (self.nodes or 0) + sum(1 for _ in sp.preorder_traversal(expr))
+        self.ops = (self.ops or 0) + int(sp.count_ops(expr))
+
+
+@dataclass
+class RenderStats:
+    """
+    Collects RenderCalls and cache counters while registered (see render_stats()).
+    """
+    calls: list[RenderCall] = field(default_factory=list)
+    cache: dict[str, list[int]] = field(default_factory=dict)  # name -> [hits, misses]
+
+    def __call__(self, call: RenderCall) -> None:
+        self.calls.append(call)
+
+    def record_cache(self, name: str, hit: bool) -> None:
+        counts = self.cache.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+    def phase_totals(self) -> dict[str, float]:
+        totals: dict[str, float] = {}
+        for call in self.calls:
+            for phase, seconds in call.phases.items():
+                totals[phase] = totals.get(phase, 0.0) + seconds
+        return totals
+
+    def slowest(self, n: int = 10, kind: Optional[str] = "eq") -> list[RenderCall]:
+        calls = [c for c in self.calls if kind is None or c.kind == kind]
+        return sorted(calls, key=lambda c: c.total, reverse=True)[:n]
+
+    def summary(self, n: int = 10) -> str:
+        lines = [f"{len(self.calls)} render calls, {sum(c.total for c in self.calls) * 1e3:.1f} ms total"]
+        totals = self.phase_totals()
+        if totals:
+            lines.append("  " + ", ".join(f"{k} {v * 1e3:.1f} ms" for k, v in totals.items()))
+        slow = self.slowest(n)
+        if slow:
+            lines.append(f"Slowest equations (top {len(slow)}):")
+            for c in slow:
+                size = f" nodes={c.nodes} ops={c.ops}" if c.nodes is not None else ""
+                phases = " ".join(f"{k}={v * 1e3:.1f}" for k, v in c.phases.items())
+                lines.append(f"  {c.total * 1e3:9.1f} ms  {c.label}  [{phases}]{size}")
+        for name, (hits, misses) in sorted(self.cache.items()):
+            lines.append(f"cache {name}: {hits} hits, {misses} misses")
+        return "\n".join(lines)
+
+
+def add_render_hook(hook: RenderHook) -> None:
+    _HOOKS.append(hook)
+
+
+def remove_render_hook(hook: RenderHook) -> None:
+    _HOOKS.remove(hook)
+
+
+@contextmanager
+def render_stats(*, sizes: bool = False, report: bool = False, top: int = 10) -> Iterator[RenderStats]:
+    """
+    Collect timings of every md/eq/show call in the scope.
+
+    with render_stats(sizes=True, report=True) as stats:
+        ...  # notebook code
+    # -> prints the slowest-equations summary on exit
+
+    sizes=True also records node counts and count_ops() of displayed expressions
+    (not free on large expressions, so it is off by default).
+    """
+    global _SIZE_REQUESTS
+    stats = RenderStats()
+    _HOOKS.append(stats)
+    _STATS.append(stats)
+    if sizes:
+        _SIZE_REQUESTS += 1
+    try:
+        yield stats
+    finally:
+        _HOOKS.remove(stats)
+        _STATS.remove(stats)
+        if sizes:
+            _SIZE_REQUESTS -= 1
+        if report:
+            print(stats.summary(top))
+
+
+def begin(kind: str, label: Any) -> Optional[RenderCall]:
+    """
+    Start a RenderCall if anything is listening, else None.
+    """
+    if not _HOOKS:
+        return None
+    text = str(label)
+    return RenderCall(kind=kind, label=text if len(text) <= 60 else text[:57] + "...")
+
+
+def phase(call: Optional[RenderCall], name: str) -> ContextManager[None]:
+    return _NULL if call is None else call.phase(name)
+
+
+def end(call: Optional[RenderCall]) -> None:
+    if call is None:
+        return
+    for hook in list(_HOOKS):
+        hook(call)
+
+
+def record_cache(name: str, hit: bool) -> None:
+    for stats in _STATS:
+        stats.record_cache(name, hit)
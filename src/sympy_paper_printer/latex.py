@@ -0,0 +1,370 @@
+"""
+Non-recursive LaTeX printing for very large or very deep expressions.
+
+sympy's LatexPrinter recurses once (or more) per tree level and rebuilds strings
+at every level, so huge expressions get slow and deep ones raise RecursionError.
+iterative_latex walks the tree post-order with an explicit stack and prints each
+distinct node once (shared subtrees are memoized by identity) as a fragment: a
+list of literal strings and references to its children's fragments. A second
+iterative pass writes the fragments into a single list buffer, so no string is
+copied once per tree level and printing stays linear in the output size. Add, Mul, Pow, relations, derivatives,
+applied functions and matrices are composed here; leaves are printed by
+LatexPrinter, and any other node type falls back to LatexPrinter for its subtree.
+
+Terms and factors are written in sympy's print order and powers follow
+LatexPrinter's rules (roots, fractions, sin^{2}), so for ordinary expressions the
+output matches sp.latex. Where sympy's ordering itself would recurse too deeply,
+the terms are written in expr.args order (constants last) instead.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Optional
+
+import sympy as sp
+from sympy.printing.conventions import requires_partial
+from sympy.printing.latex import LatexPrinter
+from sympy.printing.precedence import PRECEDENCE, precedence, precedence_traditional
+
+_REL_OPS = {"==": "=", ">": ">", "<": "<", ">=": r"\geq", "<=": r"\leq", "!=": r"\neq"}
+_SLOT = re.compile(r"sppslot[a-z]{4}")
+# LatexPrinter's _between_two_numbers_p: a factor ending in a digit followed by one starting with one.
+_BEFORE_NUMBER = re.compile(r"[0-9][} ]*$")
+_AFTER_NUMBER = re.compile(r"(\d|\\frac{\d+}{\d+})")
+
+# Literal strings and id()s of child nodes whose fragments go in their place.
+Parts = list[Any]
+
+
+def needs_iterative(expr: Any, threshold: Optional[int]) -> bool:
+    """
+    True if expr has more than `threshold` nodes (None disables the check).
+    """
+    return threshold is not None and count_nodes(expr, limit=threshold) > threshold
+
+
+def to_latex(expr: Any, *, threshold: Optional[int] = None) -> str:
+    """
+    sp.latex for ordinary expressions; iterative_latex above `threshold` nodes or
+    when sympy's printer runs out of recursion depth.
+    """
+    if needs_iterative(expr, threshold):
+        return iterative_latex(expr)
+    try:
+        return sp.latex(expr)
+    except RecursionError:
+        return iterative_latex(expr)
+
+
+def count_nodes(expr: Any, limit: Optional[int] = None) -> int:
+    """
+    Number of nodes in the expression tree (shared subtrees counted every time
+    they occur, as a recursive printer visits them). Stops early once above limit.
+    """
+    n = 0
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        n += 1
+        if limit is not None and n > limit:
+            return n
+        stack.extend(_children(node))
+    return n
+
+
+def iterative_latex(expr: Any) -> str:
+    printer = LatexPrinter()
+    memo: dict[int, _Fragment] = {}
+    alive: list[Any] = []  # ids are only unique while the objects live
+    stack: list[tuple[Any, bool]] = [(expr, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in memo:
+            continue
+        children = _children(node)
+        if children and not expanded:
+            stack.append((node, True))
+            stack.extend((c, False) for c in reversed(children) if id(c) not in memo)
+            continue
+        memo[id(node)] = _print_node(node, children, memo, printer)
+        alive.append(node)
+
+    out: list[str] = []
+    pending: Parts = [id(expr)]
+    while pending:
+        part = pending.pop()
+        if isinstance(part, str):
+            out.append(part)
+        else:
+            pending.extend(reversed(memo[part].parts))
+    return "".join(out)
+
+
+class _Fragment:
+    __slots__ = ("parts", "negative")
+
+    def __init__(self, parts: Parts, negative: bool = False) -> None:
+        self.parts = parts
+        self.negative = negative  # the LaTeX starts with a minus sign
+
+
+def _children(node: Any) -> list[Any]:
+    if isinstance(node, sp.MatrixBase):
+        return list(node)
+    if not isinstance(node, sp.Basic) or node.is_Atom or isinstance(node, sp.MatrixSymbol):
+        return []
+    if isinstance(node, sp.Derivative):
+        return [node.expr]
+    if isinstance(node, (sp.Add, sp.Mul, sp.Pow, sp.Rel)) or _is_slot_function(node):
+        return list(node.args)
+    return []  # printed whole by LatexPrinter
+
+
+def _print_node(node: Any, children: list[Any], memo: dict[int, _Fragment], printer: LatexPrinter) -> _Fragment:
+    if isinstance(node, sp.MatrixBase):
+        return _matrix(node)
+    if isinstance(node, sp.Add):
+        return _add(node, memo)
+    if isinstance(node, sp.Mul):
+        return _mul(node, memo, printer)
+    if isinstance(node, sp.Pow):
+        return _pow(node, memo, printer)
+    if isinstance(node, sp.Rel):
+        op = _REL_OPS.get(node.rel_op, node.rel_op)
+        return _Fragment([id(node.lhs), f" {op} ", id(node.rhs)])
+    if isinstance(node, sp.Derivative):
+        return _derivative(node, printer)
+    if children:
+        fragment = _function(node, children, printer)
+        if fragment is not None:
+            return fragment
+    tex = printer._print(node)
+    return _Fragment([tex], tex.startswith("-"))
+
+
+def _matrix(node: sp.MatrixBase) -> _Fragment:
+    parts: Parts = [r"\left[", r"\begin{matrix}" if node.cols <= 10 else r"\begin{array}{" + "c" * node.cols + "}"]
+    for i in range(node.rows):
+        if i:
+            parts.append(r"\\")
+        for j in range(node.cols):
+            if j:
+                parts.append(" & ")
+            parts.append(id(node[i, j]))
+    parts += [r"\end{matrix}" if node.cols <= 10 else r"\end{array}", r"\right]"]
+    return _Fragment(parts)
+
+
+def _paren(parts: Parts, node: Any, level: int, *, strict: bool = False) -> Parts:
+    prec = precedence(node)
+    if prec < level or (not strict and prec <= level):
+        return [r"\left(", *parts, r"\right)"]
+    return parts
+
+
+def _add(node: sp.Add, memo: dict[int, _Fragment]) -> _Fragment:
+    try:
+        terms = tuple(node.as_ordered_terms())
+    except RecursionError:
+        terms = node.args
+        if terms[0].is_Number:
+            terms = terms[1:] + terms[:1]  # sympy keeps the constant first in args but prints it last
+    parts: Parts = []
+    for term in terms:
+        wrapped = _paren([id(term)], term, PRECEDENCE["Add"], strict=True)
+        child = memo[id(term)]
+        if not parts:
+            parts += wrapped
+        elif isinstance(term, sp.Mul) and len(term.args) == 2 and term.args[0] is sp.S.NegativeOne:
+            # sympy prints "a - b" with b on its own, e.g. "a - y^{-1.5}", not "a - \frac{1}{y^{1.5}}".
+            rest = term.args[1]
+            parts += [" - ", *_paren([id(rest)], rest, PRECEDENCE["Add"], strict=True)]
+        elif len(wrapped) == 1 and child.negative and isinstance(child.parts[0], str):
+            # Inline the term's own (short) parts to print "a - b" instead of "a + - b".
+            parts += [" - ", child.parts[0][1:].lstrip(), *child.parts[1:]]
+        else:
+            parts += [" + ", *wrapped]
+    return _Fragment([p for p in parts if p != ""], memo[id(terms[0])].negative)
+
+
+def _mul(node: sp.Mul, memo: dict[int, _Fragment], printer: LatexPrinter) -> _Fragment:
+    coeff, factors = node.as_coeff_mul(rational=False)  # Floats are coefficients too
+    try:
+        factors = tuple(f for f in node.as_ordered_factors() if not f.is_Number)
+    except RecursionError:
+        pass
+    negative = bool(coeff.is_negative)
+    if negative:
+        coeff = -coeff
+
+    num: list[tuple[Parts, Any]] = []
+    den: list[tuple[Parts, Any]] = []
+    if coeff.is_Rational and coeff.q != 1:
+        if coeff.p != 1:
+            num.append(([str(coeff.p)], coeff))
+        den.append(([str(coeff.q)], sp.Integer(coeff.q)))
+    elif coeff != 1:
+        num.append(([printer._print(coeff)], coeff))
+
+    for f in factors:
+        positive = _inverted_exponent(f)
+        if positive is not None and isinstance(f, sp.exp):
+            inverse = sp.exp(positive)
+            den.append(([printer._print(inverse)], inverse))
+        elif positive == 1:
+            den.append(([id(f.base)], f.base))
+        elif positive is not None:
+            den.append((_raised(f.base, positive, memo, printer), sp.Pow(f.base, positive, evaluate=False)))
+        elif id(f) in memo:
+            num.append(([id(f)], f))
+        else:
+            num.append(([printer._print(f)], f))  # a number split off by as_coeff_mul
+    if len(den) > 1:
+        try:
+            den.sort(key=lambda item: item[1].sort_key())  # the order sympy prints Mul(*den) in
+        except RecursionError:
+            pass
+
+    def join(items: list[tuple[Parts, Any]]) -> Parts:
+        if len(items) == 1:
+            return items[0][0]
+        parts: Parts = []
+        for i, (item, f) in enumerate(items):
+            wrapped = _paren(item, f, PRECEDENCE["Mul"], strict=True)
+            if i:
+                # As LatexPrinter: 2 \cdot 3^{x}, not "2 3^{x}".
+                between = _BEFORE_NUMBER.search(_edge(parts, memo, -1)) and _AFTER_NUMBER.match(_edge(wrapped, memo, 0))
+                parts.append(r" \cdot " if between else " ")
+            parts += wrapped
+        return parts
+
+    sign: Parts = ["- "] if negative else []
+    if den:
+        return _Fragment([*sign, r"\frac{", *(join(num) if num else ["1"]), "}{", *join(den), "}"], negative)
+    if not num:
+        return _Fragment([*sign, "1"], negative)
+    if len(num) == 1:
+        return _Fragment([*sign, *_paren(num[0][0], num[0][1], PRECEDENCE["Mul"], strict=True)], negative)
+    return _Fragment([*sign, *join(num)], negative)
+
+
+def _edge(parts: Parts, memo: dict[int, _Fragment], end: int) -> str:
+    """
+    Enough of the text at the start (end=0) or end (end=-1) of parts to tell whether
+    it begins or ends with a number.
+    """
+    stack: Parts = list(reversed(parts)) if end == 0 else list(parts)
+    text = ""
+    while stack:
+        part = stack.pop()
+        if isinstance(part, str):
+            text = text + part if end == 0 else part + text
+            if (len(text) >= 32) if end == 0 else text.strip("} "):
+                break
+        else:
+            sub = memo[part].parts
+            stack.extend(reversed(sub) if end == 0 else sub)
+    return text
+
+
+def _pow(node: sp.Pow, memo: dict[int, _Fragment], printer: LatexPrinter) -> _Fragment:
+    base, exp = node.base, node.exp
+    if exp.is_Rational and exp.is_negative:
+        positive = -exp
+        denominator = [id(base)] if positive == 1 else _raised(base, positive, memo, printer)
+        return _Fragment([r"\frac{1}{", *denominator, "}"])
+    return _Fragment(_raised(base, exp, memo, printer))
+
+
+def _inverted_exponent(f: Any) -> Optional[Any]:
+    """
+    -exp if f is a power (or exp()) with a negative constant exponent, which sympy
+    prints in the denominator; None otherwise.
+    """
+    if not isinstance(f, (sp.Pow, sp.exp)):
+        return None
+    exp = f.exp if isinstance(f, sp.Pow) else f.args[0]
+    try:
+        if exp.is_negative and (exp.is_Rational or exp.is_constant()):
+            return -exp
+    except RecursionError:
+        pass
+    return None
+
+
+def _raised(base: Any, exp: Any, memo: dict[int, _Fragment], printer: LatexPrinter) -> Parts:
+    """
+    base**exp (exp not negative rational) as LatexPrinter writes it: roots for 1/q,
+    f^{n}{(x)} for functions, base^{exp} otherwise. exp is referenced when it was
+    printed already, else (a negated exponent) printed here.
+    """
+    if id(base) not in memo:  # e in exp(x), or a base rebuilt while reordering
+        return [printer._print(sp.Pow(base, exp, evaluate=False))]
+    if exp.is_Rational and exp.p == 1 and exp.q != 1:
+        return [r"\sqrt{", id(base), "}"] if exp.q == 2 else [rf"\sqrt[{exp.q}]{{", id(base), "}"]
+    exp_ref = id(exp) if id(exp) in memo else printer._print(exp)
+    if base.is_Function and _is_slot_function(base):
+        fragment = _function(base, list(base.args), printer, exp=exp_ref)
+        if fragment is not None:
+            return fragment.parts
+    return _power(base, exp_ref, memo)
+
+
+def _power(base: Any, exp: Any, memo: dict[int, _Fragment]) -> Parts:
+    # As LatexPrinter: bracket bases that bind no tighter than ^ (e^{x} included) and
+    # symbols with a superscript in their name; floats are braced as well.
+    parts: Parts = [id(base)]
+    if precedence_traditional(base) <= PRECEDENCE["Pow"] or (base.is_Symbol and "^" in _edge(parts, memo, 0)):
+        parts = [r"\left(", *parts, r"\right)"]
+    if base.is_Float:
+        parts = ["{", *parts, "}"]
+    return [*parts, "^{", exp, "}"]
+
+
+def _derivative(node: sp.Derivative, printer: LatexPrinter) -> _Fragment:
+    d = r"\partial" if requires_partial(node) else "d"
+    tex = ""
+    dim = 0
+    for var, count in reversed(node.variable_count):
+        dim += count
+        var_tex = printer._print(var)
+        tex += f"{d} {var_tex}" if count == 1 else f"{d} {var_tex}^{{{printer._print(count)}}}"
+    frac = rf"\frac{{{d}}}{{{tex}}}" if dim == 1 else rf"\frac{{{d}^{{{dim}}}}}{{{tex}}}"
+    return _Fragment([frac + " ", *_paren([id(node.expr)], node.expr, PRECEDENCE["Mul"], strict=True)])
+
+
+def _is_slot_function(node: sp.Basic) -> bool:
+    return isinstance(node, sp.Function) and all(isinstance(a, sp.Expr) for a in node.args)
+
+
+def _function(node: sp.Basic, children: list[Any], printer: LatexPrinter, exp: Any = None) -> Optional[_Fragment]:
+    # Print f(slot_0, slot_1, ...) with placeholder symbols, then refer to the arguments'
+    # fragments from the slots. Function arguments are always bracketed, so no precedence
+    # decisions depend on the real arguments. exp (f^{exp}) is LaTeX or a fragment id.
+    names = [_slot_name(i) for i in range(len(children))]
+    refs = {n: id(c) for n, c in zip(names, children)}
+    if isinstance(exp, int):
+        refs[_slot_name(len(children))] = exp
+        exp = _slot_name(len(children))
+    try:
+        slotted = node.func(*(sp.Symbol(n) for n in names))
+        tex = printer._print(slotted) if exp is None else printer._print(slotted, exp=exp)
+    except Exception:
+        return None
+    if sorted(set(_SLOT.findall(tex))) != sorted(refs):
+        return None
+    parts: Parts = []
+    pos = 0
+    for m in _SLOT.finditer(tex):
+        parts += [tex[pos:m.start()], refs[m.group(0)]]
+        pos = m.end()
+    parts.append(tex[pos:])
+    return _Fragment([p for p in parts if p != ""], tex.startswith("-"))
+
+
+def _slot_name(i: int) -> str:
+    letters = ""
+    for _ in range(4):
+        i, r = divmod(i, 26)
+        letters = chr(ord("a") + r) + letters
+    return "sppslot" + letters
@@ -0,0 +1,114 @@
+"""
+Fast engine behind the legacy sympyPaperPrinter cleaning functions.
+
+sympyPaperPrinter.cleanOutUnwantedArguments used to do a full exp.subs(...)
+followed by simplify() for every undefined function in the expression, and
+convertTimeDerivativeToDotSymbol did three subs passes per top-level argument.
+These functions reproduce the same results by building one replacement map and
+applying it with a single xreplace. The "don't collapse a derivative to zero"
+rule is kept with a cheap structural test (derivatives whose expression no
+longer depends on their variables are treated as zero) instead of simplify().
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import sympy as sp
+from sympy.core.function import AppliedUndef
+
+
+def clean_out_unwanted_arguments(expr: sp.Basic, args_to_clean: Optional[Iterable[sp.Symbol]] = None) -> sp.Basic:
+    """
+    Same contract as sympyPaperPrinter.cleanOutUnwantedArguments:
+    g(x, y, t) with args_to_clean=[x, t] becomes g(y); an empty/None list turns every
+    undefined function call into a plain Symbol of the same name.
+
+    A replacement is skipped if applying it would make the whole expression vanish
+    (e.g. Derivative(g(t), t) -> Derivative(g, t) == 0).
+    """
+    clean = list(args_to_clean) if args_to_clean is not None else []
+    calls = list(expr.atoms(AppliedUndef))
+    if not calls:
+        return expr
+
+    replacements = {call: _rewritten_call(call, clean) for call in calls}
+
+    if isinstance(expr, sp.MatrixBase):
+        # A matrix never compares equal to 0, so the legacy code never skipped a replacement here.
+        return expr.xreplace(replacements)
+
+    out = expr.xreplace(replacements)
+    if not _vanishes(out) or _vanishes(expr):
+        return out
+
+    # Rare: some replacement collapses the expression. Apply one at a time, in the
+    # legacy order, keeping only the steps that leave something non-zero.
+    out = expr
+    for call in calls:
+        candidate = out.xreplace({call: replacements[call]})
+        if not _vanishes(candidate):
+            out = candidate
+    return out
+
+
+def convert_time_derivative_to_dot_symbol(expr: sp.Basic, t: Optional[sp.Symbol] = None) -> sp.Basic:
+    """
+    Same contract as sympyPaperPrinter.convertTimeDerivativeToDotSymbol: for each top-level
+    argument of expr that is a call with t among its arguments (x(t)), replace
+    d2x/dt2 -> \\ddot{x}, dx/dt -> \\dot{x} and x(t) -> x everywhere in expr.
+
+    Top-level arguments without a name (e.g. sin(t)) are left alone instead of raising.
+    """
+    if t is None:
+        t = sp.Symbol("t")
+
+    targets = [
+        arg for arg in expr.args
+        if t in arg.args and isinstance(arg, AppliedUndef) and not sp.Derivative(arg, t).is_zero
+    ]
+    if not targets:
+        return expr
+
+    replacements: dict[sp.Basic, sp.Basic] = {}
+    derivatives = list(expr.atoms(sp.Derivative))
+    for arg in targets:
+        d1 = sp.Derivative(arg, t)
+        d2 = sp.Derivative(d1, t)
+        dot1 = sp.Symbol(r"\dot{" + arg.name + "}")
+        dot2 = sp.Symbol(r"\ddot{" + arg.name + "}")
+        replacements.setdefault(d2, dot2)
+        replacements.setdefault(d1, dot1)
+        for d in derivatives:
+            if d.expr == arg and d not in replacements:
+                # Higher-order or mixed derivatives: subs() rewrites them partially
+                # (d3x/dt3 -> d(\ddot{x})/dt); do the same on this small subtree only.
+                replacements[d] = d.subs(d2, dot2).subs(d1, dot1).subs(arg, sp.Symbol(arg.name))
+        replacements.setdefault(arg, sp.Symbol(arg.name))
+
+    return expr.xreplace(replacements)
+
+
+def _rewritten_call(call: AppliedUndef, clean: list[sp.Symbol]) -> sp.Basic:
+    if len(clean) == 0:
+        return sp.Symbol(call.name)
+    keep = [s for s in call.free_symbols if s not in clean]
+    if len(keep) == 0:
+        return sp.Symbol(call.name)
+    return sp.Function(call.name)(*keep)
+
+
+def _vanishes(expr: sp.Basic) -> bool:
+    """
+    Structural zero test standing in for simplify() == 0: derivatives of expressions that
+    don't depend on the differentiation variables are zero, everything else is kept as is.
+    """
+    if expr == 0:
+        return True
+    zero_derivatives = {
+        d: sp.S.Zero
+        for d in expr.atoms(sp.Derivative)
+        if not any(d.expr.has(v) for v in d.variables)
+    }
+    if not zero_derivatives:
+        return False
+    return expr.xreplace(zero_derivatives) == 0
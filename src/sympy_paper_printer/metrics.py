@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Literal, Optional
+
+if TYPE_CHECKING:
+    from .profiling import ProfileReport
+
+
+@dataclass
+class StageMetrics:
+    """
+    Timing and resource usage of one build stage.
+
+    cpu_time and peak_rss_kb describe the child processes the stage launched
+    (None when the platform can't report them, e.g. Windows).
+    """
+    name: str
+    start: float  # seconds since the build started
+    wall_time: float = 0.0
+    cpu_time: Optional[float] = None
+    peak_rss_kb: Optional[int] = None
+    bytes_written: int = 0
+    cache_hits: int = 0
+
+    def add_child_usage(self, usage: Optional[ChildUsage]) -> None:
+        if usage is None:
+            return
+        self.cpu_time = (self.cpu_time or 0.0) + usage.cpu_time
+        self.peak_rss_kb = max(self.peak_rss_kb or 0, usage.peak_rss_kb)
+
+
+@dataclass(frozen=True)
+class ChildUsage:
+    cpu_time: float  # user + system seconds
+    peak_rss_kb: int
+
+
+@dataclass(frozen=True)
+class StageEvent:
+    """
+    Passed to build_report(progress=...) when a stage starts and when it ends.
+    """
+    name: str
+    kind: Literal["start", "end"]
+    elapsed: float  # seconds since the build started
+    metrics: Optional[StageMetrics] = None  # the finished stage's metrics ("end" only)
+    failed: bool = False
+
+
+@dataclass
+class BuildResult:
+    """
+    What build_report(..., result=True) returns: the output path plus per-stage metrics.
+    """
+    output: Path
+    wall_time: float
+    stages: list[StageMetrics] = field(default_factory=list)
+    profile: Optional[ProfileReport] = None  # set when built with profile=True
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(s.bytes_written for s in self.stages)
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(s.cache_hits for s in self.stages)
+
+    @property
+    def cpu_time(self) -> Optional[float]:
+        times = [s.cpu_time for s in self.stages if s.cpu_time is not None]
+        return sum(times) if times else None
+
+    def stage(self, name: str) -> StageMetrics:
+        for s in self.stages:
+            if s.name == name:
+                return s
+        raise KeyError(name)
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Chrome trace-event format (load in chrome://tracing or Perfetto).
+        """
+        events = [
+            {
+                "name": s.name,
+                "cat": "build",
+                "ph": "X",
+                "ts": round(s.start * 1e6),
+                "dur": round(s.wall_time * 1e6),
+                "pid": 1,
+                "tid": 1,
+                "args": {
+                    "cpu_time": s.cpu_time,
+                    "peak_rss_kb": s.peak_rss_kb,
+                    "bytes_written": s.bytes_written,
+                    "cache_hits": s.cache_hits,
+                },
+            }
+            for s in self.stages
+        ]
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"output": str(self.output), "wall_time": self.wall_time},
+        }
+
+    def write_trace(self, path: str | Path) -> Path:
+        p = Path(path)
+        p.write_text(json.dumps(self.to_chrome_trace(), indent=1), encoding="utf-8")
+        return p
+
+
+class BuildRecorder:
+    """
+    Collects StageMetrics while build_report runs. Cheap enough to always be on.
+    """
+
+    def __init__(self, on_event: Optional[Callable[[StageEvent], None]] = None) -> None:
+        self._t0 = time.perf_counter()
+        self.stages: list[StageMetrics] = []
+        self._on_event = on_event
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        start = time.perf_counter()
+        metrics = StageMetrics(name=name, start=start - self._t0)
+        self.stages.append(metrics)
+        if self._on_event is not None:
+            self._on_event(StageEvent(name, "start", metrics.start))
+        failed = False
+        try:
+            yield metrics
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            metrics.wall_time = time.perf_counter() - start
+            if self._on_event is not None:
+                self._on_event(StageEvent(name, "end", time.perf_counter() - self._t0, metrics, failed))
+
+    def finish(self, output: Path) -> BuildResult:
+        return BuildResult(output=output, wall_time=time.perf_counter() - self._t0, stages=list(self.stages))
+
+
+def path_size(path: Path) -> int:
+    """
+    Size in bytes of a file or of all files below a directory (0 if missing).
+    """
+    try:
+        if path.is_file():
+            return path.stat().st_size
+        if path.is_dir():
+            return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    except OSError:
+        pass
+    return 0
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+import uuid
+from pathlib import Path
+from typing import Any, Iterator
+
+Notebook = dict[str, Any]
+
+# Tags of the setup cells build steps inject (profiling, assets, ...) start with this.
+INJECTED_TAG_PREFIX = "spp-"
+
+
+def read_notebook(path: str | Path) -> Notebook:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def write_notebook(path: str | Path, nb: Notebook) -> None:
+    Path(path).write_text(json.dumps(nb, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def cell_source(cell: dict[str, Any]) -> str:
+    src = cell.get("source", "")
+    return "".join(src) if isinstance(src, list) else src
+
+
+def code_cells(nb: Notebook) -> Iterator[dict[str, Any]]:
+    for cell in nb.get("cells", []):
+        if cell.get("cell_type") == "code":
+            yield cell
+
+
+def insert_code_cell(nb: Notebook, index: int, source: str, *, tag: str) -> None:
+    """
+    Insert a code cell tagged with `tag` so it can be found and removed again later.
+    """
+    nb.setdefault("cells", []).insert(
+        index,
+        {
+            "cell_type": "code",
+            "execution_count": None,
+            "id": uuid.uuid4().hex[:8],
+            "metadata": {"tags": [tag]},
+            "outputs": [],
+            "source": source,
+        },
+    )
+
+
+def remove_tagged_cells(nb: Notebook, tag: str) -> None:
+    nb["cells"] = [c for c in nb.get("cells", []) if tag not in c.get("metadata", {}).get("tags", [])]
+
+
+def is_injected(cell: dict[str, Any]) -> bool:
+    return any(t.startswith(INJECTED_TAG_PREFIX) for t in cell.get("metadata", {}).get("tags", []))
+
+
+def remove_injected_cells(nb: Notebook) -> None:
+    nb["cells"] = [c for c in nb.get("cells", []) if not is_injected(c)]
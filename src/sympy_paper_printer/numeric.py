@@ -0,0 +1,234 @@
+"""
+Export displayed equations as a generated NumPy module.
+
+    with spp.record_equations() as eqs:
+        spp.eq("F_d", rho * v**2 * c_d * A / 2)
+    spp.export_numeric("drag_model.py", eqs)
+
+    from drag_model import F_d
+    F_d(A=..., c_d=..., rho=..., v=samples)   # vectorized over NumPy arrays
+
+Each equation becomes a function named after its left-hand side whose arguments
+are the free symbols of the right-hand side (sorted by name, unless args= fixes
+the order). Applied undefined functions and their derivatives become arguments
+too (x(t) -> x, Derivative(x(t), t) -> dx_dt). Bodies are printed by sympy's
+NumPyPrinter after common subexpression elimination, so nothing is lambdified at
+run time. The module's first lines carry a fingerprint of the equations; an
+existing module with the same fingerprint is left alone, so the (CSE) work is
+only redone when the math changes.
+"""
+from __future__ import annotations
+
+import hashlib
+import keyword
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence
+
+import sympy as sp
+from sympy.core.function import AppliedUndef
+
+from . import instrument
+
+# Bump when the generated code changes shape, so old modules are regenerated.
+_FORMAT_VERSION = 2
+_FINGERPRINT_PREFIX = "# spp-fingerprint: "
+
+# Lists eq() appends to while record_equations() scopes are open.
+_RECORDERS: list[list[sp.Equality]] = []
+
+
+@contextmanager
+def record_equations() -> Iterator[list[sp.Equality]]:
+    """
+    Collect the equations eq()/eq_batch() display in the scope (before display
+    cleaning, so derivatives and function arguments are kept).
+    """
+    recorded: list[sp.Equality] = []
+    _RECORDERS.append(recorded)
+    try:
+        yield recorded
+    finally:
+        _RECORDERS.remove(recorded)
+
+
+def record(lhs: Any, rhs: Optional[Any]) -> None:
+    if not _RECORDERS or rhs is None:
+        return
+    equation = sp.Eq(lhs, rhs, evaluate=False)
+    for recorded in _RECORDERS:
+        recorded.append(equation)
+
+
+def export_numeric(
+    path: str | Path,
+    equations: Sequence[Any],
+    *,
+    names: Optional[Sequence[str]] = None,
+    args: Optional[Sequence[sp.Symbol]] = None,
+) -> Path:
+    """
+    Write a module of NumPy functions for `equations` (Eq objects or (lhs, rhs) pairs,
+    e.g. the list from record_equations()) to path, unless it is already up to date.
+
+    names overrides the function names; args fixes one argument list for every function.
+    """
+    out = Path(path)
+    pairs = [(e.lhs, e.rhs) if isinstance(e, sp.Equality) else tuple(e) for e in equations]
+    if not pairs:
+        raise ValueError("export_numeric needs at least one equation")
+    if names is not None and len(names) != len(pairs):
+        raise ValueError(f"Got {len(names)} names for {len(pairs)} equations")
+    pairs = [(lhs, _as_basic(rhs)) for lhs, rhs in pairs]
+
+    taken: set[str] = set()
+    functions = []
+    for i, (lhs, rhs) in enumerate(pairs):
+        name = _unique(_identifier(names[i] if names is not None else _lhs_name(lhs, i)), taken)
+        functions.append((name, lhs, rhs))
+
+    fingerprint = _fingerprint(functions, args)
+    if _existing_fingerprint(out) == fingerprint:
+        instrument.record_cache("numeric", True)
+        return out
+    instrument.record_cache("numeric", False)
+
+    source = _module_source(out.stem, functions, args, fingerprint)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+    tmp.write_text(source, encoding="utf-8")
+    os.replace(tmp, out)
+    return out
+
+
+def _module_source(module: str, functions: list[tuple[str, Any, Any]], args: Optional[Sequence[sp.Symbol]], fingerprint: str) -> str:
+    from sympy.printing.numpy import NumPyPrinter
+
+    printer = NumPyPrinter({"fully_qualified_modules": True, "allow_unknown_functions": False})
+    lines = [
+        f"{_FINGERPRINT_PREFIX}{fingerprint}",
+        '"""',
+        f"{module}: generated by sympy_paper_printer.export_numeric from displayed equations; do not edit.",
+        '"""',
+        "import numpy",
+        "",
+    ]
+    for name, lhs, rhs in functions:
+        expr, params = _with_arguments(rhs, args)
+        body_names = sp.numbered_symbols("_x", exclude=expr.free_symbols)
+        replacements, (reduced,) = sp.cse([expr], symbols=body_names, order="none")
+        lines += ["", f"def {name}({', '.join(str(p) for p in params)}):"]
+        lines += ['    """', f"    {name} = {_doc_text(rhs)}", '    """']
+        lines += [f"    {sym} = {printer.doprint(sub)}" for sym, sub in replacements]
+        lines.append(f"    return {printer.doprint(reduced)}")
+        lines.append("")
+    lines += ["", f"__all__ = {[name for name, _, _ in functions]!r}", ""]
+    return "\n".join(lines)
+
+
+def _with_arguments(rhs: Any, args: Optional[Sequence[sp.Symbol]]) -> tuple[Any, list[sp.Symbol]]:
+    """
+    rhs with derivatives and applied undefined functions replaced by symbols, every
+    symbol renamed to a valid identifier, and the resulting parameter list.
+    """
+    # New names must not clash with the symbols already there (x*x(t) keeps two arguments).
+    used = {str(s) for s in rhs.free_symbols}
+    derivatives = sorted((d for d in rhs.atoms(sp.Derivative) if isinstance(d.expr, AppliedUndef)), key=str)
+    expr = rhs.xreplace({d: sp.Symbol(_unique(_derivative_name(d), used)) for d in derivatives})
+    functions = sorted(expr.atoms(AppliedUndef), key=str)
+    expr = expr.xreplace({f: sp.Symbol(_unique(f.func.__name__, used)) for f in functions})
+
+    if args is not None:
+        params = list(args)
+        missing = expr.free_symbols - set(params)
+        if missing:
+            raise ValueError(f"Not in args: {', '.join(sorted(map(str, missing)))}")
+    else:
+        params = sorted(expr.free_symbols, key=str)
+
+    taken: set[str] = set()
+    renames = {p: sp.Symbol(_unique(_identifier(str(p)), taken)) for p in params}
+    return expr.xreplace(renames), [renames[p] for p in params]
+
+
+def _lhs_name(lhs: Any, index: int) -> str:
+    if isinstance(lhs, (sp.Symbol, sp.MatrixSymbol)):
+        return str(lhs.name)
+    if isinstance(lhs, AppliedUndef):
+        return lhs.func.__name__
+    if isinstance(lhs, sp.Derivative) and isinstance(lhs.expr, AppliedUndef):
+        return _derivative_name(lhs)
+    return f"eq_{index}"
+
+
+def _derivative_name(d: sp.Derivative) -> str:
+    # Derivative(x(t), t) -> dx_dt, Derivative(x(t), (t, 2)) -> d2x_dt2
+    order = sum(count for _, count in d.variable_count)
+    variables = "".join(f"d{v}" + (str(c) if c > 1 else "") for v, c in d.variable_count)
+    return f"d{order if order > 1 else ''}{d.expr.func.__name__}_{variables}"
+
+
+def _identifier(text: str) -> str:
+    name = re.sub(r"\W+", "_", text).rstrip("_") or "_"
+    if name[0].isdigit():
+        name = f"_{name}"
+    if keyword.iskeyword(name) or name == "numpy":
+        name = f"{name}_"
+    return name
+
+
+def _unique(name: str, taken: set[str]) -> str:
+    candidate, n = name, 1
+    while candidate in taken:
+        n += 1
+        candidate = f"{name}_{n}"
+    taken.add(candidate)
+    return candidate
+
+
+def _as_basic(value: Any) -> Any:
+    if isinstance(value, sp.MatrixBase) and not isinstance(value, sp.ImmutableMatrix):
+        return sp.ImmutableMatrix(value)
+    return sp.sympify(value)
+
+
+def _doc_text(rhs: Any) -> str:
+    try:
+        text = str(rhs)
+    except RecursionError:
+        return "<very large expression>"
+    return text if len(text) <= 200 else text[:197] + "..."
+
+
+def _fingerprint(functions: list[tuple[str, Any, Any]], args: Optional[Sequence[sp.Symbol]]) -> str:
+    h = hashlib.sha256(f"v{_FORMAT_VERSION};sympy={sp.__version__};args={list(map(str, args or ()))}".encode("utf-8"))
+    for name, _, rhs in functions:
+        h.update(f"\n{name}=".encode("utf-8"))
+        _hash_tree(rhs, h)
+    return h.hexdigest()
+
+
+def _hash_tree(expr: Any, h: Any) -> None:
+    # Preorder with arities identifies the tree; iterative, so deep expressions are fine.
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        args = node.args if isinstance(node, sp.Basic) else ()
+        h.update(f"{type(node).__name__}/{len(args)}".encode("utf-8"))
+        if not args:
+            h.update(f":{node}".encode("utf-8"))
+            if isinstance(node, sp.Symbol):
+                h.update(repr(sorted(node.assumptions0.items())).encode("utf-8"))
+        h.update(b";")
+        stack.extend(reversed(args))
+
+
+def _existing_fingerprint(path: Path) -> Optional[str]:
+    try:
+        with path.open(encoding="utf-8") as f:
+            first = f.readline().strip()
+    except OSError:
+        return None
+    return first[len(_FINGERPRINT_PREFIX):] if first.startswith(_FINGERPRINT_PREFIX) else None
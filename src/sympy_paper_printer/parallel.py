@@ -0,0 +1,332 @@
+"""
+Dependency-aware parallel execution for build_report(..., kernels=N).
+
+Every code cell is parsed with ast to find the module-level names it reads and
+writes. A cell depends on the last earlier cell that wrote each name it reads.
+The plan keeps the shortest prefix of cells after which the remaining cells fall
+apart into independent groups; each group runs on its own kernel, preceded by
+the prefix cells it (transitively) needs, so the upstream state is rebuilt there.
+Setup cells injected by the build (working directory, figure format, ...) run on
+every kernel.
+The outputs are then merged back into the notebook in document order.
+
+The analysis is conservative: a method call on a name (x.append(...)) counts as
+a write of x. Calls on imported modules count as writes of the module when the
+call is a statement of its own (spp.configure(...), plt.plot(...)), since it is
+then made for its side effect, unless it is one of the display functions that
+only read state (spp.eq(...), spp.md(...), sp.pprint(...)); a module function
+whose result is used (sp.sin(t)) only reads the module. Magics, star imports or exec/eval/globals() make it give up,
+in which case the notebook runs serially as before. Mutation through function
+arguments and state outside Python names (files, RNG state) are not tracked.
+"""
+from __future__ import annotations
+
+import ast
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from .metrics import ChildUsage
+from .notebook import Notebook, cell_source, is_injected, read_notebook, write_notebook
+
+# Module functions called as statements only for their output, not to change state.
+_DISPLAY_CALLS = frozenset({"md", "eq", "eq_batch", "show", "display", "print", "pprint"})
+_DYNAMIC = frozenset({"exec", "eval", "globals", "locals", "vars", "get_ipython", "__import__", "__builtins__"})
+
+
+@dataclass(frozen=True)
+class CellNames:
+    reads: frozenset[str]
+    writes: frozenset[str]
+    mutates: frozenset[str] = frozenset()   # attribute or item stores, method calls made as statements
+    calls: frozenset[str] = frozenset()     # receivers of method calls whose result is used
+    imports: frozenset[str] = frozenset()   # names bound by import statements
+    certain: bool = True
+
+
+@dataclass
+class ExecutionPlan:
+    groups: list[list[int]]  # notebook cell indices per kernel, in document order
+    owner: dict[int, int] = field(default_factory=dict)  # cell index -> group whose outputs are kept
+
+
+def analyze_cell(source: str) -> CellNames:
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return CellNames(frozenset(), frozenset(), certain=False)  # magics, shell escapes, ...
+    visitor = _NameVisitor()
+    visitor.visit(tree)
+    return CellNames(
+        reads=frozenset(visitor.reads),
+        writes=frozenset(visitor.writes),
+        mutates=frozenset(visitor.mutates),
+        calls=frozenset(visitor.calls),
+        imports=frozenset(visitor.imports),
+        certain=not visitor.uncertain,
+    )
+
+
+def plan_execution(nb: Notebook, max_kernels: int) -> Optional[ExecutionPlan]:
+    """
+    Split the code cells over at most max_kernels kernels, or None if the notebook
+    should run serially (uncertain analysis, or nothing independent to split).
+    """
+    if max_kernels < 2:
+        return None
+    cells = nb.get("cells", [])
+    setup = [i for i, c in enumerate(cells) if c.get("cell_type") == "code" and is_injected(c)]
+    code = [i for i, c in enumerate(cells) if c.get("cell_type") == "code" and not is_injected(c)]
+    names = [analyze_cell(cell_source(cells[i])) for i in code]
+    if not code or not all(n.certain for n in names):
+        return None
+
+    modules = set().union(*(n.imports for n in names)) - set().union(*(n.writes - n.imports for n in names))
+    deps: list[set[int]] = []
+    last_writer: dict[str, int] = {}
+    for pos, n in enumerate(names):
+        mutated = n.mutates | (n.calls - modules)
+        deps.append({last_writer[name] for name in n.reads | mutated if name in last_writer})
+        for name in n.writes | mutated:
+            last_writer[name] = pos
+
+    for k in range(len(code)):
+        components = _components(deps, start=k)
+        if len(components) >= 2:
+            break
+    else:
+        return None
+
+    groups = _balance(components, max_kernels, weights=[len(cell_source(cells[i])) + 1 for i in code])
+    if len(groups) < 2:
+        return None
+
+    plan = ExecutionPlan(groups=[])
+    for g, members in enumerate(groups):
+        needed = set(range(k)) if g == 0 else _ancestors(members, deps, below=k)
+        positions = sorted(needed | set(members))
+        plan.groups.append(sorted(setup + [code[p] for p in positions]))
+        if g == 0:
+            plan.owner.update(dict.fromkeys(setup, 0))
+        for p in positions:
+            if p >= k or g == 0:
+                plan.owner[code[p]] = g
+    return plan
+
+
+def execute_plan(
+    ipynb: Path,
+    plan: ExecutionPlan,
+    run: Callable[[list[str]], Optional[ChildUsage]],
+) -> tuple[list[Optional[ChildUsage]], list[Path]]:
+    """
+    Write one notebook per group, execute them concurrently with nbconvert (through
+    `run`), and merge the outputs into ipynb (in place). Returns (usages, part notebooks).
+    """
+    nb = read_notebook(ipynb)
+    parts: list[Path] = []
+    for g, members in enumerate(plan.groups):
+        part = {**nb, "cells": [copy.deepcopy(nb["cells"][i]) for i in members]}
+        path = ipynb.with_name(f"{ipynb.stem}.part{g}.ipynb")
+        write_notebook(path, part)
+        parts.append(path)
+
+    commands = [["jupyter", "nbconvert", "--execute", "--to", "notebook", "--inplace", str(p)] for p in parts]
+    with ThreadPoolExecutor(max_workers=len(parts)) as pool:
+        usages = list(pool.map(run, commands))
+
+    for g, (members, path) in enumerate(zip(plan.groups, parts)):
+        executed = read_notebook(path)["cells"]
+        for index, cell in zip(members, executed):
+            if plan.owner.get(index) == g:
+                nb["cells"][index]["outputs"] = cell.get("outputs", [])
+
+    count = 0
+    for cell in nb["cells"]:
+        if cell.get("cell_type") == "code":
+            count += 1
+            cell["execution_count"] = count
+            for out in cell.get("outputs", []):
+                if "execution_count" in out:
+                    out["execution_count"] = count
+    write_notebook(ipynb, nb)
+    return usages, parts
+
+
+def _components(deps: Sequence[set[int]], *, start: int) -> list[list[int]]:
+    parent = list(range(len(deps)))
+
+    def find(a: int) -> int:
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    for j in range(start, len(deps)):
+        for i in deps[j]:
+            if i >= start:
+                parent[find(i)] = find(j)
+    groups: dict[int, list[int]] = {}
+    for j in range(start, len(deps)):
+        groups.setdefault(find(j), []).append(j)
+    return sorted(groups.values(), key=lambda g: g[0])
+
+
+def _balance(components: list[list[int]], max_groups: int, *, weights: Sequence[int]) -> list[list[int]]:
+    # Longest-processing-time first: heaviest component to the lightest group.
+    bins: list[tuple[int, list[int]]] = []
+    for comp in sorted(components, key=lambda c: -sum(weights[p] for p in c)):
+        w = sum(weights[p] for p in comp)
+        if len(bins) < max_groups:
+            bins.append((w, list(comp)))
+        else:
+            i = min(range(len(bins)), key=lambda b: bins[b][0])
+            bins[i] = (bins[i][0] + w, bins[i][1] + comp)
+    return sorted((sorted(members) for _, members in bins), key=lambda g: g[0])
+
+
+def _ancestors(members: Sequence[int], deps: Sequence[set[int]], *, below: int) -> set[int]:
+    seen: set[int] = set()
+    stack = [i for m in members for i in deps[m] if i < below]
+    while stack:
+        i = stack.pop()
+        if i in seen:
+            continue
+        seen.add(i)
+        stack.extend(d for d in deps[i] if d not in seen)
+    return seen
+
+
+class _NameVisitor(ast.NodeVisitor):
+    """
+    Module-level names a cell reads and binds. Loads anywhere (also inside function
+    bodies) count as reads, which over-approximates and is safe; stores inside
+    functions, lambdas and comprehensions are local and don't count as writes.
+    """
+
+    def __init__(self) -> None:
+        self.reads: set[str] = set()
+        self.writes: set[str] = set()
+        self.mutates: set[str] = set()
+        self.calls: set[str] = set()
+        self.imports: set[str] = set()
+        self.uncertain = False
+        self._depth = 0  # > 0 inside a function/class/comprehension scope
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.reads.add(node.id)
+            if node.id in _DYNAMIC:
+                self.uncertain = True
+        elif self._depth == 0:
+            self.writes.add(node.id)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            name = alias.asname or alias.name.split(".")[0]
+            self._bind_import(name)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            if alias.name == "*":
+                self.uncertain = True
+            else:
+                self._bind_import(alias.asname or alias.name)
+
+    def _bind_import(self, name: str) -> None:
+        if self._depth == 0:
+            self.writes.add(name)
+            self.imports.add(name)
+
+    def visit_Global(self, node: ast.Global) -> None:
+        self.writes.update(node.names)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        for deco in node.decorator_list:
+            self.visit(deco)
+        self.visit(node.args)
+        if node.returns is not None:
+            self.visit(node.returns)
+        if self._depth == 0:
+            self.writes.add(node.name)
+        self._scoped(node.body)
+
+    visit_AsyncFunctionDef = visit_FunctionDef  # type: ignore[assignment]
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        for expr in [*node.decorator_list, *node.bases, *(k.value for k in node.keywords)]:
+            self.visit(expr)
+        if self._depth == 0:
+            self.writes.add(node.name)
+        self._scoped(node.body)
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        self.visit(node.args)
+        self._scoped([node.body])
+
+    def visit_ListComp(self, node: ast.ListComp) -> None:
+        self._in_scope(node)
+
+    visit_SetComp = visit_GeneratorExp = visit_DictComp = visit_ListComp  # type: ignore[assignment]
+
+    def visit_NamedExpr(self, node: ast.NamedExpr) -> None:
+        # The walrus binds in the enclosing function, or the module at top level / in comprehensions.
+        self.visit(node.value)
+        self.writes.add(node.target.id)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if not isinstance(node.ctx, ast.Load):
+            self._mutate(node.value)
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node: ast.Subscript) -> None:
+        if not isinstance(node.ctx, ast.Load):
+            self._mutate(node.value)
+        self.generic_visit(node)
+
+    def visit_Expr(self, node: ast.Expr) -> None:
+        call = node.value
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) and call.func.attr not in _DISPLAY_CALLS:
+            self._mutate(call.func.value)
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if isinstance(node.func, ast.Attribute):
+            root = _root_name(node.func.value)
+            if root is not None:
+                self.calls.add(root)
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node: ast.AugAssign) -> None:
+        if isinstance(node.target, ast.Name):
+            self.reads.add(node.target.id)
+        self.generic_visit(node)
+
+    def _mutate(self, target: ast.AST) -> None:
+        root = _root_name(target)
+        if root is not None:
+            self.mutates.add(root)
+
+    def _scoped(self, body: Sequence[ast.AST]) -> None:
+        self._depth += 1
+        try:
+            for stmt in body:
+                self.visit(stmt)
+        finally:
+            self._depth -= 1
+
+    def _in_scope(self, node: ast.AST) -> None:
+        self._depth += 1
+        try:
+            self.generic_visit(node)
+        finally:
+            self._depth -= 1
+
+
+def _root_name(target: ast.AST) -> Optional[str]:
+    # a.b[0].c -> "a"
+    while isinstance(target, (ast.Attribute, ast.Subscript)):
+        target = target.value
+    return target.id if isinstance(target, ast.Name) else None
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import base64
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, Sequence
+
+from .notebook import Notebook, cell_source
+
+# A filter takes the line stream (line endings included) and yields the cleaned stream.
+# Filters are generators chained together, so a whole document is cleaned in one pass
+# over the file and only a filter's current block is ever held in memory.
+LineFilter = Callable[[Iterator[str]], Iterator[str]]
+
+_FENCE = re.compile(r"^(?P<indent> {0,3})(?P<fence>`{3,}|~{3,})")
+_IMAGE = re.compile(r"(!\[[^\]]*\]\()(?P<path><[^>]*>|[^)\s]+)")
+_MATH_FENCE = re.compile(r"^\s*\$\$\s*$")
+
+# Output representations pandoc can typeset, best first (text/html would only be raw HTML).
+_TEXT_MIMES = ("text/markdown", "text/latex")
+_IMAGE_MIMES = {"image/png": "png", "image/jpeg": "jpg", "image/svg+xml": "svg"}
+
+
+def apply_filters(md_path: Path, filters: Sequence[LineFilter]) -> None:
+    """
+    Stream md_path through the filters into a temp file next to it, then rename it over
+    the original. Missing files are ignored.
+    """
+    if not md_path.exists():
+        return
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{md_path.stem}.", suffix=".tmp", dir=md_path.parent)
+    tmp = Path(tmp_name)
+    try:
+        with md_path.open(encoding="utf-8", newline="") as src, os.fdopen(fd, "w", encoding="utf-8", newline="") as dst:
+            lines: Iterator[str] = iter(src)
+            for f in filters:
+                lines = f(lines)
+            dst.writelines(lines)
+        os.replace(tmp, md_path)
+    finally:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def drop_lone_percent(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Drop p2j-style lone '%' lines.
+    """
+    for line in lines:
+        if line.rstrip("\r\n") != "%":
+            yield line
+
+
+def strip_empty_output_blocks(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Drop fenced code blocks whose body is blank (e.g. a cell that printed nothing).
+    Only the leading blank lines of an open block are buffered.
+    """
+    lines = iter(lines)
+    pending: list[str] = []
+    closer = ""
+    for line in lines:
+        if not pending:
+            m = _FENCE.match(line)
+            if m:
+                pending = [line]
+                closer = m.group("fence")
+            else:
+                yield line
+            continue
+        stripped = line.strip()
+        if stripped.startswith(closer) and not stripped.strip(closer[0]):
+            pending = []  # nothing but blank lines between the fences: drop the block
+            continue
+        if stripped:
+            yield from pending
+            pending = []
+            yield from _copy_fenced(line, lines, closer)
+            continue
+        pending.append(line)
+    yield from pending
+
+
+def _copy_fenced(first: str, lines: Iterable[str], closer: str) -> Iterator[str]:
+    # Pass the rest of a non-empty fenced block through untouched.
+    yield first
+    for line in lines:
+        yield line
+        stripped = line.strip()
+        if stripped.startswith(closer) and not stripped.strip(closer[0]):
+            return
+
+
+def rewrite_image_paths(rewrite: Callable[[str], str] | Mapping[str, str]) -> LineFilter:
+    """
+    Filter rewriting the targets of markdown images (![alt](path)). `rewrite` is either
+    a function of the old path or a mapping (paths not in it are left alone).
+    """
+    if isinstance(rewrite, Mapping):
+        table = rewrite
+        rewrite = lambda p: table.get(p, p)  # noqa: E731
+
+    def substitute(m: re.Match) -> str:
+        path = m.group("path")
+        if path.startswith("<"):
+            return f"{m.group(1)}<{rewrite(path[1:-1])}>"
+        return m.group(1) + rewrite(path)
+
+    def _filter(lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            yield _IMAGE.sub(substitute, line) if "![" in line else line
+
+    return _filter
+
+
+def normalize_math_fences(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Make $$ display-math blocks safe for pandoc: the fences start at column 0 (an
+    indented fence can turn the block into code) and blank lines inside the block,
+    which would end the paragraph and break the math, are dropped. A fence may share
+    its line with math ($$ x = y); a single-line $$ ... $$ is left alone. Code blocks
+    are skipped.
+    """
+    in_math = False
+    code_closer = ""
+    for line in lines:
+        if code_closer:
+            stripped = line.strip()
+            if stripped.startswith(code_closer) and not stripped.strip(code_closer[0]):
+                code_closer = ""
+            yield line
+        elif not in_math and (m := _FENCE.match(line)):
+            code_closer = m.group("fence")
+            yield line
+        elif _MATH_FENCE.match(line):
+            in_math = not in_math
+            yield "$$" + _ending(line)
+        elif (opens := line.lstrip().startswith("$$")) or in_math and "$$" in line:
+            # A fence sharing its line with math ($$ x = y, x = y $$) toggles; $$ x = y $$ is balanced.
+            if line.count("$$") % 2:
+                in_math = not in_math
+            yield line.lstrip(" \t") if opens else line
+        elif in_math and not line.strip():
+            continue
+        else:
+            yield line
+
+
+def notebook_for_pandoc(nb: Notebook, filters: Optional[Sequence[LineFilter]] = None) -> Notebook:
+    """
+    In-memory equivalent of `nbconvert --to markdown --no-input` for pandoc's ipynb reader:
+    each code cell becomes a markdown cell holding only its outputs (figures as cell
+    attachments), and every markdown cell is run through the line filters.
+    """
+    chain = DEFAULT_FILTERS if filters is None else filters
+    cells: list[dict[str, Any]] = []
+    for cell in nb.get("cells", []):
+        kind = cell.get("cell_type")
+        if kind == "markdown":
+            text, attachments = cell_source(cell), dict(cell.get("attachments") or {})
+        elif kind == "code":
+            text, attachments = _outputs_markdown(cell)
+        else:
+            cells.append(cell)
+            continue
+        text = _filter_text(text, chain)
+        if not text.strip() and not attachments:
+            continue
+        new = {"cell_type": "markdown", "metadata": {}, "source": text}
+        if "id" in cell:
+            new["id"] = cell["id"]
+        if attachments:
+            new["attachments"] = attachments
+        cells.append(new)
+    return {**nb, "cells": cells}
+
+
+def _outputs_markdown(cell: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+    parts: list[str] = []
+    attachments: dict[str, Any] = {}
+    for i, output in enumerate(cell.get("outputs", [])):
+        otype = output.get("output_type")
+        if otype == "stream":
+            parts.append(_fenced(_joined(output.get("text", ""))))
+        elif otype in ("display_data", "execute_result"):
+            data = output.get("data", {})
+            text_mime = next((m for m in _TEXT_MIMES if m in data), None)
+            image_mime = next((m for m in _IMAGE_MIMES if m in data), None)
+            if text_mime is not None:
+                parts.append(_joined(data[text_mime]).strip("\n"))
+            elif image_mime is not None:
+                name = f"output_{i}.{_IMAGE_MIMES[image_mime]}"
+                payload = _joined(data[image_mime])
+                if image_mime == "image/svg+xml":
+                    payload = base64.b64encode(payload.encode("utf-8")).decode("ascii")
+                attachments[name] = {image_mime: payload.replace("\n", "")}
+                parts.append(f"![{_IMAGE_MIMES[image_mime]}](attachment:{name})")
+            elif "text/plain" in data:
+                parts.append(_fenced(_joined(data["text/plain"])))
+    return "\n\n".join(p for p in parts if p.strip()) + "\n", attachments
+
+
+def _joined(value: str | list[str]) -> str:
+    return "".join(value) if isinstance(value, list) else value
+
+
+def _fenced(text: str) -> str:
+    return f"```\n{text.rstrip()}\n```" if text.strip() else ""
+
+
+def _filter_text(text: str, filters: Sequence[LineFilter]) -> str:
+    lines: Iterator[str] = iter(text.splitlines(True))
+    for f in filters:
+        lines = f(lines)
+    return "".join(lines)
+
+
+def _ending(line: str) -> str:
+    return line[len(line.rstrip("\r\n")):]
+
+
+DEFAULT_FILTERS: tuple[LineFilter, ...] = (drop_lone_percent, strip_empty_output_blocks, normalize_math_fences)
+
+
+def filters_key(filters: Optional[Sequence[LineFilter]]) -> str:
+    """
+    Names of the filters in a chain, for cache keys ("default" for DEFAULT_FILTERS).
+    """
+    if filters is None:
+        return "default"
+    return ",".join(f"{getattr(f, '__module__', '?')}.{getattr(f, '__qualname__', type(f).__name__)}" for f in filters)
@@ -0,0 +1,283 @@
+"""
+Per-cell execution profiling for build_report(..., profile=True).
+
+A tagged setup cell is injected at the top of the notebook before execution. It
+registers IPython pre/post_run_cell hooks in the kernel that record wall time,
+CPU time, memory and (optionally) a cProfile/pyinstrument capture of the slowest
+cells, appending one JSON line per cell. Memory is how much the kernel's peak RSS
+grew during the cell, which costs nothing to measure; trace_memory=True reports
+the cell's peak tracemalloc memory instead, which is exact but slows down
+allocation-heavy cells (and so their timings). After execution the
+records are matched back to notebook cells and to line ranges of the source .py.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from .cells import read_percent_cells
+from .notebook import cell_source, code_cells, insert_code_cell, read_notebook, remove_injected_cells, write_notebook
+
+PROFILE_TAG = "spp-profile"
+
+
+@dataclass
+class CellProfile:
+    cell: int  # index among the notebook's code cells
+    lines: Optional[tuple[int, int]]  # 1-based inclusive line range in the source .py
+    wall_time: float
+    cpu_time: float
+    peak_memory_kb: int  # peak RSS growth, or traced peak with trace_memory=True
+    output_bytes: int
+    success: bool = True
+    capture: Optional[Path] = None  # cProfile .prof or pyinstrument .txt, top-N cells only
+
+
+@dataclass
+class ProfileReport:
+    source: Path
+    cells: list[CellProfile] = field(default_factory=list)
+
+    def slowest(self, n: int = 10) -> list[CellProfile]:
+        return sorted(self.cells, key=lambda c: c.wall_time, reverse=True)[:n]
+
+    def summary(self, n: int = 10) -> str:
+        lines = [f"Slowest cells of {self.source.name} (of {len(self.cells)} executed):"]
+        lines.append(f"{'cell':>5} {'lines':>11} {'wall s':>9} {'cpu s':>9} {'peak KiB':>10} {'out KiB':>9}")
+        for c in self.slowest(n):
+            where = f"{c.lines[0]}-{c.lines[1]}" if c.lines else "?"
+            flag = "" if c.success else "  (failed)"
+            lines.append(
+                f"{c.cell:>5} {where:>11} {c.wall_time:>9.3f} {c.cpu_time:>9.3f} "
+                f"{c.peak_memory_kb:>10} {c.output_bytes / 1024:>9.1f}{flag}"
+            )
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict[str, Any]:
+        cells = []
+        for c in self.slowest(len(self.cells)):
+            d = asdict(c)
+            d["capture"] = str(c.capture) if c.capture else None
+            cells.append(d)
+        return {"source": str(self.source), "cells": cells}
+
+    def write(self, json_path: Path) -> None:
+        """
+        Write the sidecar JSON (sorted slowest first) and a plain-text summary next to it.
+        """
+        json_path.write_text(json.dumps(self.to_dict(), indent=1), encoding="utf-8")
+        json_path.with_suffix(".txt").write_text(self.summary(len(self.cells)) + "\n", encoding="utf-8")
+
+
+def prepare_notebook(
+    ipynb: Path,
+    data_path: Path,
+    *,
+    capture_dir: Optional[Path] = None,
+    top_n: int = 0,
+    profiler: str = "cprofile",
+    trace_memory: bool = False,
+) -> None:
+    """
+    Inject the kernel-side setup cell into ipynb (in place).
+    """
+    if profiler not in ("cprofile", "pyinstrument"):
+        raise ValueError(f"Unsupported profiler: {profiler!r}")
+    if data_path.exists():
+        data_path.unlink()
+    source = (
+        "import sympy_paper_printer.profiling as _spp_profiling\n"
+        f"_spp_profiling.install_cell_profiler({str(data_path)!r}, "
+        f"capture_dir={str(capture_dir) if capture_dir else None!r}, top_n={top_n}, profiler={profiler!r}, "
+        f"trace_memory={trace_memory!r})\n"
+    )
+    nb = read_notebook(ipynb)
+    insert_code_cell(nb, 0, source, tag=PROFILE_TAG)
+    write_notebook(ipynb, nb)
+
+
+def collect(ipynb: Path, data_path: Path, source_py: Path) -> ProfileReport:
+    """
+    Read the kernel's records, strip the injected cells from ipynb (in place) and
+    map every record to a notebook code cell and a line range of source_py.
+    """
+    nb = read_notebook(ipynb)
+    remove_injected_cells(nb)
+    write_notebook(ipynb, nb)
+
+    cells = list(code_cells(nb))
+    by_id = {c.get("id"): i for i, c in enumerate(cells) if c.get("id")}
+    digests = [_digest(cell_source(c)) for c in cells]
+
+    src_code = [c for c in read_percent_cells(source_py) if c.kind == "code"]
+    # jupytext maps percent cells 1:1 onto notebook cells; if the counts differ, don't guess.
+    line_ranges = [(c.start_line, c.end_line) for c in src_code] if len(src_code) == len(cells) else None
+
+    report = ProfileReport(source=source_py)
+    if not data_path.exists():
+        return report
+
+    cursor = 0
+    for line in data_path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        rec = json.loads(line)
+        index = by_id.get(rec.get("cell_id"))
+        if index is None:
+            # No cell id from the client: match sources in execution order.
+            index = next((i for i in range(cursor, len(cells)) if digests[i] == rec["digest"]), None)
+        if index is None:
+            continue
+        cursor = index + 1
+
+        capture = Path(rec["capture"]) if rec.get("capture") else None
+        report.cells.append(
+            CellProfile(
+                cell=index,
+                lines=line_ranges[index] if line_ranges else None,
+                wall_time=rec["wall_time"],
+                cpu_time=rec["cpu_time"],
+                peak_memory_kb=rec["peak_memory_kb"],
+                output_bytes=len(json.dumps(cells[index].get("outputs", []))),
+                success=rec.get("success", True),
+                capture=capture if capture is not None and capture.exists() else None,
+            )
+        )
+    return report
+
+
+# --------------------------------------------------------------------------------------
+# Kernel side
+# --------------------------------------------------------------------------------------
+
+def install_cell_profiler(
+    data_path: str,
+    *,
+    capture_dir: Optional[str] = None,
+    top_n: int = 0,
+    profiler: str = "cprofile",
+    trace_memory: bool = False,
+) -> None:
+    """
+    Called from the injected setup cell inside the kernel.
+    """
+    from IPython import get_ipython  # type: ignore
+
+    ip = get_ipython()
+    if ip is None:
+        return
+    hooks = _KernelCellProfiler(Path(data_path), Path(capture_dir) if capture_dir else None, top_n, profiler, trace_memory)
+    ip.events.register("pre_run_cell", hooks.pre_run_cell)
+    ip.events.register("post_run_cell", hooks.post_run_cell)
+
+
+class _KernelCellProfiler:
+    def __init__(self, data_path: Path, capture_dir: Optional[Path], top_n: int, profiler: str, trace_memory: bool = False) -> None:
+        self.data_path = data_path
+        self.capture_dir = capture_dir
+        self.top_n = top_n if capture_dir is not None else 0
+        self.profiler_kind = profiler
+        self._start: Optional[tuple[float, float]] = None
+        self._cell_id: Optional[str] = None
+        self._digest = ""
+        self._profiler: Any = None
+        self._seq = 0
+        self._kept: list[tuple[float, Path]] = []
+        self.trace_memory = trace_memory
+        self._rss_before = 0
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def pre_run_cell(self, info: Any) -> None:
+        self._cell_id = getattr(info, "cell_id", None)
+        self._digest = _digest(getattr(info, "raw_cell", "") or "")
+        self._profiler = self._start_profiler() if self.top_n > 0 else None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        else:
+            self._rss_before = _max_rss_kb()
+        self._start = (time.perf_counter(), time.process_time())
+
+    def post_run_cell(self, result: Any) -> None:
+        if self._start is None:  # the setup cell itself
+            return
+        wall = time.perf_counter() - self._start[0]
+        cpu = time.process_time() - self._start[1]
+        if self.trace_memory:
+            peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+        else:
+            peak_kb = max(0, _max_rss_kb() - self._rss_before)
+        self._start = None
+        self._seq += 1
+
+        capture = self._keep_capture(wall) if self._profiler is not None else None
+        record = {
+            "seq": self._seq,
+            "cell_id": self._cell_id,
+            "digest": self._digest,
+            "wall_time": wall,
+            "cpu_time": cpu,
+            "peak_memory_kb": peak_kb,
+            "success": bool(getattr(result, "success", True)),
+            "capture": str(capture) if capture else None,
+        }
+        with self.data_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _start_profiler(self) -> Any:
+        if self.profiler_kind == "pyinstrument":
+            from pyinstrument import Profiler  # type: ignore
+            prof = Profiler()
+        else:
+            import cProfile
+            prof = cProfile.Profile()
+        if self.profiler_kind == "pyinstrument":
+            prof.start()
+        else:
+            prof.enable()
+        return prof
+
+    def _keep_capture(self, wall: float) -> Optional[Path]:
+        prof, self._profiler = self._profiler, None
+        if self.profiler_kind == "pyinstrument":
+            prof.stop()
+        else:
+            prof.disable()
+
+        if len(self._kept) >= self.top_n and wall <= self._kept[0][0]:
+            return None
+
+        assert self.capture_dir is not None
+        self.capture_dir.mkdir(parents=True, exist_ok=True)
+        if self.profiler_kind == "pyinstrument":
+            path = self.capture_dir / f"cell-{self._seq:04d}.txt"
+            path.write_text(prof.output_text(), encoding="utf-8")
+        else:
+            path = self.capture_dir / f"cell-{self._seq:04d}.prof"
+            prof.dump_stats(str(path))
+
+        self._kept.append((wall, path))
+        self._kept.sort(key=lambda kv: kv[0])
+        while len(self._kept) > self.top_n:
+            _, evicted = self._kept.pop(0)
+            evicted.unlink(missing_ok=True)
+        return path
+
+
+def _max_rss_kb() -> int:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS, KiB elsewhere
+
+
+def _digest(source: str) -> str:
+    return hashlib.sha1(source.strip().encode("utf-8")).hexdigest()
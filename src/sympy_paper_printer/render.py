@@ -1,25 +1,55 @@
 from __future__ import annotations
 
-from typing import Any, Optional, Tuple, Union
+import hashlib
+import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Any, Optional, Sequence, Tuple, Union
 import sympy as sp
 
-from .config import get_config
+from . import instrument, numeric
+from .blocks import Block, iter_blocks
+from .config import Config, configured, get_config
+from .latex import count_nodes, iterative_latex, needs_iterative, to_latex
 from .runtime import is_interactive
 from .sympy_view import clean_undefined_function_args, dotify_time_derivatives
 
 
-def md(text: str) -> None:
+# What eq/md/show accept as display_id: a name, True for a fresh one, or None.
+DisplayId = Union[str, bool, None]
+
+# display_id -> (execution count it was last shown in, digest of what it shows)
+_DISPLAYED: dict[str, Tuple[Optional[int], str]] = {}
+
+
+def md(text: str, *, display_id: DisplayId = None) -> Optional[str]:
     """
     Display markdown in notebook-like environments; print in scripts.
+
+    display_id works as for eq().
     """
     cfg = get_config()
     if cfg.silent:
-        return
+        return None
+
+    did = _resolve_display_id(display_id)
+    call = instrument.begin("md", text)
+    with instrument.phase(call, "display"):
+        _display_markdown(text, did)
+    instrument.end(call)
+    return did
 
+
+def _display_markdown(text: str, display_id: Optional[str] = None) -> None:
     if is_interactive():
         try:
             from IPython.display import Markdown, display  # type: ignore
-            display(Markdown(text))
+            if display_id is None:
+                display(Markdown(text))
+            else:
+                _publish({"text/markdown": text, "text/plain": text}, display_id)
             return
         except Exception:
             pass
@@ -27,45 +57,384 @@ def md(text: str) -> None:
     print(text)
 
 
-def eq(lhs_or_eq: Any, rhs: Any = None, *, clean: Optional[bool] = None, t: Optional[sp.Symbol] = None) -> None:
+def eq(
+    lhs_or_eq: Any,
+    rhs: Any = None,
+    *,
+    clean: Optional[bool] = None,
+    t: Optional[sp.Symbol] = None,
+    cse: Optional[bool] = None,
+    display_id: DisplayId = None,
+    blocks: Optional[bool] = None,
+) -> Optional[str]:
     """
     Display an equation. Accepts:
     - eq(Eq(...))
     - eq(lhs, rhs)
     - eq("x", expr)  -> creates Symbol('x') or MatrixSymbol if rhs is Matrix-like
+
+    cse=True (or, by default, an equation above Config.cse_threshold nodes) shows the
+    common subexpressions as c_1 = ..., c_2 = ... followed by the reduced equation.
+
+    display_id="name" (or True for a generated one) makes the output an updatable
+    display and returns its id: rendering again with the same id replaces that output
+    in place instead of adding another (see Config.display_updates), and nothing is
+    sent when the rendered content is unchanged (Config.skip_unchanged_displays).
+
+    blocks=True (or, by default, a matrix with more than Config.matrix_block_threshold
+    entries) cleans, prints and displays the matrix one Config.matrix_block_size tile at
+    a time, as A_[rows, cols] = tile; zero tiles are left out and a tile equal to an
+    earlier one refers to it.
     """
     cfg = get_config()
     if cfg.silent:
-        return
+        return None
 
-    lhs, rhs2 = _normalize_equation(lhs_or_eq, rhs)
+    did = _resolve_display_id(display_id)
+    call = instrument.begin("eq", lhs_or_eq)
+    with instrument.phase(call, "normalize"):
+        lhs, rhs2 = _normalize_equation(lhs_or_eq, rhs)
+    if call is not None:
+        call.measure(rhs2 if rhs2 is not None else lhs)
+    numeric.record(lhs, rhs2)
 
     do_clean = cfg.clean_equations if clean is None else clean
+    if _use_blocks(rhs2, blocks, cfg):
+        if do_clean:
+            with instrument.phase(call, "clean"):
+                lhs = _to_display(lhs, None, t=t)[0]
+        _display_blocks(lhs, rhs2, clean=do_clean, t=t, call=call, display_id=did)
+        instrument.end(call)
+        return did
+
     if do_clean:
-        lhs, rhs2 = _to_display(lhs, rhs2, t=t)
+        with instrument.phase(call, "clean"):
+            lhs, rhs2 = _to_display(lhs, rhs2, t=t)
 
-    # Display
-    if is_interactive():
+    if _use_cse(lhs, rhs2, cse, cfg):
+        with instrument.phase(call, "cse"):
+            steps = _cse_steps(lhs, rhs2, prefix=cfg.cse_symbol)
+    else:
+        steps = [lhs if rhs2 is None else sp.Eq(lhs, rhs2)]
+    if did is None:
+        for step in steps:
+            _display_math(step, call)
+    else:
+        _display_math(steps[0] if len(steps) == 1 else steps, call, did)  # one display for all steps
+    instrument.end(call)
+    return did
+
+
+def eq_batch(
+    equations: Sequence[Any],
+    *,
+    workers: Optional[int] = None,
+    clean: Optional[bool] = None,
+    t: Optional[sp.Symbol] = None,
+    cse: Optional[bool] = None,
+) -> None:
+    """
+    Display many equations at once; cleaning and LaTeX printing run in a process pool.
+
+    Each item is what eq() takes as its first argument(s): an Eq, or an (lhs, rhs) pair.
+    Expressions are sent to the workers pickled and the results are displayed in input
+    order, so the output is the same as calling eq() on each item. Batches smaller than
+    Config.batch_parallel_threshold nodes in total (or workers=1) are rendered serially.
+    """
+    cfg = get_config()
+    if cfg.silent or not equations:
+        return
+
+    call = instrument.begin("eq_batch", f"{len(equations)} equations")
+    with instrument.phase(call, "normalize"):
+        pairs = [_normalize_equation(*(item if isinstance(item, tuple) else (item, None))) for item in equations]
+    for lhs, rhs2 in pairs:
+        numeric.record(lhs, rhs2)
+    do_clean = cfg.clean_equations if clean is None else clean
+    interactive = is_interactive()
+    payloads = [(lhs, rhs2, do_clean, t, cse, interactive, cfg) for lhs, rhs2 in pairs]
+
+    with instrument.phase(call, "latex"):
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(payloads) > 1 and _batch_is_large(pairs, cfg.batch_parallel_threshold):
+            with ProcessPoolExecutor(max_workers=min(workers, len(payloads))) as pool:
+                rendered = list(pool.map(_render_equation, payloads))
+        else:
+            rendered = [_render_equation(p) for p in payloads]
+
+    with instrument.phase(call, "display"):
+        for bundles in rendered:
+            for bundle in bundles:
+                _display_bundle(bundle)
+    instrument.end(call)
+
+
+def _batch_is_large(pairs: Sequence[Tuple[Any, Optional[Any]]], threshold: Optional[int]) -> bool:
+    if threshold is None:
+        return True
+    total = 0
+    for lhs, rhs in pairs:
+        for side in (lhs, rhs):
+            if side is not None:
+                total += count_nodes(side, limit=threshold - total)
+                if total > threshold:
+                    return True
+    return False
+
+
+def _render_equation(payload: tuple) -> list[dict[str, str]]:
+    """
+    Clean and print one equation; runs in pool workers, which start with their own config.
+    """
+    lhs, rhs, do_clean, t, cse, interactive, cfg = payload
+    with configured(**asdict(cfg)):
+        if do_clean:
+            lhs, rhs = _to_display(lhs, rhs, t=t)
+        if _use_cse(lhs, rhs, cse, cfg):
+            steps = _cse_steps(lhs, rhs, prefix=cfg.cse_symbol)
+        else:
+            steps = [lhs if rhs is None else sp.Eq(lhs, rhs)]
+        if not interactive:
+            return [{"text/plain": _plain_text(step)} for step in steps]
+        return [_math_bundle(step) for step in steps]
+
+
+def _display_bundle(bundle: dict[str, str]) -> None:
+    if "text/latex" in bundle:
         try:
             from IPython.display import display  # type: ignore
-            display(lhs if rhs2 is None else sp.Eq(lhs, rhs2))
+            display(bundle, raw=True)
             return
         except Exception:
             pass
+    print(bundle["text/plain"])
+
+
+def _use_cse(lhs: Any, rhs: Optional[Any], cse: Optional[bool], cfg: Config) -> bool:
+    if cse is not None:
+        return cse
+    if cfg.cse_threshold is None:
+        return False
+    n = count_nodes(lhs, limit=cfg.cse_threshold)
+    if rhs is not None:
+        n += count_nodes(rhs, limit=cfg.cse_threshold)
+    return n > cfg.cse_threshold
+
+
+def _cse_steps(lhs: Any, rhs: Optional[Any], *, prefix: str) -> list[Any]:
+    """
+    [Eq(c_1, sub_1), ..., reduced equation]; just the equation if nothing repeats.
+    """
+    exprs = [lhs] if rhs is None else [lhs, rhs]
+    taken = set().union(*(e.free_symbols for e in exprs))
+    names = sp.numbered_symbols(f"{prefix}_", start=1, exclude=taken)
+    try:
+        replacements, reduced = sp.cse(exprs, symbols=names, order="none")
+    except RecursionError:
+        replacements, reduced = [], exprs
+    steps: list[Any] = [sp.Eq(sym, sub) for sym, sub in replacements]
+    steps.append(reduced[0] if rhs is None else sp.Eq(reduced[0], reduced[1]))
+    return steps
+
+
+def _use_blocks(value: Any, blocks: Optional[bool], cfg: Config) -> bool:
+    if not isinstance(value, sp.MatrixBase):
+        return False
+    if blocks is not None:
+        return blocks
+    return cfg.matrix_block_threshold is not None and value.rows * value.cols > cfg.matrix_block_threshold
+
+
+def _display_blocks(
+    name: Optional[Any],
+    matrix: Any,
+    *,
+    clean: bool,
+    t: Optional[sp.Symbol],
+    call: Optional[instrument.RenderCall],
+    display_id: Optional[str],
+) -> None:
+    """
+    One display per nonzero tile (so LaTeX can break pages between them), then a note
+    on what was left out. Only one tile is cleaned and printed at a time.
+    """
+    cfg = get_config()
+    label = "M" if name is None else _plain_text(name)
+    label_tex = "M" if name is None else to_latex(name)
+    rows, cols = matrix.shape
+    block_rows, block_cols = cfg.matrix_block_size
+    count = 0
+
+    def emit(tex: str, plain: str) -> None:
+        nonlocal count
+        did = None if display_id is None else f"{display_id}/{count}"
+        count += 1
+        with instrument.phase(call, "display"):
+            if is_interactive():
+                try:
+                    _publish({"text/latex": f"$\\displaystyle {tex}$", "text/plain": plain}, did)
+                    return
+                except Exception:
+                    pass
+            print(plain)
+
+    def ref(block: Block) -> tuple[str, str]:
+        return f"{{{label_tex}}}_{{{block.tex_index}}}", f"{label}{block.py_index}"
+
+    emit(
+        rf"{label_tex}:\ {rows} \times {cols} \text{{ matrix in }} {block_rows} \times {block_cols} \text{{ blocks}}",
+        f"{label}: {rows} x {cols} matrix in {block_rows} x {block_cols} blocks",
+    )
+    zeros = hidden = shown = 0
+    for block in iter_blocks(matrix, cfg.matrix_block_size):
+        if block.zero:
+            zeros += 1
+            continue
+        if cfg.matrix_max_blocks is not None and shown >= cfg.matrix_max_blocks:
+            hidden += 1
+            continue
+        shown += 1
+        tex, plain = ref(block)
+        if block.same_as is not None:
+            earlier_tex, earlier_plain = ref(block.same_as)
+            emit(f"{tex} = {earlier_tex}", f"{plain} = {earlier_plain}")
+            continue
+        tile = block.matrix
+        if clean:
+            with instrument.phase(call, "clean"):
+                tile = _to_display(tile, None, t=t)[0]
+        with instrument.phase(call, "latex"):
+            tile_tex, tile_plain = _latex_and_plain(tile)
+        emit(f"{tex} = {tile_tex}", f"{plain} = {tile_plain}")
+    if zeros:
+        emit(rf"\text{{all other blocks of }} {label_tex} \text{{ are zero ({zeros} blocks)}}", f"{zeros} zero blocks of {label} not shown")
+    if hidden:
+        emit(rf"\text{{{hidden} more nonzero blocks not shown}}", f"{hidden} more nonzero blocks of {label} not shown")
+
+
+def _display_math(obj: Any, call: Optional[instrument.RenderCall] = None, display_id: Optional[str] = None) -> None:
+    # obj is an expression, or a list of cse steps shown together under display_id.
+    if is_interactive():
+        try:
+            from IPython.display import display  # type: ignore
+        except Exception:
+            pass
+        else:
+            # Print LaTeX ourselves (same output as sympy's _repr_latex_) so it can be timed apart from display.
+            # Oversized expressions go through the iterative printer instead of sympy's recursive ones.
+            with instrument.phase(call, "latex"):
+                bundle = _steps_bundle(obj) if isinstance(obj, list) else _math_bundle(obj)
+            with instrument.phase(call, "display"):
+                _publish(bundle, display_id)
+            return
 
     # Script fallback
-    print(lhs if rhs2 is None else sp.Eq(lhs, rhs2))
+    with instrument.phase(call, "display"):
+        for step in obj if isinstance(obj, list) else [obj]:
+            print(step)
+
+
+def _math_bundle(obj: Any) -> dict[str, str]:
+    tex, plain = _latex_and_plain(obj)
+    return {"text/latex": f"$\\displaystyle {tex}$", "text/plain": plain}
+
+
+def _steps_bundle(steps: Sequence[Any]) -> dict[str, str]:
+    printed = [_latex_and_plain(step) for step in steps]
+    tex = r" \\ ".join(tex for tex, _ in printed)
+    return {
+        "text/latex": f"$\\displaystyle \\begin{{gathered}}{tex}\\end{{gathered}}$",
+        "text/plain": "\n".join(plain for _, plain in printed),
+    }
+
+
+def _latex_and_plain(obj: Any) -> Tuple[str, str]:
+    if needs_iterative(obj, get_config().iterative_latex_threshold):
+        return iterative_latex(obj), _plain_summary(obj)
+    return to_latex(obj), _plain_text(obj)
+
+
+def _resolve_display_id(display_id: DisplayId) -> Optional[str]:
+    if display_id is True:
+        return uuid.uuid4().hex
+    if display_id is None or display_id is False:
+        return None
+    return str(display_id)
+
+
+def _publish(data: dict[str, Any], display_id: Optional[str], metadata: Optional[dict] = None) -> None:
+    """
+    display() a raw MIME bundle; with a display_id, update the earlier output with that id
+    instead (when Config.display_updates allows) and skip content that hasn't changed.
+    """
+    from IPython.display import display, update_display  # type: ignore
+
+    extra = {"metadata": metadata} if metadata else {}
+    if display_id is None:
+        display(data, raw=True, **extra)
+        return
+
+    cfg = get_config()
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    count = _execution_count()
+    shown = _DISPLAYED.get(display_id)
+    if shown is None or (cfg.display_updates == "cell" and shown[0] != count):
+        display(data, raw=True, display_id=display_id, **extra)
+    elif cfg.skip_unchanged_displays and shown[1] == digest:
+        return
+    else:
+        update_display(data, raw=True, display_id=display_id, **extra)
+    _DISPLAYED[display_id] = (count, digest)
+
+
+def _execution_count() -> Optional[int]:
+    try:
+        from IPython import get_ipython  # type: ignore
+    except Exception:
+        return None
+    return getattr(get_ipython(), "execution_count", None)
+
+
+def _plain_text(obj: Any) -> str:
+    try:
+        return str(obj)
+    except RecursionError:
+        return _plain_summary(obj)
+
+
+def _plain_summary(obj: Any, limit: int = 100_000) -> str:
+    # str() recurses like the LaTeX printer; oversized expressions only get a placeholder.
+    n = count_nodes(obj, limit=limit)
+    return f"<{type(obj).__name__} with {n if n <= limit else f'more than {limit}'} nodes>"
 
 
 # Alias if you want a more general “show object”
-def show(obj: Any) -> None:
+def show(obj: Any, *, display_id: DisplayId = None, blocks: Optional[bool] = None) -> Optional[str]:
     cfg = get_config()
     if cfg.silent:
-        return
+        return None
+    did = _resolve_display_id(display_id)
+    call = instrument.begin("show", type(obj).__name__)
+    if _use_blocks(obj, blocks, cfg):
+        _display_blocks(None, obj, clean=False, t=None, call=call, display_id=did)
+    else:
+        with instrument.phase(call, "display"):
+            _display_object(obj, did)
+    instrument.end(call)
+    return did
+
+
+def _display_object(obj: Any, display_id: Optional[str] = None) -> None:
     if is_interactive():
         try:
             from IPython.display import display  # type: ignore
-            display(obj)
+            if display_id is None:
+                display(obj)
+            else:
+                from IPython import get_ipython  # type: ignore
+                shell = get_ipython()
+                data, metadata = shell.display_formatter.format(obj) if shell is not None else ({"text/plain": repr(obj)}, {})
+                _publish(data, display_id, metadata)
             return
         except Exception:
             pass
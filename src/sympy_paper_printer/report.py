@@ -1,9 +1,35 @@
 from __future__ import annotations
 
+import os
 import shutil
 import subprocess
+import sys
+import threading
+import warnings
+from collections import deque
 from pathlib import Path
-from typing import Optional, Sequence
+from typing import Callable, Literal, Optional, Sequence
+
+from . import assets as figure_assets, bibliography, parallel, postprocess, profiling
+from .metrics import BuildRecorder, BuildResult, ChildUsage, StageEvent, path_size
+from .notebook import insert_code_cell, read_notebook, write_notebook
+from .resume import STAGES, Manifest, ResumeStage, build_key, resume_point
+from .workspace import WorkspaceMode, acquire_workspace, atomic_output, file_digest, user_cache_dir, workspace_root
+
+
+Intermediate = Literal["markdown", "ipynb"]
+
+# Called with (stage name, line) for every line a tool writes, as it is written.
+LogSink = Callable[[str, str], None]
+
+# How much of a failing tool's stdout/stderr (each) goes into the ReportBuildError.
+TAIL_CHARS = 64 * 1024
+
+_LOG_LOCK = threading.Lock()  # tools may run concurrently (kernels > 1, build_book)
+
+# Setup cell that moves the kernel from the workspace to the build directory, where
+# notebooks ran before builds had workspaces, so relative paths keep working.
+KERNEL_DIR_TAG = "spp-kernel-dir"
 
 
 class ReportBuildError(RuntimeError):
@@ -20,7 +46,27 @@ def build_report(
     keep_directory_clean: bool = True,
     execute: bool = True,
     build_dir: str | Path = "_build_spp",
-) -> Path:
+    result: bool = False,
+    trace: Optional[str | Path] = None,
+    profile: bool = False,
+    profile_top_n: int = 0,
+    profiler: str = "cprofile",
+    trace_memory: bool = False,
+    workspace: WorkspaceMode = "unique",
+    tmpfs: bool = False,
+    prune_bib: bool = False,
+    cache_dir: Optional[str | Path] = None,
+    markdown_filters: Optional[Sequence[postprocess.LineFilter]] = None,
+    intermediate: Intermediate = "markdown",
+    assets: bool = False,
+    figure_dpi: Optional[int] = None,
+    vector_figures: bool = False,
+    kernels: int = 1,
+    log: Optional[LogSink] = None,
+    progress: Optional[Callable[[StageEvent], None]] = None,
+    resume: bool = False,
+    from_stage: Optional[ResumeStage] = None,
+) -> Path | BuildResult:
     """
     Build a report from a percent-format .py file using:
       1) jupytext:  .py -> .ipynb
@@ -35,10 +81,58 @@ def build_report(
 
     Notes:
       - Uses a build directory by default to avoid polluting your source folder.
+        Each build gets its own workspace inside it (workspace="unique"), so concurrent
+        builds of the same document don't clobber each other. workspace="reuse" uses one
+        locked, persistent workspace per document instead and skips jupytext when the
+        source is unchanged. tmpfs=True puts the workspaces on /dev/shm (or the temp dir);
+        only the intermediates move there. The kernel still runs in the build directory
+        itself (a setup cell changes to it), and pandoc also looks there for images, so
+        relative paths in the notebook resolve as they did before workspaces. Workspaces
+        left behind by finished builds (keep_directory_clean=False, failures) are removed
+        by the next build.
+      - The output is written under a temporary name and renamed into place, so readers
+        never see a partial file.
       - If citations are desired, provide both bib and csl (or place exactly one .bib and one .csl next to the script).
-
-    Returns the output path.
+        prune_bib=True hands pandoc a .bib with only the entries the document cites (plus
+        their crossrefs), cached in cache_dir (default: the per-user cache) by
+        (bib hash, cited keys).
+      - The markdown is cleaned in one streaming pass (postprocess.DEFAULT_FILTERS);
+        pass markdown_filters to use a different chain of postprocess filters.
+      - intermediate="ipynb" skips the markdown export: the notebook is executed in place,
+        input cells are replaced by their outputs in memory (markdown cells go through the
+        same filters) and pandoc reads the .ipynb directly (needs pandoc >= 2.6).
+      - assets=True stores figures once per content hash in cache_dir and links them into
+        the build, so unchanged figures are not processed again. figure_dpi re-encodes
+        PNGs wider than the page at that DPI (needs Pillow). vector_figures=True asks
+        matplotlib for SVG figures (pdf output then needs rsvg-convert for pandoc).
+      - kernels > 1 analyses which names each cell reads and writes and runs independent
+        groups of cells on up to that many kernels at once (each replaying the shared
+        cells it depends on); outputs are merged back in document order. Notebooks the
+        analysis can't vouch for (magics, star imports, exec/eval) run serially.
+
+    The tools' output is streamed: log(stage, line) sees each line as it is written, and
+    only the last TAIL_CHARS of each stream are kept for the error of a failing tool.
+    progress(event) is called with a StageEvent when each stage starts and ends.
+
+    A failed build keeps the intermediates of the stages that finished, with a manifest of
+    their hashes (a unique workspace is moved to <build_dir>/<stem>.resume). resume=True
+    restarts at the first stage that didn't finish; from_stage="pandoc" (or "sanitize",
+    "execute") restarts at that stage. Retained files are only used if the source, the
+    options and their hashes still match; otherwise the build restarts earlier (with a
+    warning when from_stage was given). A resumed build has no profile report.
+
+    Returns the output path, or a BuildResult with per-stage wall/CPU time, child peak RSS,
+    bytes written and cache hits when result=True. trace=path also writes the stages as a
+    Chrome trace-event JSON timeline.
+
+    profile=True records wall time, CPU time, peak memory and output size per executed cell
+    and writes `<output stem>.profile.json` (+ `.txt` summary) next to the output, mapping
+    cells back to line ranges of the .py. profile_top_n > 0 also keeps a cProfile (or
+    profiler="pyinstrument") capture of the N slowest cells in `<output stem>.profile/`.
+    Peak memory is the growth of the kernel's peak RSS; trace_memory=True measures each
+    cell's allocations with tracemalloc instead (exact, but slows allocation-heavy cells).
     """
+    recorder = BuildRecorder(on_event=progress)
     py = Path(python_file).resolve()
     if not py.is_file():
         raise FileNotFoundError(py)
@@ -54,86 +148,258 @@ def build_report(
         # If user passes output with a different suffix, trust output.
         pass
 
-    bib_path, csl_path = _resolve_bib_csl(src_dir, bib=bib, csl=csl)
-
-    # Build directory (next to the script)
-    build_root = (src_dir / build_dir).resolve()
-    build_root.mkdir(parents=True, exist_ok=True)
+    if intermediate not in ("markdown", "ipynb"):
+        raise ValueError(f"Unknown intermediate: {intermediate!r}")
 
-    # Work on copies in build dir
-    ipynb = build_root / f"{py.stem}.ipynb"
-    md = build_root / f"{py.stem}.md"
-    files_dir = build_root / f"{py.stem}_files"
+    bib_path, csl_path = _resolve_bib_csl(src_dir, bib=bib, csl=csl)
 
-    created_paths: list[Path] = []
+    # Build directory (next to the script), one workspace per build inside it.
+    # With tmpfs the workspaces move to RAM, but the kernel still runs in the build directory.
+    build_root = workspace_root(src_dir, build_dir, tmpfs=tmpfs)
+    kernel_dir = workspace_root(src_dir, build_dir)
+    kernel_dir.mkdir(parents=True, exist_ok=True)
+    resuming = resume or from_stage is not None
+    resume_dir = build_root / f"{py.stem}.resume"
+    if resuming and workspace == "unique" and resume_dir.is_dir():
+        ws = acquire_workspace(build_root, resume_dir.name, mode="reuse")
+    else:
+        ws = acquire_workspace(build_root, py.stem, mode=workspace)
+    work_dir = ws.path
+
+    # Work on copies in the workspace
+    ipynb = work_dir / f"{py.stem}.ipynb"
+    md = work_dir / f"{py.stem}.md"
+    files_dir = work_dir / f"{py.stem}_files"
+    assets_dir = work_dir / f"{py.stem}_assets"
+    document = ipynb if intermediate == "ipynb" else md
+    cache_root = Path(cache_dir) if cache_dir is not None else user_cache_dir()
+    asset_policy = figure_assets.AssetPolicy(target_dpi=figure_dpi)
+
+    key = build_key(
+        py, execute=execute, intermediate=intermediate, profile=profile, profile_top_n=profile_top_n,
+        profiler=profiler, trace_memory=trace_memory, assets=assets, figure_dpi=figure_dpi, vector_figures=vector_figures,
+        filters=postprocess.filters_key(markdown_filters),
+    )
+    manifest = Manifest.load(work_dir, key) if resuming else None
+    start, reason = resume_point(manifest, from_stage) if resuming else ("convert", None)
+    if reason is not None:
+        warnings.warn(f"Cannot resume {py.name} at {from_stage!r} ({reason}); restarting at {start!r}")
+    if manifest is None or start == "convert":
+        manifest = Manifest.fresh(work_dir, key)
+    else:
+        manifest.restart_at(start)
+    done = STAGES[:STAGES.index(start)]
+
+    created_paths: list[Path] = [ipynb, md, files_dir, assets_dir, manifest.path]
+    profile_report: Optional[profiling.ProfileReport] = None
+    rewrites: dict[str, str] = manifest.checkpoints.get("execute", {}).get("rewrites", {})
+    succeeded = False
 
     try:
         # 1) jupytext: py -> ipynb
-        _run(
-            ["jupytext", "--to", "ipynb", str(py), "--output", str(ipynb)],
-            cwd=src_dir,
-        )
-        created_paths.append(ipynb)
-
-        # 2) nbconvert: execute -> markdown (no input)
-        nbconvert_cmd = ["jupyter", "nbconvert"]
-        if execute:
-            nbconvert_cmd += ["--execute"]
-        nbconvert_cmd += ["--to", "markdown", "--no-input", str(ipynb)]
-
-        # Important: run with cwd=build_root so markdown + *_files land in build dir
-        _run(nbconvert_cmd, cwd=build_root)
-        created_paths.append(md)
-        if files_dir.exists():
-            created_paths.append(files_dir)
-
-        _sanitize_markdown(md)
-
-        # 3) pandoc: md -> output
-        pandoc_cmd = [
-            "pandoc",
-            str(md.name),
-            "-s",
-            "-N",
-            "-o",
-            str(out),
-            "-V",
-            "geometry:margin=1in",
-        ]
-        if bib_path and csl_path:
-            pandoc_cmd += ["--citeproc", f"--bibliography={bib_path}", f"--csl={csl_path}"]
-
-        _run(pandoc_cmd, cwd=build_root)
-
-        if not out.is_file():
-            raise ReportBuildError(f"Expected output was not created: {out}")
+        if "convert" not in done:
+            with recorder.stage("convert") as stage:
+                if ws.reusable and _restore_converted(py, ipynb):
+                    stage.cache_hits += 1
+                else:
+                    stage.add_child_usage(_run(
+                        ["jupytext", "--to", "ipynb", str(py), "--output", str(ipynb)],
+                        cwd=src_dir,
+                        log=_stage_log(log, "convert"),
+                    ))
+                    if ws.reusable:
+                        _remember_converted(py, ipynb)
+                nb = read_notebook(ipynb)
+                insert_code_cell(nb, 0, _kernel_dir_source(kernel_dir), tag=KERNEL_DIR_TAG)
+                if vector_figures:
+                    figure_assets.add_vector_setup(nb)
+                write_notebook(ipynb, nb)
+                stage.bytes_written = path_size(ipynb)
+            manifest.record("convert", [ipynb])
+
+        # 2) nbconvert: execute -> markdown (no input), or execute in place for intermediate="ipynb"
+        if "execute" not in done:
+            plan = None
+            if execute and not profile and kernels > 1:
+                plan = parallel.plan_execution(read_notebook(ipynb), kernels)
+            executed_in_place = (profile and execute) or plan is not None
+            if profile and execute:
+                # Execute in place with the profiling hooks, then export without re-executing.
+                profile_data = work_dir / f"{py.stem}.profile.jsonl"
+                capture_dir = out.with_name(f"{out.stem}.profile") if profile_top_n > 0 else None
+                with recorder.stage("execute") as stage:
+                    profiling.prepare_notebook(
+                        ipynb, profile_data, capture_dir=capture_dir, top_n=profile_top_n, profiler=profiler, trace_memory=trace_memory
+                    )
+                    created_paths.append(profile_data)
+                    stage.add_child_usage(_run(
+                        ["jupyter", "nbconvert", "--execute", "--to", "notebook", "--inplace", str(ipynb)],
+                        cwd=work_dir,
+                        log=_stage_log(log, "execute"),
+                    ))
+                    profile_report = profiling.collect(ipynb, profile_data, py)
+                    profile_report.write(out.with_name(f"{out.stem}.profile.json"))
+                    stage.bytes_written = path_size(ipynb)
+            elif plan is not None:
+                with recorder.stage("execute") as stage:
+                    usages, parts = parallel.execute_plan(
+                        ipynb, plan, lambda cmd: _run(cmd, cwd=work_dir, log=_stage_log(log, "execute"))
+                    )
+                    created_paths.extend(parts)
+                    for usage in usages:
+                        stage.add_child_usage(usage)
+                    stage.bytes_written = path_size(ipynb)
+            elif execute and intermediate == "ipynb":
+                with recorder.stage("execute") as stage:
+                    stage.add_child_usage(_run(
+                        ["jupyter", "nbconvert", "--execute", "--to", "notebook", "--inplace", str(ipynb)],
+                        cwd=work_dir,
+                        log=_stage_log(log, "execute"),
+                    ))
+                    stage.bytes_written = path_size(ipynb)
+
+            if intermediate == "markdown":
+                nbconvert_cmd = ["jupyter", "nbconvert"]
+                if execute and not executed_in_place:
+                    nbconvert_cmd += ["--execute"]
+                nbconvert_cmd += ["--to", "markdown", "--no-input", str(ipynb)]
+
+                # Important: run with cwd=work_dir so markdown + *_files land in the workspace
+                export_stage = "export" if executed_in_place else "execute"
+                with recorder.stage(export_stage) as stage:
+                    stage.add_child_usage(_run(nbconvert_cmd, cwd=work_dir, log=_stage_log(log, export_stage)))
+                    stage.bytes_written = path_size(md) + path_size(files_dir)
+
+                if assets:
+                    # Dedupe/re-encode figures; the path rewrite joins the sanitize pass.
+                    with recorder.stage("assets") as stage:
+                        rewrites, stats = figure_assets.collect_figures(files_dir, assets_dir, cache_root / "assets", asset_policy)
+                        stage.cache_hits += stats.cache_hits
+                        stage.bytes_written = stats.bytes_written
+            manifest.record("execute", [ipynb, md, files_dir, assets_dir], rewrites=rewrites)
+
+        if "sanitize" not in done:
+            with recorder.stage("sanitize") as stage:
+                if intermediate == "ipynb":
+                    nb = postprocess.notebook_for_pandoc(read_notebook(ipynb), markdown_filters)
+                    if assets:
+                        stats = figure_assets.process_attachments(nb, cache_root / "assets", asset_policy)
+                        stage.cache_hits += stats.cache_hits
+                    write_notebook(ipynb, nb)
+                else:
+                    filters = markdown_filters
+                    if rewrites:
+                        base = postprocess.DEFAULT_FILTERS if filters is None else filters
+                        filters = (*base, postprocess.rewrite_image_paths(rewrites))
+                    _sanitize_markdown(md, filters)
+                stage.bytes_written = path_size(document)
+            manifest.record("sanitize", [document, files_dir, assets_dir])
+
+        if prune_bib and bib_path is not None and bib_path.suffix.lower() == ".bib":
+            with recorder.stage("bibliography") as stage:
+                bib_path, hit = bibliography.prune_bib(bib_path, bibliography.cited_keys(document), cache_root / "bib")
+                stage.cache_hits += int(hit)
+                stage.bytes_written = 0 if hit else path_size(bib_path)
+
+        # 3) pandoc: md (or ipynb) -> output (published atomically)
+        with recorder.stage("pandoc") as stage, atomic_output(out) as partial:
+            # Citations are on by default for markdown input only.
+            reader = ["-f", "ipynb+citations"] if intermediate == "ipynb" else []
+            pandoc_cmd = [
+                "pandoc",
+                *reader,
+                str(document.name),
+                "-s",
+                "-N",
+                "-o",
+                str(partial),
+                "-V",
+                "geometry:margin=1in",
+                f"--resource-path={os.pathsep.join(['.', str(kernel_dir)])}",
+            ]
+            if bib_path and csl_path:
+                pandoc_cmd += ["--citeproc", f"--bibliography={bib_path}", f"--csl={csl_path}"]
+
+            stage.add_child_usage(_run(pandoc_cmd, cwd=work_dir, log=_stage_log(log, "pandoc")))
+            if not partial.is_file():
+                raise ReportBuildError(f"Expected output was not created: {out}")
+            stage.bytes_written = path_size(partial)
+        succeeded = True
 
+    finally:
+        if not succeeded:
+            # Keep what the finished stages produced so the build can be resumed.
+            if not ws.reusable:
+                _retain_for_resume(work_dir, resume_dir)
+            ws.release(clean=False)
+        elif keep_directory_clean and work_dir == resume_dir:
+            with recorder.stage("cleanup"):
+                _cleanup_build_artifacts([work_dir])
+                ws.release(clean=True)
+                _remove_if_empty(kernel_dir)
+        elif keep_directory_clean and not ws.reusable:
+            with recorder.stage("cleanup"):
+                _cleanup_build_artifacts(created_paths)
+                ws.release(clean=True)
+                _remove_if_empty(kernel_dir)
+        else:
+            ws.release(clean=False)
+
+    if not (result or trace):
         return out
 
-    finally:
-        if keep_directory_clean:
-            _cleanup_build_artifacts(created_paths)
-            # If build dir is empty afterwards, remove it
-            try:
-                if build_root.exists() and build_root.is_dir() and not any(build_root.iterdir()):
-                    build_root.rmdir()
-            except Exception:
-                pass
+    build = recorder.finish(out)
+    build.profile = profile_report
+    if trace is not None:
+        build.write_trace(trace)
+    return build if result else out
 
 
-def _sanitize_markdown(md_path: Path) -> None:
+def _sanitize_markdown(md_path: Path, filters: Optional[Sequence[postprocess.LineFilter]] = None) -> None:
     """
-    Small, safe cleanup of nbconvert markdown output.
+    Small, safe cleanup of nbconvert markdown output, done as one streaming pass.
 
+    By default:
     - Removes p2j-style lone '%' lines (harmless if absent)
-    - (Optionally extend this later if you find other consistent artifacts)
+    - Drops empty fenced output blocks
+    - Normalizes $$ math fences
     """
-    if not md_path.exists():
-        return
+    postprocess.apply_filters(md_path, postprocess.DEFAULT_FILTERS if filters is None else filters)
+
 
-    lines = md_path.read_text(encoding="utf-8").splitlines(True)
-    lines = [ln for ln in lines if ln.strip("\n") != "%"]
-    md_path.write_text("".join(lines), encoding="utf-8")
+def _remove_single_percent_lines(md_path: Path) -> None:
+    postprocess.apply_filters(md_path, (postprocess.drop_lone_percent,))
+
+
+def _restore_converted(py: Path, ipynb: Path) -> bool:
+    """
+    Reusable workspaces keep the last jupytext output; reuse it if the source is unchanged.
+    """
+    cached = ipynb.with_name(f"{py.stem}.source.ipynb")
+    stamp = ipynb.with_name(f"{py.stem}.source.sha256")
+    if not (cached.is_file() and stamp.is_file()):
+        return False
+    if stamp.read_text(encoding="utf-8").strip() != file_digest(py):
+        return False
+    shutil.copyfile(cached, ipynb)
+    return True
+
+
+def _remember_converted(py: Path, ipynb: Path) -> None:
+    shutil.copyfile(ipynb, ipynb.with_name(f"{py.stem}.source.ipynb"))
+    ipynb.with_name(f"{py.stem}.source.sha256").write_text(file_digest(py), encoding="utf-8")
+
+
+def _retain_for_resume(work_dir: Path, resume_dir: Path) -> None:
+    """
+    Move a failed build's unique workspace to the stable place resume=True looks in.
+    """
+    try:
+        if resume_dir.exists():
+            shutil.rmtree(resume_dir)
+        os.replace(work_dir, resume_dir)
+    except OSError:
+        pass
 
 
 def _cleanup_build_artifacts(paths: Sequence[Path]) -> None:
@@ -150,6 +416,21 @@ def _cleanup_build_artifacts(paths: Sequence[Path]) -> None:
             pass
 
 
+def _kernel_dir_source(directory: Path) -> str:
+    """
+    Setup cell that moves the kernel to `directory` (nbconvert starts it next to the notebook).
+    """
+    return f"import os as _spp_os\n_spp_os.chdir({str(directory)!r})\ndel _spp_os\n"
+
+
+def _remove_if_empty(directory: Path) -> None:
+    try:
+        if directory.is_dir() and not any(directory.iterdir()):
+            directory.rmdir()
+    except OSError:
+        pass
+
+
 def _resolve_bib_csl(directory: Path, *, bib: Optional[str | Path], csl: Optional[str | Path]) -> tuple[Optional[Path], Optional[Path]]:
     bib_path = Path(bib).resolve() if bib is not None else None
     csl_path = Path(csl).resolve() if csl is not None else None
@@ -177,13 +458,99 @@ def _require_tool(name: str) -> None:
         raise ReportBuildError(f"Required external tool not found on PATH: {name}")
 
 
-def _run(cmd: Sequence[str], *, cwd: Path) -> None:
-    result = subprocess.run(cmd, cwd=str(cwd), capture_output=True, text=True)
-    if result.returncode != 0:
+def _stage_log(log: Optional[LogSink], stage: str) -> Optional[Callable[[str], None]]:
+    return None if log is None else (lambda line: log(stage, line))
+
+
+def _run(cmd: Sequence[str], *, cwd: Path, log: Optional[Callable[[str], None]] = None) -> Optional[ChildUsage]:
+    """
+    Run an external tool, raising ReportBuildError on failure.
+
+    Output is read line by line as it is produced and passed to `log`; only the last
+    TAIL_CHARS of stdout and of stderr are kept, for the error message. Returns the
+    child's CPU time and peak RSS where the platform reports them (os.wait4).
+    """
+    proc = subprocess.Popen(
+        cmd, cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace"
+    )
+    stdout, stderr, usage = _stream_with_usage(proc, log)
+    if proc.returncode != 0:
         raise ReportBuildError(
             "Command failed:\n"
             f"  cmd: {' '.join(cmd)}\n"
             f"  cwd: {cwd}\n"
-            f"  stdout:\n{result.stdout}\n"
-            f"  stderr:\n{result.stderr}\n"
+            f"  stdout:\n{stdout.text()}\n"
+            f"  stderr:\n{stderr.text()}\n"
         )
+    return usage
+
+
+class _Tail:
+    """
+    Ring buffer of the last lines of a stream, at most `limit` characters in total.
+    """
+
+    def __init__(self, limit: Optional[int] = None) -> None:
+        self.limit = TAIL_CHARS if limit is None else limit
+        self.lines: deque[str] = deque()
+        self.size = 0
+        self.dropped = 0
+
+    def add(self, line: str) -> None:
+        if len(line) > self.limit:
+            line = line[-self.limit:]
+        self.lines.append(line)
+        self.size += len(line)
+        while self.size > self.limit:
+            self.size -= len(self.lines.popleft())
+            self.dropped += 1
+
+    def text(self) -> str:
+        head = f"[... {self.dropped} earlier lines omitted ...]\n" if self.dropped else ""
+        return head + "".join(self.lines)
+
+
+def _stream_with_usage(proc: subprocess.Popen, log: Optional[Callable[[str], None]]) -> tuple[_Tail, _Tail, Optional[ChildUsage]]:
+    # Drain both pipes ourselves (so memory stays bounded and, where available, the child
+    # can be reaped with wait4, which reports its rusage). If `log` raises, the pipes are
+    # still drained so the child can't block on a full pipe; the error is re-raised once
+    # the child has exited.
+    tails = {"stdout": _Tail(), "stderr": _Tail()}
+    log_errors: list[BaseException] = []
+
+    def drain(name: str, stream) -> None:
+        for line in stream:
+            tails[name].add(line)
+            if log is not None and not log_errors:
+                with _LOG_LOCK:
+                    try:
+                        log(line.rstrip("\n"))
+                    except BaseException as exc:
+                        log_errors.append(exc)
+        stream.close()
+
+    readers = [
+        threading.Thread(target=drain, args=("stdout", proc.stdout), daemon=True),
+        threading.Thread(target=drain, args=("stderr", proc.stderr), daemon=True),
+    ]
+    for r in readers:
+        r.start()
+    for r in readers:
+        r.join()
+
+    if not hasattr(os, "wait4"):
+        proc.wait()
+        if log_errors:
+            raise log_errors[0]
+        return tails["stdout"], tails["stderr"], None
+
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if log_errors:
+        raise log_errors[0]
+
+    peak_rss = rusage.ru_maxrss
+    if sys.platform == "darwin":  # bytes on macOS, KiB elsewhere
+        peak_rss //= 1024
+    usage = ChildUsage(cpu_time=rusage.ru_utime + rusage.ru_stime, peak_rss_kb=int(peak_rss))
+    return tails["stdout"], tails["stderr"], usage
@@ -0,0 +1,129 @@
+"""
+Resumable builds: build_report(..., resume=True) or from_stage="pandoc".
+
+While a build runs, each checkpoint (convert, execute, sanitize) records the
+files it produced, with their hashes, in a manifest in the workspace. The
+manifest is keyed by the source's hash and the options that shape those files.
+A failed build keeps its workspace: a unique workspace is moved to
+<build_dir>/<stem>.resume, and a reused one stays where it is. A resumed build
+skips the checkpoints whose recorded outputs still verify and restarts at the
+first stage after them.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal, Optional, Sequence
+
+from .workspace import file_digest
+
+MANIFEST_NAME = "spp-manifest.json"
+
+# Stages a build can restart at, in build order. Everything before the restart stage
+# comes from the retained workspace; "pandoc" reuses the sanitized document (the
+# bibliography is still resolved and pruned again).
+ResumeStage = Literal["convert", "execute", "sanitize", "pandoc"]
+STAGES: tuple[str, ...] = ("convert", "execute", "sanitize", "pandoc")
+
+
+@dataclass
+class Manifest:
+    path: Path
+    key: str
+    checkpoints: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def fresh(cls, work_dir: Path, key: str) -> Manifest:
+        manifest = cls(path=work_dir / MANIFEST_NAME, key=key)
+        manifest.write()
+        return manifest
+
+    @classmethod
+    def load(cls, work_dir: Path, key: str) -> Optional[Manifest]:
+        """
+        The manifest in work_dir, or None if there is none or it was made for other inputs.
+        """
+        path = work_dir / MANIFEST_NAME
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("key") != key:
+            return None
+        return cls(path=path, key=key, checkpoints=data.get("checkpoints", {}))
+
+    def record(self, stage: str, outputs: Sequence[Path], **extra: Any) -> None:
+        """
+        Mark a checkpoint as done with the files (or directories) it produced.
+        """
+        root = self.path.parent
+        self.checkpoints[stage] = {
+            "outputs": {str(p.relative_to(root)): _digest(p) for p in outputs if p.exists()},
+            **extra,
+        }
+        self.write()
+
+    def verified(self, stage: str, *, before: str) -> bool:
+        """
+        True if the stage's outputs are on disk as a restart at `before` needs them: as
+        last recorded by a checkpoint ahead of it (later stages may rewrite files in place).
+        """
+        entry = self.checkpoints.get(stage)
+        if entry is None:
+            return False
+        expected: dict[str, str] = {}
+        for name in STAGES[:STAGES.index(before)]:
+            expected.update(self.checkpoints.get(name, {}).get("outputs", {}))
+        root = self.path.parent
+        return all((root / rel).exists() and _digest(root / rel) == expected[rel] for rel in entry["outputs"])
+
+    def restart_at(self, stage: str) -> None:
+        """
+        Forget the checkpoints from `stage` on; they are about to be redone.
+        """
+        for name in STAGES[STAGES.index(stage):]:
+            self.checkpoints.pop(name, None)
+        self.write()
+
+    def write(self) -> None:
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(json.dumps({"key": self.key, "checkpoints": self.checkpoints}, indent=1), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def build_key(source: Path, **options: Any) -> str:
+    """
+    Hash of the source and the build options the checkpoints depend on.
+    """
+    h = hashlib.sha256(file_digest(source).encode("utf-8"))
+    h.update(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def resume_point(manifest: Optional[Manifest], from_stage: Optional[ResumeStage]) -> tuple[str, Optional[str]]:
+    """
+    (stage to restart at, reason when that is earlier than asked). Without from_stage
+    this is the first stage after the last verified checkpoint.
+    """
+    if manifest is None:
+        return "convert", None if from_stage in (None, "convert") else "no retained build for these inputs"
+    if from_stage is not None and from_stage not in STAGES:
+        raise ValueError(f"Unknown stage: {from_stage!r}")
+    target = from_stage or "pandoc"
+    for stage in STAGES[:STAGES.index(target)]:
+        if not manifest.verified(stage, before=target):
+            reason = None if from_stage is None else f"the {stage} outputs are missing or changed"
+            return stage, reason
+    return target, None
+
+
+def _digest(path: Path) -> str:
+    if path.is_file():
+        return file_digest(path)
+    h = hashlib.sha256()
+    for p in sorted(path.rglob("*")):
+        if p.is_file():
+            h.update(f"{p.relative_to(path).as_posix()}\0{file_digest(p)}\n".encode("utf-8"))
+    return h.hexdigest()
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import getpass
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Literal, Optional
+
+WorkspaceMode = Literal["unique", "reuse"]
+
+# Unique workspaces record the pid of the build using them, and are marked when the
+# build is done with them, so later builds can remove the ones left behind.
+_OWNER_FILE = ".spp-owner"
+_RELEASED_FILE = ".spp-released"
+
+
+class WorkspaceLockTimeout(TimeoutError):
+    pass
+
+
+@dataclass
+class BuildWorkspace:
+    """
+    Directory one build works in.
+
+    mode="unique": a fresh directory per build (concurrent builds never share files);
+                   one that is kept after its build is removed by the next build of
+                   the same document.
+    mode="reuse":  a stable per-document directory guarded by a lock file, kept warm
+                   between builds so intermediates can be reused.
+    """
+    path: Path
+    root: Path
+    mode: WorkspaceMode
+    _lock: Optional[Path] = field(default=None, repr=False)
+
+    @property
+    def reusable(self) -> bool:
+        return self.mode == "reuse"
+
+    def release(self, *, clean: bool) -> None:
+        """
+        Drop the lock; delete a unique workspace when clean=True. Also removes an empty root.
+        """
+        try:
+            if clean and not self.reusable:
+                shutil.rmtree(self.path, ignore_errors=True)
+            elif not self.reusable and self.path.is_dir():
+                (self.path / _RELEASED_FILE).touch()
+        finally:
+            if self._lock is not None:
+                try:
+                    self._lock.unlink()
+                except OSError:
+                    pass
+                self._lock = None
+        if clean:
+            try:
+                if self.root.is_dir() and not any(self.root.iterdir()):
+                    self.root.rmdir()
+            except OSError:
+                pass
+
+
+def workspace_root(src_dir: Path, build_dir: str | Path, *, tmpfs: bool = False) -> Path:
+    """
+    Where workspaces live: <src_dir>/<build_dir> by default, or a per-user directory on
+    a RAM-backed filesystem (/dev/shm, else the system temp dir) when tmpfs=True.
+    """
+    if not tmpfs:
+        return (src_dir / build_dir).resolve()
+    base = Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+    digest = hashlib.sha256(str(src_dir.resolve()).encode("utf-8")).hexdigest()[:12]
+    return base / f"spp-{_user()}" / digest
+
+
+def acquire_workspace(
+    root: Path,
+    key: str,
+    *,
+    mode: WorkspaceMode = "unique",
+    lock_timeout: float = 600.0,
+) -> BuildWorkspace:
+    if mode not in ("unique", "reuse"):
+        raise ValueError(f"Unknown workspace mode: {mode!r}")
+    root.mkdir(parents=True, exist_ok=True)
+    if mode == "unique":
+        _remove_abandoned(root, key)
+        path = Path(tempfile.mkdtemp(prefix=f"{key}-", dir=root))
+        (path / _OWNER_FILE).write_text(str(os.getpid()))
+        return BuildWorkspace(path=path, root=root, mode=mode)
+
+    path = root / key
+    lock = _lock_file(root / f"{key}.lock", timeout=lock_timeout)
+    path.mkdir(exist_ok=True)
+    return BuildWorkspace(path=path, root=root, mode=mode, _lock=lock)
+
+
+@contextmanager
+def atomic_output(out: Path) -> Iterator[Path]:
+    """
+    Yield a temporary path next to `out` (same suffix, so tools infer the format from it)
+    and rename it over `out` only if the block succeeds. Readers never see a partial file.
+    """
+    out.parent.mkdir(parents=True, exist_ok=True)
+    partial = out.with_name(f".{out.stem}.{uuid.uuid4().hex[:8]}.partial{out.suffix}")
+    try:
+        yield partial
+        if partial.exists():
+            os.replace(partial, out)
+    finally:
+        try:
+            partial.unlink()
+        except OSError:
+            pass
+
+
+def user_cache_dir(*parts: str) -> Path:
+    """
+    Persistent per-user cache (outside the source tree): $XDG_CACHE_HOME, %LOCALAPPDATA% or ~/.cache.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or (os.environ.get("LOCALAPPDATA") if os.name == "nt" else None)
+    root = Path(base) if base else Path.home() / ".cache"
+    return root.joinpath("sympy_paper_printer", *parts)
+
+
+def _remove_abandoned(root: Path, key: str) -> None:
+    """
+    Delete the unique workspaces of `key` whose build released them or died.
+    """
+    for path in root.glob(f"{glob.escape(key)}-*"):
+        # mkdtemp appends 8 characters; anything else belongs to another document.
+        if len(path.name) != len(key) + 9 or not path.is_dir():
+            continue
+        if (path / _RELEASED_FILE).exists() or ((path / _OWNER_FILE).is_file() and _stale(path / _OWNER_FILE)):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _lock_file(lock: Path, *, timeout: float) -> Path:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if _stale(lock):
+                try:
+                    lock.unlink()
+                except OSError:
+                    pass
+                continue
+            if time.monotonic() >= deadline:
+                raise WorkspaceLockTimeout(f"Workspace is locked by another build: {lock}")
+            time.sleep(0.1)
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return lock
+
+
+def _stale(lock: Path) -> bool:
+    """
+    True if the lock's (or workspace's) owner process is gone (POSIX only; elsewhere locks only time out).
+    """
+    if os.name != "posix":
+        return False
+    try:
+        pid = int(lock.read_text().strip() or "0")
+    except (OSError, ValueError):
+        return False
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def _user() -> str:
+    try:
+        return getpass.getuser()
+    except Exception:
+        return str(os.getuid()) if hasattr(os, "getuid") else "user"
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
@@ -2,9 +2,10 @@
 # This is just for outputting purposes and I don't plan on adding tests or thorough documentation to this (for now).
 from IPython.display import  display, Markdown
 import sympy as sy
-from sympy.core.function import AppliedUndef
 import sys
 from typing import List
+from sympy_paper_printer import legacy as _legacy
+from sympy_paper_printer.dirscope import CleanDirectoryScope as _CleanDirectoryScope
 defaultCleanEquations = True
 silent = False
 syFunctions = ['cos', 'sin', 'tan', 'exp', 'log', 're', 'im', 'Abs'] # this list might need to grow
@@ -64,26 +65,9 @@ def cleanOutUnwantedArguments(exp : sy.Expr, argsToClean : List[sy.Symbol] = Non
         sy.Expr: An expression with the desired arguments cleaned 
     """
 
-    if argsToClean == None:
-        argsToClean = []
-    for arg in exp.atoms(AppliedUndef) :
-       
-        symbolsToLeaveInFinalTerm = []
-        for freeSymbol in arg.free_symbols :
-            if len(argsToClean) == 0 :
-                continue
-            if freeSymbol not in argsToClean: 
-                symbolsToLeaveInFinalTerm.append(freeSymbol)
-                
-        if len(symbolsToLeaveInFinalTerm) == 0 :
-            rewrittenArg = sy.Symbol(arg.name)
-        else:
-            rewrittenArg = sy.Function(arg.name)(*symbolsToLeaveInFinalTerm)
-        
-        maybeExp = exp.subs(arg, rewrittenArg)    
-        if maybeExp.simplify() != 0 : # if we (for example) replace a derivative(g(t), t) with just symbol g, that derivative becomes 0, not what we want
-            exp = maybeExp 
-    return exp
+    # The per-function subs() + simplify() loop that used to live here is now a single
+    # replacement-map pass; see sympy_paper_printer.legacy.
+    return _legacy.clean_out_unwanted_arguments(exp, argsToClean)
 
 def convertTimeDerivativeToDotSymbol(exp : sy.Expr, t : sy.Expr =None) -> sy.Expr:  
     """Converts the passed in expression into one with time derivatives 
@@ -96,23 +80,7 @@ def convertTimeDerivativeToDotSymbol(exp : sy.Expr, t : sy.Expr =None) -> sy.Exp
     Returns:
         sy.Expr: An expression where the time derivatives are replaced with symbols using dot notation for time derivatives.
     """
-    if t == None :
-        t = sy.Symbol('t')
-    for arg in exp.args :
-        if not t in arg.args  :
-            continue
-        sym = sy.Symbol(arg.name)
-        derivative1 = sy.Derivative(arg, t)     
-        if derivative1.is_zero :
-            continue   
-        derivative2 = sy.Derivative(derivative1, t)
-        dot1 = sy.Symbol(r'\dot{' + arg.name + "}")
-        dot2 = sy.Symbol(r'\ddot{' + arg.name + "}")
-
-        exp = exp.subs(derivative2, dot2)
-        exp = exp.subs(derivative1, dot1)
-        exp = exp.subs(arg, sym)
-    return exp
+    return _legacy.convert_time_derivative_to_dot_symbol(exp, t)
 
 def showEquation(lhsOrEquation, rhs=None, cleanEqu=defaultCleanEquations) :    
     """
@@ -233,45 +201,23 @@ class ReportGeneratorFromPythonFileWithCells :
             print(result.stderr)
             print(result.stdout)            
 
-class CleanDirectoryScope :
+class CleanDirectoryScope(_CleanDirectoryScope) :
     """
     A scope that will record the contents of a directory upon entry, and 
     on exit will delete all new files and new, empty, directories.  When working with a process 
     where a bunch of extra files might clutter up an otherwise well manicured directory, 
     this is a easy way to keep that directory clean.
+
+    Kept for old scripts; sympy_paper_printer.CleanDirectoryScope is the set-based
+    replacement (depth limits, ignore patterns and optional inotify tracking).
     """
     def __init__(self, directory : str, localNewFilesToKeep : List[str] = [], keepDirectoryClean = True) :
-        for file in localNewFilesToKeep :
-            self.localNewFilesToKeep = join(directory, file)
-        self.directory = directory
+        super().__init__(directory, keep=localNewFilesToKeep, enabled=keepDirectoryClean)
         self.keepDirectoryClean = keepDirectoryClean
 
-    def __enter__(self) :
-        self.filesInDirectory, self.directories = self.getFilesAndDirectoriesInDirectory()
-        return self
-
-    def __exit__(self, exc_type, exc_value, tb) :        
-        if not self.keepDirectoryClean :
-            return
-        filesAtEnd, directoriesAtEnd = self.getFilesAndDirectoriesInDirectory()
-        for file in filesAtEnd :
-            if not file in self.filesInDirectory and not file in self.localNewFilesToKeep :
-                if isfile(file) :
-                    remove(file)
-                    
-        for dir in directoriesAtEnd :
-            if not dir in self.directories and len(listdir(dir)) == 0: # since we already removed files, only delete dir if empty
-                rmdir(dir)
-
     def getFilesAndDirectoriesInDirectory(self) -> List[List[str]] :
-        files = []
-        directories = []
-        for (dirpath, dirnames, filenames) in walk(self.directory) :
-            for dir in dirnames :
-                directories.append(join(dirpath, dir))
-            for file in filenames :
-                files.append(join(dirpath, file))
-        return [files, directories]
+        files, directories = self.snapshot()
+        return [sorted(files), sorted(directories)]
 
 import uuid
 class ScopeIfFileDoesNotExist :
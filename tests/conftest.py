@@ -1,5 +1,6 @@
 import pytest
 import sympy_paper_printer as spp
+import sympy_paper_printer.render as render
 
 
 @pytest.fixture(autouse=True)
@@ -8,3 +9,9 @@ def reset_config():
     old = spp.get_config()
     yield
     spp.configure(**old.__dict__)
+
+
+@pytest.fixture(autouse=True)
+def reset_displayed(monkeypatch):
+    # Each test starts with no display ids shown
+    monkeypatch.setattr(render, "_DISPLAYED", {})
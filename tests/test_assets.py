@@ -0,0 +1,64 @@
+import base64
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+from sympy_paper_printer.assets import AssetPolicy, cached_asset, collect_figures, process_attachments
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+
+
+def test_collect_figures_dedupes_within_and_across_builds(tmp_path: Path):
+    files_dir = tmp_path / "doc_files"
+    files_dir.mkdir()
+    (files_dir / "doc_1_0.png").write_bytes(PNG)
+    (files_dir / "doc_2_0.png").write_bytes(PNG)
+    (files_dir / "notes.txt").write_text("not a figure", encoding="utf-8")
+    cache = tmp_path / "cache"
+
+    mapping, stats = collect_figures(files_dir, tmp_path / "doc_assets", cache, AssetPolicy())
+
+    assert set(mapping) == {"doc_files/doc_1_0.png", "doc_files/doc_2_0.png"}
+    assert len(set(mapping.values())) == 1
+    assert len(list((tmp_path / "doc_assets").iterdir())) == 1
+    assert (stats.figures, stats.cache_hits) == (2, 1)
+
+    _, again = collect_figures(files_dir, tmp_path / "other_assets", cache, AssetPolicy())
+    assert (again.cache_hits, again.bytes_written) == (2, 0)
+
+
+def test_policy_is_part_of_the_cache_key(tmp_path: Path):
+    a, _ = cached_asset(PNG, ".svg", tmp_path, AssetPolicy())
+    b, hit = cached_asset(PNG, ".svg", tmp_path, AssetPolicy(target_dpi=150))
+    assert a.name != b.name and hit is False
+
+
+def test_png_that_was_not_reencoded_is_cached_as_unprocessed(monkeypatch, tmp_path: Path):
+    monkeypatch.setitem(sys.modules, "PIL", None)  # Pillow missing
+    with pytest.warns(UserWarning, match="Pillow"):
+        cached, hit = cached_asset(PNG, ".png", tmp_path, AssetPolicy(target_dpi=150))
+
+    assert hit is False
+    assert cached_asset(PNG, ".png", tmp_path, AssetPolicy()) == (cached, True)
+
+
+def test_process_attachments_uses_cache(tmp_path: Path):
+    payload = base64.b64encode(PNG).decode("ascii")
+    nb = {"cells": [{"cell_type": "markdown", "source": "", "attachments": {"o.png": {"image/png": payload}}}]}
+
+    assert process_attachments(nb, tmp_path, AssetPolicy()).cache_hits == 0
+    assert process_attachments(nb, tmp_path, AssetPolicy()).cache_hits == 1
+    assert nb["cells"][0]["attachments"]["o.png"]["image/png"] == payload
+
+
+def test_oversized_png_is_reencoded_at_target_dpi(tmp_path: Path):
+    Image = pytest.importorskip("PIL.Image")
+    buf = io.BytesIO()
+    Image.new("RGB", (2000, 1000), "white").save(buf, format="PNG")
+
+    cached, _ = cached_asset(buf.getvalue(), ".png", tmp_path, AssetPolicy(target_dpi=100, max_width_in=6.0))
+
+    with Image.open(cached) as im:
+        assert im.size == (600, 300)
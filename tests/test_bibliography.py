@@ -0,0 +1,65 @@
+from pathlib import Path
+
+from sympy_paper_printer.bibliography import cited_keys, parse_entries, prune_bib
+
+BIB = """@string{aiaa = "AIAA Journal"}
+
+@book{LonguskiGuzmanAndPrussing,
+  title = {Optimal Control with Aerospace Applications},
+  year = {2014},
+}
+
+@inproceedings{Paper1,
+  title = {A {Nested} Title (with parens)},
+  crossref = {Proc2020},
+}
+
+@proceedings{Proc2020,
+  title = {Proceedings},
+  journal = aiaa,
+}
+
+@article{Unused,
+  title = {Not cited},
+}
+"""
+
+
+def test_cited_keys_handles_brackets_braces_and_emails(tmp_path: Path):
+    md = tmp_path / "doc.md"
+    md.write_text(
+        "As shown in @LonguskiGuzmanAndPrussing. See [@Paper1, p. 3; @{odd key}].\n"
+        "Mail me at someone@example.com.\n",
+        encoding="utf-8",
+    )
+    assert cited_keys(md) == {"LonguskiGuzmanAndPrussing", "Paper1", "odd key"}
+
+
+def test_cited_keys_reads_markdown_cells_of_a_notebook(tmp_path: Path):
+    nb = tmp_path / "doc.ipynb"
+    nb.write_text(
+        '{"cells": [{"cell_type": "markdown", "source": ["See @a.\\n"]},'
+        ' {"cell_type": "code", "source": "x = \'@b\'"}]}',
+        encoding="utf-8",
+    )
+    assert cited_keys(nb) == {"a"}
+
+
+def test_parse_entries_finds_keys_and_crossrefs():
+    entries = parse_entries(BIB)
+    assert [e.key for e in entries] == ["", "LonguskiGuzmanAndPrussing", "Paper1", "Proc2020", "Unused"]
+    assert entries[2].refs == ("Proc2020",)
+
+
+def test_prune_bib_keeps_cited_entries_crossrefs_and_strings(tmp_path: Path):
+    bib = tmp_path / "refs.bib"
+    bib.write_text(BIB, encoding="utf-8")
+
+    pruned, hit = prune_bib(bib, {"Paper1"}, tmp_path / "cache")
+
+    assert hit is False
+    assert [e.key for e in parse_entries(pruned.read_text(encoding="utf-8"))] == ["", "Paper1", "Proc2020"]
+    assert prune_bib(bib, {"Paper1"}, tmp_path / "cache") == (pruned, True)
+
+    bib.write_text(BIB + "\n@misc{New, title={x}}\n", encoding="utf-8")
+    assert prune_bib(bib, {"Paper1"}, tmp_path / "cache")[1] is False
@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+import sympy_paper_printer.report as report_mod
+from sympy_paper_printer.book import build_book
+
+
+def _fake_toolchain(monkeypatch, calls):
+    monkeypatch.setattr(report_mod.shutil, "which", lambda name: f"/usr/bin/{name}")
+
+    def fake_run(cmd, *, cwd, **_):
+        calls.append(list(cmd))
+        if cmd[0] == "jupytext":
+            nb = {"cells": [{"cell_type": "code", "source": Path(cmd[3]).read_text(encoding="utf-8"), "outputs": []}]}
+            Path(cmd[cmd.index("--output") + 1]).write_text(json.dumps(nb), encoding="utf-8")
+        elif cmd[0] == "jupyter":
+            stem = Path(cmd[-1]).stem
+            (Path(cwd) / f"{stem}_files").mkdir(exist_ok=True)
+            (Path(cwd) / f"{stem}.md").write_text(f"# {stem}\n%\n![png]({stem}_files/{stem}_1_0.png)\n", encoding="utf-8")
+        elif cmd[0] == "pandoc":
+            Path(cmd[cmd.index("-o") + 1]).write_bytes(b"%PDF")
+        return None
+
+    monkeypatch.setattr(report_mod, "_run", fake_run)
+
+
+def test_build_book_merges_chapters_and_rebuilds_only_edited_ones(monkeypatch, tmp_path: Path):
+    calls = []
+    _fake_toolchain(monkeypatch, calls)
+    intro, methods = tmp_path / "intro.py", tmp_path / "methods.py"
+    intro.write_text("#%%\nx = 1\n", encoding="utf-8")
+    methods.write_text("#%%\ny = 2\n", encoding="utf-8")
+
+    first = build_book([intro, methods], output=tmp_path / "thesis.pdf", result=True)
+
+    pandoc = calls[-1]
+    inputs = [a for a in pandoc[1:] if a.endswith(".md")]
+    assert [Path(a).name for a in inputs] == ["intro.md", "methods.md"]
+    book_dir = tmp_path / "_build_spp" / "thesis.book"
+    md = (book_dir / inputs[0]).read_text(encoding="utf-8")
+    assert md == f"# intro\n![png]({Path(inputs[0]).parent.name}/intro_files/intro_1_0.png)\n"
+    assert first.stage("chapters").cache_hits == 0
+    assert (tmp_path / "thesis.pdf").read_bytes() == b"%PDF"
+
+    calls.clear()
+    methods.write_text("#%%\ny = 3\n", encoding="utf-8")
+    second = build_book([intro, methods], output=tmp_path / "thesis.pdf", result=True)
+
+    assert [Path(c[3]).name for c in calls if c[0] == "jupytext"] == ["methods.py"]
+    assert second.stage("chapters").cache_hits == 1
+
+
+def test_chapter_kernels_run_next_to_their_source(monkeypatch, tmp_path: Path):
+    calls = []
+    _fake_toolchain(monkeypatch, calls)
+    real_run = report_mod._run
+    seen = []
+
+    def run(cmd, *, cwd, **_):
+        if cmd[0] == "jupyter":
+            seen.append((Path(cwd), json.loads(Path(cmd[-1]).read_text(encoding="utf-8"))["cells"][0]["source"]))
+        return real_run(cmd, cwd=cwd)
+
+    monkeypatch.setattr(report_mod, "_run", run)
+    chapter = tmp_path / "chapters" / "intro.py"
+    chapter.parent.mkdir()
+    chapter.write_text("#%%\nx = 1\n", encoding="utf-8")
+
+    build_book([chapter], output=tmp_path / "thesis.pdf")
+
+    slot, setup = seen[0]
+    assert slot.parent == tmp_path / "_build_spp" / "thesis.book"
+    monkeypatch.chdir(tmp_path)
+    exec(setup, {})
+    assert Path.cwd() == chapter.parent
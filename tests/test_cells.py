@@ -0,0 +1,22 @@
+from sympy_paper_printer.cells import split_percent_cells
+
+
+def test_split_percent_cells_line_ranges_and_kinds():
+    text = "# %%\nimport sympy\n\n# %% [markdown]\n# Title\n# %%\nx = 1\ny = 2\n"
+
+    cells = split_percent_cells(text)
+
+    assert [c.kind for c in cells] == ["code", "markdown", "code"]
+    assert [(c.start_line, c.end_line) for c in cells] == [(1, 3), (4, 5), (6, 8)]
+    assert cells[2].source == "x = 1\ny = 2\n"
+
+
+def test_split_percent_cells_leading_content_is_a_cell():
+    cells = split_percent_cells("import os\n# %%\nprint(1)\n")
+    assert [(c.start_line, c.end_line) for c in cells] == [(1, 1), (2, 3)]
+
+
+def test_split_percent_cells_ignores_blank_preamble():
+    cells = split_percent_cells("\n\n#%%\nprint(1)\n")
+    assert len(cells) == 1
+    assert cells[0].start_line == 3
@@ -0,0 +1,86 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from sympy_paper_printer.dirscope import CleanDirectoryScope, _Inotify
+
+
+def _populate(root: Path) -> None:
+    (root / "old.txt").write_text("x")
+    (root / "sub").mkdir()
+    (root / "sub" / "old.txt").write_text("x")
+
+
+def _litter(root: Path) -> None:
+    (root / "new.md").write_text("x")
+    (root / "report.pdf").write_text("x")
+    (root / "sub" / "new.txt").write_text("x")
+    (root / "build" / "deep").mkdir(parents=True)
+    (root / "build" / "deep" / "a.png").write_text("x")
+
+
+@pytest.mark.parametrize("track", ["snapshot", pytest.param("inotify", marks=pytest.mark.skipif(
+    not _Inotify.available(), reason="inotify not available"))])
+def test_scope_removes_only_new_files(tmp_path: Path, track):
+    _populate(tmp_path)
+
+    with CleanDirectoryScope(tmp_path, keep=["report.pdf"], track=track):
+        _litter(tmp_path)
+
+    assert sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*")) == [
+        "old.txt", "report.pdf", "sub", "sub/old.txt",
+    ]
+
+
+def test_scope_respects_ignore_and_depth(tmp_path: Path):
+    _populate(tmp_path)
+    (tmp_path / ".git").mkdir()
+
+    with CleanDirectoryScope(tmp_path, ignore=[".git"], max_depth=0) as scope:
+        (tmp_path / ".git" / "index").write_text("x")
+        (tmp_path / "sub" / "new.txt").write_text("x")  # below max_depth: not tracked
+        (tmp_path / "top.txt").write_text("x")
+
+    assert (tmp_path / ".git" / "index").exists()
+    assert (tmp_path / "sub" / "new.txt").exists()
+    assert not (tmp_path / "top.txt").exists()
+    assert scope.removed == [str(tmp_path / "top.txt")]
+
+
+def test_disabled_scope_keeps_everything(tmp_path: Path):
+    with CleanDirectoryScope(tmp_path, enabled=False):
+        (tmp_path / "new.txt").write_text("x")
+    assert (tmp_path / "new.txt").exists()
+
+
+@pytest.mark.parametrize("track", ["snapshot", pytest.param("inotify", marks=pytest.mark.skipif(
+    not _Inotify.available(), reason="inotify not available"))])
+def test_scope_keeps_files_replaced_in_place(tmp_path: Path, track):
+    _populate(tmp_path)
+
+    with CleanDirectoryScope(tmp_path, track=track):
+        (tmp_path / "old.txt.tmp").write_text("y")
+        os.replace(tmp_path / "old.txt.tmp", tmp_path / "old.txt")
+        (tmp_path / "sub" / "old.txt").unlink()
+        (tmp_path / "sub" / "old.txt").write_text("y")
+
+    assert (tmp_path / "old.txt").read_text() == "y"
+    assert (tmp_path / "sub" / "old.txt").read_text() == "y"
+    assert not (tmp_path / "old.txt.tmp").exists()
+
+
+@pytest.mark.skipif(not _Inotify.available(), reason="inotify not available")
+def test_failed_watch_falls_back_to_snapshots(tmp_path: Path, monkeypatch):
+    def refuse(self, directory):
+        raise OSError(28, "No space left on device", directory)
+
+    monkeypatch.setattr(_Inotify, "watch", refuse)
+    _populate(tmp_path)
+
+    with pytest.warns(UserWarning, match="comparing snapshots"):
+        with CleanDirectoryScope(tmp_path, track="inotify"):
+            (tmp_path / "new.txt").write_text("x")
+
+    assert not (tmp_path / "new.txt").exists()
+    assert (tmp_path / "old.txt").exists()
@@ -0,0 +1,57 @@
+import sympy as sp
+import sympy_paper_printer as spp
+import sympy_paper_printer.render as render
+from sympy_paper_printer import instrument
+
+
+def test_render_stats_collects_phases_and_sizes(monkeypatch, capsys):
+    monkeypatch.setattr(render, "is_interactive", lambda: False)
+    t = sp.Symbol("t")
+    q = sp.Function("q")(t)
+
+    with spp.render_stats(sizes=True) as stats:
+        spp.md("hello")
+        spp.eq("y", sp.Derivative(q, t) + q)
+
+    assert [c.kind for c in stats.calls] == ["md", "eq"]
+    call = stats.slowest(1)[0]
+    assert set(call.phases) == {"normalize", "clean", "display"}
+    assert call.nodes is not None and call.ops is not None
+    assert "Slowest equations" in stats.summary()
+    assert not instrument._HOOKS
+
+
+def test_latex_is_timed_separately_in_interactive_mode(monkeypatch):
+    monkeypatch.setattr(render, "is_interactive", lambda: True)
+    shown = []
+    import IPython.display
+
+    monkeypatch.setattr(IPython.display, "display", lambda obj, raw=False: shown.append(obj))
+
+    with spp.render_stats() as stats:
+        spp.eq("x", sp.Symbol("y") ** 2)
+
+    assert shown[0]["text/latex"] == r"$\displaystyle x = y^{2}$"
+    assert {"latex", "display"} <= set(stats.calls[0].phases)
+
+
+def test_custom_hook_and_disabled_cost(monkeypatch):
+    monkeypatch.setattr(render, "is_interactive", lambda: False)
+    assert instrument.begin("eq", "x") is None  # nothing registered => no bookkeeping
+
+    seen = []
+    spp.add_render_hook(seen.append)
+    try:
+        spp.show(sp.Symbol("x"))
+    finally:
+        spp.remove_render_hook(seen.append)
+
+    assert seen[0].kind == "show"
+
+
+def test_cache_counters_are_reported():
+    with spp.render_stats() as stats:
+        instrument.record_cache("latex", True)
+        instrument.record_cache("latex", False)
+    assert stats.cache["latex"] == [1, 1]
+    assert "cache latex: 1 hits, 1 misses" in stats.summary()
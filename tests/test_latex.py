@@ -0,0 +1,93 @@
+import random
+
+import pytest
+import sympy as sp
+
+from sympy_paper_printer.latex import count_nodes, iterative_latex, to_latex
+
+x, y, z, t = sp.symbols("x y z t")
+f = sp.Function("f")
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        x - 2 * y / z,
+        -x / y,
+        sp.Rational(2, 3) * x,
+        (x + y) ** 2,
+        1 / x**2,
+        sp.sqrt(x),
+        x ** sp.Rational(1, 3),
+        sp.sin(x + y) * f(t),
+        sp.Derivative(f(t), (t, 2)),
+        f(x, y).diff(x, y),
+        sp.Eq(x, y + 1),
+        sp.Matrix([[x, 1], [y, -z]]),
+        y / (x - z) ** 2,
+        sp.Integral(x, (x, 0, 1)),
+        sp.Abs(x - y),
+        1 - x,
+        1 / sp.sqrt(x),
+        x ** -sp.Rational(1, 3),
+        sp.sin(x) ** 2 + sp.cos(x) ** 2,
+        3 * x**2 * y - 2 * x * y**2 + 7,
+        x / 2 + y,
+        -x * y / 2,
+        x * sp.exp(-3) + sp.sqrt(2) * 3 ** sp.Rational(3, 4),
+        1.5 * x * y,
+        -2.25 * x / y,
+        sp.exp(x) ** (x + 1),
+        sp.Float(-0.5) ** y,
+    ],
+)
+def test_matches_sympy_on_ordinary_expressions(expr):
+    assert iterative_latex(expr) == sp.latex(expr)
+
+
+def _random_expr(rng: random.Random, depth: int):
+    if depth == 0:
+        return rng.choice([x, y, t, sp.Integer(2), sp.Integer(-3), sp.Rational(-2, 3), sp.pi, sp.E, f(t),
+                           sp.Float(1.5), sp.Float(-2.25), sp.Symbol("a^2")])
+    a, b = _random_expr(rng, depth - 1), _random_expr(rng, depth - 1)
+    return rng.choice([
+        lambda: a + b, lambda: a - b, lambda: a * b, lambda: a / b, lambda: a**b, lambda: a**-b,
+        lambda: sp.sqrt(a), lambda: a ** sp.Rational(-1, 3), lambda: sp.sin(a), lambda: sp.cos(a) ** b,
+        lambda: sp.exp(a) ** b, lambda: sp.Function("g")(a, b), lambda: sp.Abs(a), lambda: sp.Derivative(f(t), t) * a,
+    ])()
+
+
+def test_matches_sympy_on_generated_expressions():
+    rng = random.Random(0)
+    mismatches = []
+    for _ in range(300):
+        expr = _random_expr(rng, rng.randint(1, 4))
+        if iterative_latex(expr) != sp.latex(expr):
+            mismatches.append(expr)
+    assert mismatches == []
+
+
+def test_matches_sympy_above_the_default_threshold():
+    expr = sp.expand((1 - x + y * sp.sin(t) - sp.sqrt(z) / 2 + sp.exp(-t)) ** 6)
+    assert count_nodes(expr) > 2000
+    assert iterative_latex(expr) == sp.latex(expr)
+
+
+def test_deep_expression_does_not_recurse():
+    deep = x
+    for i in range(600):
+        deep = f(t) * sp.sin(deep) + sp.Symbol(f"a_{i}")
+    with pytest.raises(RecursionError):
+        sp.latex(deep)
+
+    tex = to_latex(deep)
+    assert tex.startswith(r"a_{599} + f{\left(t \right)} \sin{\left(a_{598}")
+    assert tex.count(r"\sin") == 600
+
+
+def test_shared_subtrees_are_printed_once():
+    expr = f(t)
+    for _ in range(12):
+        expr = expr * (expr + x)
+    assert count_nodes(expr, limit=1000) > 1000
+    assert iterative_latex(expr).count("f{") == 2**12
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from sympy_paper_printer.metrics import BuildRecorder, ChildUsage, path_size
+from sympy_paper_printer.report import _run
+
+
+def test_recorder_aggregates_stages(tmp_path: Path):
+    rec = BuildRecorder()
+    with rec.stage("a") as s:
+        s.add_child_usage(ChildUsage(cpu_time=0.5, peak_rss_kb=100))
+        s.add_child_usage(ChildUsage(cpu_time=0.25, peak_rss_kb=300))
+        s.bytes_written = 10
+    with rec.stage("b") as s:
+        s.cache_hits = 2
+        s.bytes_written = 5
+
+    res = rec.finish(tmp_path / "out.pdf")
+
+    assert res.stage("a").cpu_time == pytest.approx(0.75)
+    assert res.stage("a").peak_rss_kb == 300
+    assert res.stage("b").cpu_time is None
+    assert res.bytes_written == 15
+    assert res.cache_hits == 2
+    assert res.wall_time >= res.stage("b").start
+
+
+def test_chrome_trace_has_one_complete_event_per_stage(tmp_path: Path):
+    rec = BuildRecorder()
+    with rec.stage("convert"):
+        pass
+    trace = rec.finish(tmp_path / "x.pdf").to_chrome_trace()
+
+    (event,) = trace["traceEvents"]
+    assert event["name"] == "convert"
+    assert event["ph"] == "X"
+    assert event["dur"] >= 0
+
+
+def test_run_reports_child_usage(tmp_path: Path):
+    usage = _run([sys.executable, "-c", "print('ok')"], cwd=tmp_path)
+    if usage is not None:  # not available on Windows
+        assert usage.cpu_time >= 0
+        assert usage.peak_rss_kb > 0
+
+
+def test_path_size_counts_directory_contents(tmp_path: Path):
+    (tmp_path / "d").mkdir()
+    (tmp_path / "d" / "f").write_bytes(b"12345")
+    assert path_size(tmp_path / "d") == 5
+    assert path_size(tmp_path / "missing") == 0
@@ -0,0 +1,61 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+import sympy as sp
+
+import sympy_paper_printer as spp
+import sympy_paper_printer.render as render
+
+np = pytest.importorskip("numpy")
+
+
+def _load(path: Path):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_recorded_equations_export_as_vectorized_numpy_functions(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(render, "is_interactive", lambda: False)
+    t, rho, c_d, A = sp.symbols("t rho c_d A")
+    v = sp.Function("v")(t)
+
+    with spp.record_equations() as eqs:
+        spp.eq("F_d", rho * v**2 * c_d * A / 2 + sp.sin(v**2))
+        spp.eq(sp.Derivative(v, t), -v.diff(t) * sp.exp(-t))
+    spp.eq("ignored", t)
+
+    module = _load(spp.export_numeric(tmp_path / "drag_model.py", eqs))
+
+    assert module.__all__ == ["F_d", "dv_dt"]
+    speeds = np.linspace(0.0, 3.0, 7)
+    expected = 1.2 * speeds**2 * 0.5 * 2.0 / 2 + np.sin(speeds**2)
+    np.testing.assert_allclose(module.F_d(A=2.0, c_d=0.5, rho=1.2, v=speeds), expected)
+    np.testing.assert_allclose(module.dv_dt(dv_dt=speeds, t=0.0), -speeds)
+    assert "_x0 = " in (tmp_path / "drag_model.py").read_text(encoding="utf-8")  # v**2 is shared
+
+
+def test_export_numeric_only_regenerates_when_the_math_changes(tmp_path: Path):
+    x, y = sp.symbols("x y")
+    target = tmp_path / "model.py"
+
+    with spp.render_stats() as stats:
+        spp.export_numeric(target, [sp.Eq(y, x**2)])
+        first = target.read_text(encoding="utf-8")
+        spp.export_numeric(target, [sp.Eq(y, x**2)])
+        spp.export_numeric(target, [(y, x**3)])
+
+    assert stats.cache["numeric"] == [1, 2]
+    assert first.startswith("# spp-fingerprint: ")
+    assert _load(target).y(np.array([2.0])) == [8.0]
+
+
+def test_function_arguments_do_not_collide_with_existing_symbols(tmp_path: Path):
+    t, x, dx_dt = sp.symbols("t x dx_dt")
+    f = sp.Function("x")(t)
+
+    module = _load(spp.export_numeric(tmp_path / "collide.py", [(sp.Symbol("y"), x * f + dx_dt * f.diff(t))]))
+
+    assert module.y(x=2.0, x_2=3.0, dx_dt=5.0, dx_dt_2=7.0) == 2.0 * 3.0 + 5.0 * 7.0
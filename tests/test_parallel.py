@@ -0,0 +1,103 @@
+from pathlib import Path
+
+from sympy_paper_printer.notebook import read_notebook, write_notebook
+from sympy_paper_printer.parallel import analyze_cell, execute_plan, plan_execution
+
+
+def _nb(*sources):
+    cells = [{"cell_type": "markdown", "source": "# Title"}]
+    cells += [{"cell_type": "code", "source": s, "outputs": [], "execution_count": None} for s in sources]
+    return {"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+
+
+def test_analyze_cell_reads_writes_and_scopes():
+    names = analyze_cell(
+        "import sympy as sp\n"
+        "def f(a):\n    local = a + k\n    return local\n"
+        "y = [i for i in range(n)]\n"
+        "z += 1\n"
+        "cache.append(y)\n"
+    )
+    assert names.writes == {"sp", "f", "y", "z"}
+    assert {"k", "n", "z", "cache", "range"} <= names.reads
+    assert "local" not in names.writes and "i" not in names.writes
+    assert names.mutates == {"cache"} and names.imports == {"sp"}
+    assert names.certain
+
+
+def test_analyze_cell_gives_up_on_dynamic_code():
+    assert not analyze_cell("%matplotlib inline\n").certain
+    assert not analyze_cell("from sympy import *\n").certain
+    assert not analyze_cell("exec('x = 1')\n").certain
+
+
+def test_plan_splits_independent_sections_after_shared_setup():
+    nb = _nb(
+        "import sympy as sp\nt = sp.Symbol('t')",  # 1: shared setup
+        "g = 9.81",                                # 2: only used by 5-a
+        "a = sp.sin(t)",                           # 3: 5-a
+        "b = sp.cos(t)",                           # 4: 5-b
+        "sp.pprint(a * g)",                        # 5: 5-a
+        "print(b)",                                # 6: 5-b
+    )
+
+    plan = plan_execution(nb, max_kernels=2)
+
+    assert plan is not None
+    assert plan.groups == [[1, 2, 3, 5], [1, 4, 6]]
+    assert plan.owner == {1: 0, 2: 0, 3: 0, 5: 0, 4: 1, 6: 1}
+
+
+def test_plan_falls_back_to_serial():
+    assert plan_execution(_nb("x = 1", "y = x + 1", "print(y)"), max_kernels=4) is None  # a chain
+    assert plan_execution(_nb("x = 1", "%time y = 2"), max_kernels=4) is None
+    assert plan_execution(_nb("x = 1", "y = 2"), max_kernels=1) is None
+
+
+def test_method_call_counts_as_mutation_of_shared_state():
+    nb = _nb("results = []", "results.append(1)", "results.append(2)", "print(results)")
+    assert plan_execution(nb, max_kernels=2) is None
+
+
+def test_statement_calls_on_modules_count_as_mutation():
+    nb = _nb(
+        "import sympy_paper_printer as spp\nimport sympy as sp",
+        "spp.configure(clean_equations=False)",
+        "spp.eq('y', sp.sin(1))",
+    )
+    assert plan_execution(nb, max_kernels=2) is None
+    assert analyze_cell("y = sp.sin(t)").mutates == frozenset()
+
+
+def test_display_calls_on_modules_do_not_chain_cells():
+    nb = _nb(
+        "import sympy_paper_printer as spp\nimport sympy as sp\nt = sp.Symbol('t')",
+        "spp.eq('a', sp.sin(t))",
+        "spp.eq('b', sp.cos(t))",
+    )
+    plan = plan_execution(nb, max_kernels=2)
+    assert plan is not None and plan.groups == [[1, 2], [1, 3]]
+
+
+def test_execute_plan_merges_outputs_in_document_order(tmp_path: Path):
+    ipynb = tmp_path / "demo.ipynb"
+    write_notebook(ipynb, _nb("x = 1", "print(x)", "print(2)"))
+    plan = plan_execution(read_notebook(ipynb), max_kernels=2)
+    ran = []
+
+    def run(cmd):
+        part = Path(cmd[-1])
+        ran.append(part.name)
+        nb = read_notebook(part)
+        for cell in nb["cells"]:
+            cell["outputs"] = [{"output_type": "stream", "name": "stdout", "text": f"{part.stem}:{cell['source']}"}]
+        write_notebook(part, nb)
+        return None
+
+    usages, parts = execute_plan(ipynb, plan, run)
+
+    assert sorted(ran) == ["demo.part0.ipynb", "demo.part1.ipynb"] and len(usages) == 2
+    cells = read_notebook(ipynb)["cells"]
+    assert [c["outputs"][0]["text"] for c in cells[1:]] == ["demo.part0:x = 1", "demo.part0:print(x)", "demo.part1:print(2)"]
+    assert [c["execution_count"] for c in cells[1:]] == [1, 2, 3]
+    assert all(p.is_file() for p in parts)
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from sympy_paper_printer.postprocess import (
+    DEFAULT_FILTERS,
+    apply_filters,
+    normalize_math_fences,
+    notebook_for_pandoc,
+    rewrite_image_paths,
+    strip_empty_output_blocks,
+)
+
+
+def test_default_filters_in_one_pass(tmp_path: Path):
+    md = tmp_path / "x.md"
+    md.write_text(
+        "a\n%\n```\n\n\n```\n```\nkept\n\n```\n  $$\n\\dot{x} = v\n\n$$\nb\n",
+        encoding="utf-8",
+    )
+
+    apply_filters(md, DEFAULT_FILTERS)
+
+    assert md.read_text(encoding="utf-8") == "a\n```\nkept\n\n```\n$$\n\\dot{x} = v\n$$\nb\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["x.md"]
+
+
+def test_strip_empty_output_blocks_keeps_unterminated_block():
+    assert list(strip_empty_output_blocks(["```\n", "\n"])) == ["```\n", "\n"]
+
+
+def test_normalize_math_fences_skips_code_blocks():
+    lines = ["```\n", "  $$\n", "\n", "```\n"]
+    assert list(normalize_math_fences(lines)) == lines
+
+
+def test_normalize_math_fences_with_math_on_the_fence_lines():
+    lines = ["$$ x = y\n", "\n", "z $$\n", "\n", "Para one.\n", "\n", "  $$a = b$$\n", "\n", "Para two.\n"]
+    assert list(normalize_math_fences(lines)) == [
+        "$$ x = y\n", "z $$\n", "\n", "Para one.\n", "\n", "$$a = b$$\n", "\n", "Para two.\n",
+    ]
+    lines = ["$$ x = y\n", "$$\n", "\n", "Para one.\n", "\n", "Para two.\n"]
+    assert list(normalize_math_fences(lines)) == lines
+
+
+def test_rewrite_image_paths_with_mapping_and_function():
+    by_map = rewrite_image_paths({"x_files/a.png": "/cache/ab.png"})
+    by_fn = rewrite_image_paths(lambda p: p.upper())
+    line = "![](x_files/a.png) and ![b](<x_files/b c.png>)\r\n"
+
+    assert list(by_map([line])) == ["![](/cache/ab.png) and ![b](<x_files/b c.png>)\r\n"]
+    assert list(by_fn([line])) == ["![](X_FILES/A.PNG) and ![b](<X_FILES/B C.PNG>)\r\n"]
+
+
+def test_notebook_for_pandoc_keeps_outputs_only():
+    nb = {
+        "cells": [
+            {"cell_type": "markdown", "metadata": {}, "source": ["# Title\n", "%\n", "See @ref.\n"]},
+            {"cell_type": "code", "id": "c1", "source": "spp.eq(x, y)", "outputs": [
+                {"output_type": "display_data", "data": {"text/latex": "$x = y$", "text/plain": "Eq(x, y)"}},
+                {"output_type": "display_data", "data": {"image/png": "iVBO\nRw==\n", "text/plain": "<Figure>"}},
+            ]},
+            {"cell_type": "code", "source": "x = 1", "outputs": []},
+        ],
+        "nbformat": 4,
+    }
+
+    out = notebook_for_pandoc(nb)
+
+    assert out["nbformat"] == 4
+    assert out["cells"] == [
+        {"cell_type": "markdown", "metadata": {}, "source": "# Title\nSee @ref.\n"},
+        {
+            "cell_type": "markdown",
+            "metadata": {},
+            "source": "$x = y$\n\n![png](attachment:output_1.png)\n",
+            "id": "c1",
+            "attachments": {"output_1.png": {"image/png": "iVBORw=="}},
+        },
+    ]
@@ -0,0 +1,89 @@
+import json
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from sympy_paper_printer import profiling
+from sympy_paper_printer.notebook import insert_code_cell, read_notebook, write_notebook
+
+
+@pytest.fixture(autouse=True)
+def stop_tracemalloc():
+    yield
+    tracemalloc.stop()
+
+
+def _notebook(path: Path, sources):
+    nb = {"cells": [], "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    for i, src in enumerate(sources):
+        insert_code_cell(nb, i, src, tag="user")
+        nb["cells"][i]["metadata"] = {}
+    write_notebook(path, nb)
+    return nb
+
+
+def test_prepare_and_collect_maps_cells_to_source_lines(tmp_path: Path):
+    py = tmp_path / "doc.py"
+    py.write_text("# %%\nx = 1\n# %%\ny = x + 1\nprint(y)\n", encoding="utf-8")
+    ipynb = tmp_path / "doc.ipynb"
+    nb = _notebook(ipynb, ["x = 1", "y = x + 1\nprint(y)"])
+    data = tmp_path / "doc.profile.jsonl"
+
+    profiling.prepare_notebook(ipynb, data, top_n=0)
+    assert profiling.PROFILE_TAG in read_notebook(ipynb)["cells"][0]["metadata"]["tags"]
+
+    # Simulate the kernel: the setup cell registers the hooks mid-cell, then the user cells run.
+    hooks = profiling._KernelCellProfiler(data, None, 0, "cprofile")
+    hooks.post_run_cell(SimpleNamespace(success=True))
+    for cell in nb["cells"]:
+        hooks.pre_run_cell(SimpleNamespace(cell_id=cell["id"], raw_cell=cell["source"]))
+        hooks.post_run_cell(SimpleNamespace(success=True))
+
+    report = profiling.collect(ipynb, data, py)
+
+    assert len(read_notebook(ipynb)["cells"]) == 2  # injected cell stripped again
+    assert sorted((c.cell, c.lines) for c in report.cells) == [(0, (1, 2)), (1, (3, 5))]
+    assert "Slowest cells of doc.py" in report.summary()
+
+
+def test_collect_matches_by_source_without_cell_ids(tmp_path: Path):
+    py = tmp_path / "doc.py"
+    py.write_text("# %%\na = 1\n# %%\nb = 2\n", encoding="utf-8")
+    ipynb = tmp_path / "doc.ipynb"
+    _notebook(ipynb, ["a = 1", "b = 2"])
+    data = tmp_path / "doc.profile.jsonl"
+    data.write_text(
+        json.dumps({"digest": profiling._digest("b = 2"), "wall_time": 2.0, "cpu_time": 1.0, "peak_memory_kb": 3}) + "\n",
+        encoding="utf-8",
+    )
+
+    report = profiling.collect(ipynb, data, py)
+
+    (cell,) = report.cells
+    assert cell.cell == 1 and cell.lines == (3, 4) and cell.wall_time == 2.0
+
+
+def test_top_n_keeps_only_slowest_captures(tmp_path: Path):
+    hooks = profiling._KernelCellProfiler(tmp_path / "d.jsonl", tmp_path / "caps", 1, "cprofile")
+    for src in ("a = 1", "b = sum(range(200000))"):
+        hooks.pre_run_cell(SimpleNamespace(cell_id=None, raw_cell=src))
+        exec(src, {})
+        hooks.post_run_cell(SimpleNamespace(success=True))
+
+    assert len(list((tmp_path / "caps").glob("*.prof"))) == 1
+
+
+def test_memory_tracing_is_opt_in(tmp_path: Path):
+    def run(hooks, src):
+        hooks.pre_run_cell(SimpleNamespace(cell_id=None, raw_cell=src))
+        exec(src, {})
+        hooks.post_run_cell(SimpleNamespace(success=True))
+
+    run(profiling._KernelCellProfiler(tmp_path / "rss.jsonl", None, 0, "cprofile"), "x = bytearray(8 << 20)")
+    assert not tracemalloc.is_tracing()
+
+    run(profiling._KernelCellProfiler(tmp_path / "traced.jsonl", None, 0, "cprofile", trace_memory=True), "x = bytearray(8 << 20)")
+    record = json.loads((tmp_path / "traced.jsonl").read_text(encoding="utf-8"))
+    assert record["peak_memory_kb"] >= 8 << 10
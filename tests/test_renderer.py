@@ -31,3 +31,167 @@ def test_eq_respects_silent(monkeypatch, capsys):
 
     out = capsys.readouterr().out
     assert out == ""
+
+
+def test_eq_uses_iterative_latex_above_threshold(monkeypatch):
+    shown = []
+    monkeypatch.setattr(render, "is_interactive", lambda: True)
+    monkeypatch.setattr("IPython.display.display", lambda obj, raw=False: shown.append(obj))
+    x = sp.Symbol("x")
+    deep = x
+    for i in range(300):
+        deep = sp.sin(deep) + sp.Symbol(f"a_{i}")
+
+    with spp.configured(iterative_latex_threshold=100):
+        spp.eq("y", deep, clean=False)
+        spp.eq("y", x + 1, clean=False)
+
+    assert shown[0]["text/latex"].startswith(r"$\displaystyle y = a_{299} + \sin{\left(a_{298}")
+    assert shown[0]["text/plain"].startswith("<Equality with")
+    assert shown[1] == {"text/latex": r"$\displaystyle y = x + 1$", "text/plain": "Eq(y, x + 1)"}
+
+
+def test_eq_cse_shows_subexpressions_then_reduced_equation(monkeypatch, capsys):
+    monkeypatch.setattr(render, "is_interactive", lambda: False)
+    x, y = sp.symbols("x y")
+    expr = sp.sin(x + y) ** 2 + sp.cos(x + y) * sp.exp(sp.sin(x + y))
+
+    spp.eq("z", expr, clean=False, cse=True)
+
+    assert capsys.readouterr().out.splitlines() == [
+        "Eq(c_1, x + y)",
+        "Eq(c_2, sin(c_1))",
+        "Eq(z, c_2**2 + exp(c_2)*cos(c_1))",
+    ]
+
+
+def test_eq_cse_threshold_applies_automatically(monkeypatch, capsys):
+    monkeypatch.setattr(render, "is_interactive", lambda: False)
+    x, c_1 = sp.symbols("x c_1")
+    expr = sp.sin(x + c_1) * sp.cos(x + c_1)
+
+    with spp.configured(cse_threshold=5):
+        spp.eq("z", expr, clean=False)
+        spp.eq("w", x, clean=False)
+
+    assert capsys.readouterr().out.splitlines() == [
+        "Eq(c_2, c_1 + x)",
+        "Eq(z, sin(c_2)*cos(c_2))",
+        "Eq(w, x)",
+    ]
+
+
+def test_eq_batch_matches_eq_in_order(monkeypatch):
+    shown = []
+    monkeypatch.setattr(render, "is_interactive", lambda: True)
+    monkeypatch.setattr("IPython.display.display", lambda obj, raw=False: shown.append(obj))
+    t = sp.Symbol("t")
+    q = [sp.Function(f"q_{i}")(t) for i in range(4)]
+    items = [("x_%d" % i, sp.diff(q[i], t) + q[i] ** 2) for i in range(4)] + [sp.Eq(q[0], q[1])]
+
+    for item in items:
+        spp.eq(*item) if isinstance(item, tuple) else spp.eq(item)
+    expected, shown[:] = list(shown), []
+
+    spp.eq_batch(items, workers=1)
+    assert shown == expected
+    shown.clear()
+
+    with spp.configured(batch_parallel_threshold=None):
+        spp.eq_batch(items, workers=2)
+    assert shown == expected
+
+
+def test_eq_batch_prints_in_script_mode(monkeypatch, capsys):
+    monkeypatch.setattr(render, "is_interactive", lambda: False)
+    x = sp.Symbol("x")
+
+    spp.eq_batch([("y", x + 1), sp.Eq(x, 2)], clean=False)
+
+    assert capsys.readouterr().out.splitlines() == ["Eq(y, x + 1)", "Eq(x, 2)"]
+
+
+def test_display_id_updates_in_place_and_skips_unchanged(monkeypatch):
+    events = []
+    count = [1]
+    monkeypatch.setattr(render, "is_interactive", lambda: True)
+    monkeypatch.setattr(render, "_execution_count", lambda: count[0])
+    monkeypatch.setattr("IPython.display.display", lambda obj, raw=False, display_id=None: events.append(("display", display_id, obj)))
+    monkeypatch.setattr("IPython.display.update_display", lambda obj, raw=False, display_id=None: events.append(("update", display_id, obj)))
+    x = sp.Symbol("x")
+
+    assert spp.eq("y", x, clean=False, display_id="energy") == "energy"
+    spp.eq("y", x, clean=False, display_id="energy")      # unchanged: nothing sent
+    spp.eq("y", x + 1, clean=False, display_id="energy")  # same execution: updated in place
+    count[0] = 2
+    spp.eq("y", x + 1, clean=False, display_id="energy")  # re-run cell: shown afresh
+    with spp.configured(display_updates="session"):
+        count[0] = 3
+        spp.eq("y", x + 2, clean=False, display_id="energy")
+
+    assert [(kind, did) for kind, did, _ in events] == [
+        ("display", "energy"), ("update", "energy"), ("display", "energy"), ("update", "energy"),
+    ]
+    assert events[1][2]["text/latex"] == r"$\displaystyle y = x + 1$"
+
+
+def test_display_id_true_generates_id_and_md_uses_it(monkeypatch, capsys):
+    monkeypatch.setattr(render, "is_interactive", lambda: False)
+    did = spp.md("hello", display_id=True)
+    assert isinstance(did, str) and len(did) == 32
+    assert spp.md("plain") is None
+    assert capsys.readouterr().out == "hello\nplain\n"
+
+
+def test_eq_blocks_display_tiles_and_elide_zero_and_repeated_blocks(monkeypatch):
+    shown = []
+    monkeypatch.setattr(render, "is_interactive", lambda: True)
+    monkeypatch.setattr("IPython.display.display", lambda obj, raw=False: shown.append(obj))
+    t = sp.Symbol("t")
+    x = sp.Function("x")(t)
+    tile = sp.Matrix([[x.diff(t), 1], [0, x]])
+    big = sp.ImmutableMatrix(sp.BlockMatrix([[tile, sp.zeros(2, 2), tile], [sp.zeros(2, 2), sp.eye(2), sp.zeros(2, 2)]]).as_explicit())
+
+    with spp.configured(matrix_block_threshold=10, matrix_block_size=(2, 2)):
+        spp.eq("A", big, t=t)
+
+    latex = [b["text/latex"] for b in shown]
+    assert latex[0] == r"$\displaystyle A:\ 4 \times 6 \text{ matrix in } 2 \times 2 \text{ blocks}$"
+    assert latex[1] == r"$\displaystyle {A}_{[1:2,\,1:2]} = \left[\begin{matrix}\dot{x} & 1\\0 & x\end{matrix}\right]$"
+    assert latex[2] == r"$\displaystyle {A}_{[1:2,\,5:6]} = {A}_{[1:2,\,1:2]}$"
+    assert latex[3].startswith(r"$\displaystyle {A}_{[3:4,\,3:4]} = ")
+    assert "are zero (3 blocks)" in latex[4] and len(latex) == 5
+
+
+def test_blocks_fall_back_to_plain_text_when_a_display_fails(monkeypatch, capsys):
+    shown = []
+
+    def display(obj, raw=False):
+        if "m02" in obj["text/plain"]:
+            raise RuntimeError("frontend rejected the output")
+        shown.append(obj)
+
+    monkeypatch.setattr(render, "is_interactive", lambda: True)
+    monkeypatch.setattr("IPython.display.display", display)
+    m = sp.ImmutableMatrix(2, 4, lambda i, j: sp.Symbol(f"m{i}{j}"))
+
+    with spp.configured(matrix_block_size=(2, 2)):
+        spp.show(m, blocks=True)
+
+    assert len(shown) == 2  # the header and the first tile
+    assert capsys.readouterr().out == "M[0:2, 2:4] = Matrix([[m02, m03], [m12, m13]])\n"
+
+
+def test_show_blocks_caps_the_number_of_blocks_in_script_mode(monkeypatch, capsys):
+    monkeypatch.setattr(render, "is_interactive", lambda: False)
+    m = sp.ImmutableMatrix(4, 4, lambda i, j: sp.Symbol(f"m{i}{j}"))
+
+    with spp.configured(matrix_block_size=(2, 2), matrix_max_blocks=2):
+        spp.show(m, blocks=True)
+
+    assert capsys.readouterr().out.splitlines() == [
+        "M: 4 x 4 matrix in 2 x 2 blocks",
+        "M[0:2, 0:2] = Matrix([[m00, m01], [m10, m11]])",
+        "M[0:2, 2:4] = Matrix([[m02, m03], [m12, m13]])",
+        "2 more nonzero blocks of M not shown",
+    ]
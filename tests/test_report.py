@@ -1,3 +1,5 @@
+import json
+import os
 from pathlib import Path
 import pytest
 
@@ -26,3 +28,300 @@ def test_build_report_errors_if_tools_missing(monkeypatch, tmp_path: Path):
         build_report(py, fmt="pdf", keep_directory_clean=True)
 
     assert "Required external tool not found" in str(exc.value)
+
+
+def _fake_toolchain(monkeypatch, calls=None):
+    """
+    Replace the external tools with in-process fakes that write the files each stage produces.
+    """
+    monkeypatch.setattr(report_mod.shutil, "which", lambda name: f"/usr/bin/{name}")
+
+    def fake_run(cmd, *, cwd, **_):
+        if calls is not None:
+            calls.append(list(cmd))
+        if cmd[0] == "jupytext":
+            nb = {"cells": [{"cell_type": "code", "source": "print('hi')", "outputs": []}]}
+            Path(cmd[cmd.index("--output") + 1]).write_text(json.dumps(nb), encoding="utf-8")
+        elif cmd[0] == "jupyter" and "--inplace" in cmd:
+            nb = json.loads(Path(cmd[-1]).read_text(encoding="utf-8"))
+            nb["cells"][-1]["outputs"] = [{"output_type": "stream", "name": "stdout", "text": "hi\n"}]
+            Path(cmd[-1]).write_text(json.dumps(nb), encoding="utf-8")
+        elif cmd[0] == "jupyter":
+            stem = Path(cmd[-1]).stem
+            (Path(cwd) / f"{stem}.md").write_text("a\n%\nb\n", encoding="utf-8")
+        elif cmd[0] == "pandoc":
+            Path(cmd[cmd.index("-o") + 1]).write_bytes(b"%PDF")
+        return None
+
+    monkeypatch.setattr(report_mod, "_run", fake_run)
+
+
+def test_build_report_returns_build_result_and_trace(monkeypatch, tmp_path: Path):
+    _fake_toolchain(monkeypatch)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\nprint('hi')\n", encoding="utf-8")
+    trace = tmp_path / "trace.json"
+
+    res = build_report(py, fmt="pdf", result=True, trace=trace)
+
+    assert res.output == py.with_suffix(".pdf")
+    assert [s.name for s in res.stages] == ["convert", "execute", "sanitize", "pandoc", "cleanup"]
+    assert res.stage("pandoc").bytes_written == 4
+    assert "traceEvents" in trace.read_text(encoding="utf-8")
+    assert not (tmp_path / "_build_spp").exists()
+
+
+def test_reused_workspace_skips_unchanged_conversion(monkeypatch, tmp_path: Path):
+    calls = []
+    _fake_toolchain(monkeypatch, calls)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\nprint('hi')\n", encoding="utf-8")
+
+    first = build_report(py, workspace="reuse", result=True)
+    second = build_report(py, workspace="reuse", result=True)
+
+    assert first.stage("convert").cache_hits == 0
+    assert second.stage("convert").cache_hits == 1
+    assert [c[0] for c in calls].count("jupytext") == 1
+    assert (tmp_path / "_build_spp" / "demo").is_dir()
+
+
+def test_kernel_and_pandoc_see_the_build_directory(monkeypatch, tmp_path: Path):
+    calls = []
+    _fake_toolchain(monkeypatch, calls)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\nprint('hi')\n", encoding="utf-8")
+    build_dir = (tmp_path / "_build_spp").resolve()
+    real_run = report_mod._run
+    setup = []
+
+    def run(cmd, *, cwd, **_):
+        if cmd[0] == "jupyter":
+            setup.append(json.loads(Path(cmd[-1]).read_text(encoding="utf-8"))["cells"][0]["source"])
+        return real_run(cmd, cwd=cwd)
+
+    monkeypatch.setattr(report_mod, "_run", run)
+    build_report(py, keep_directory_clean=False)
+    build_report(py, keep_directory_clean=False)
+
+    monkeypatch.chdir(tmp_path)
+    exec(setup[-1], {})
+    assert Path.cwd() == build_dir
+    assert f"--resource-path=.{os.pathsep}{build_dir}" in calls[-1]
+    assert len([p for p in build_dir.iterdir() if p.is_dir()]) == 1  # the first build's workspace is gone
+
+
+def test_tmpfs_build_keeps_kernel_in_the_source_build_directory(monkeypatch, tmp_path: Path):
+    calls = []
+    _fake_toolchain(monkeypatch, calls)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\nprint('hi')\n", encoding="utf-8")
+    build_dir = (tmp_path / "_build_spp").resolve()
+    real_run = report_mod._run
+    seen = []
+
+    def run(cmd, *, cwd, **_):
+        if cmd[0] == "jupyter":
+            seen.append((Path(cwd), json.loads(Path(cmd[-1]).read_text(encoding="utf-8"))["cells"][0]["source"]))
+        return real_run(cmd, cwd=cwd)
+
+    monkeypatch.setattr(report_mod, "_run", run)
+    build_report(py, tmpfs=True)
+
+    work_dir, setup = seen[-1]
+    assert build_dir not in work_dir.parents  # intermediates live on tmpfs
+    monkeypatch.chdir(tmp_path)
+    assert not build_dir.exists()  # removed again by the clean build
+    build_dir.mkdir()
+    exec(setup, {})
+    assert Path.cwd() == build_dir
+    assert f"--resource-path=.{os.pathsep}{build_dir}" in calls[-1]
+
+
+def test_prune_bib_passes_pruned_bibliography_to_pandoc(monkeypatch, tmp_path: Path):
+    calls = []
+    _fake_toolchain(monkeypatch, calls)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\nprint('hi')\n", encoding="utf-8")
+    (tmp_path / "refs.bib").write_text("@book{a, title={A}}\n@book{b, title={B}}\n", encoding="utf-8")
+    (tmp_path / "style.csl").write_text("<style/>", encoding="utf-8")
+
+    res = build_report(py, prune_bib=True, cache_dir=tmp_path / "cache", result=True)
+
+    pandoc = next(c for c in calls if c[0] == "pandoc")
+    bib_arg = next(a for a in pandoc if a.startswith("--bibliography="))
+    assert Path(bib_arg.split("=", 1)[1]).parent == tmp_path / "cache" / "bib"
+    assert res.stage("bibliography").cache_hits == 0
+
+
+def test_ipynb_intermediate_feeds_executed_notebook_to_pandoc(monkeypatch, tmp_path: Path):
+    calls = []
+    _fake_toolchain(monkeypatch, calls)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\nprint('hi')\n", encoding="utf-8")
+    seen = {}
+    real_run = report_mod._run
+
+    def run(cmd, *, cwd, **_):
+        if cmd[0] == "pandoc":
+            seen["nb"] = json.loads((Path(cwd) / cmd[3]).read_text(encoding="utf-8"))
+        return real_run(cmd, cwd=cwd)
+
+    monkeypatch.setattr(report_mod, "_run", run)
+
+    res = build_report(py, intermediate="ipynb", result=True)
+
+    assert [s.name for s in res.stages] == ["convert", "execute", "sanitize", "pandoc", "cleanup"]
+    assert not any("markdown" in c for c in calls)
+    assert calls[-1][:4] == ["pandoc", "-f", "ipynb+citations", "demo.ipynb"]
+    assert seen["nb"]["cells"] == [{"cell_type": "markdown", "metadata": {}, "source": "```\nhi\n```\n"}]
+
+
+def test_assets_rewrite_figure_paths_in_the_sanitize_pass(monkeypatch, tmp_path: Path):
+    _fake_toolchain(monkeypatch)
+    real_run = report_mod._run
+    seen = {}
+
+    def run(cmd, *, cwd, **_):
+        if cmd[0] == "jupyter":
+            files = Path(cwd) / "demo_files"
+            files.mkdir()
+            (files / "demo_1_0.png").write_bytes(b"\x89PNG fake")
+            (Path(cwd) / "demo.md").write_text("![png](demo_files/demo_1_0.png)\n", encoding="utf-8")
+            return None
+        if cmd[0] == "pandoc":
+            seen["md"] = (Path(cwd) / "demo.md").read_text(encoding="utf-8")
+        return real_run(cmd, cwd=cwd)
+
+    monkeypatch.setattr(report_mod, "_run", run)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\nprint('hi')\n", encoding="utf-8")
+
+    res = build_report(py, assets=True, cache_dir=tmp_path / "cache", result=True)
+    assert seen["md"].startswith("![png](demo_assets/") and res.stage("assets").cache_hits == 0
+
+    res = build_report(py, assets=True, cache_dir=tmp_path / "cache", result=True)
+    assert res.stage("assets").cache_hits == 1
+
+
+def test_kernels_run_independent_cells_in_parallel_then_export(monkeypatch, tmp_path: Path):
+    calls = []
+    _fake_toolchain(monkeypatch, calls)
+    real_run = report_mod._run
+
+    def run(cmd, *, cwd, **_):
+        if cmd[0] == "jupytext":
+            cells = [{"cell_type": "code", "source": s, "outputs": []} for s in ("a = 1", "b = 2")]
+            Path(cmd[cmd.index("--output") + 1]).write_text(json.dumps({"cells": cells}), encoding="utf-8")
+            calls.append(list(cmd))
+            return None
+        return real_run(cmd, cwd=cwd)
+
+    monkeypatch.setattr(report_mod, "_run", run)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\na = 1\n#%%\nb = 2\n", encoding="utf-8")
+
+    res = build_report(py, kernels=2, result=True)
+
+    executed = sorted(Path(c[-1]).name for c in calls if "--inplace" in c)
+    assert executed == ["demo.part0.ipynb", "demo.part1.ipynb"]
+    assert not any("--execute" in c for c in calls if "markdown" in c)
+    assert [s.name for s in res.stages] == ["convert", "execute", "export", "sanitize", "pandoc", "cleanup"]
+
+
+def test_run_streams_lines_and_keeps_only_the_tail(monkeypatch, tmp_path: Path):
+    import sys
+
+    monkeypatch.setattr(report_mod, "TAIL_CHARS", 50)
+    lines = []
+    script = "import sys\nfor i in range(100):\n    print(f'line {i}')\nsys.exit(3)\n"
+
+    with pytest.raises(ReportBuildError) as exc:
+        report_mod._run([sys.executable, "-c", script], cwd=tmp_path, log=lines.append)
+
+    assert lines == [f"line {i}" for i in range(100)]
+    message = str(exc.value)
+    assert "line 99\n" in message and "line 0\n" not in message
+    assert "earlier lines omitted" in message
+
+
+def test_run_keeps_draining_when_log_raises(tmp_path: Path):
+    import sys
+
+    done = tmp_path / "done"
+    script = f"for i in range(50000):\n    print('x' * 40)\nopen({str(done)!r}, 'w').close()\n"
+
+    def log(line):
+        raise ValueError("sink closed")
+
+    with pytest.raises(ValueError, match="sink closed"):
+        report_mod._run([sys.executable, "-c", script], cwd=tmp_path, log=log)
+
+    assert done.exists()  # the child ran to completion instead of blocking on a full pipe
+
+
+def test_progress_reports_stage_start_and_end(monkeypatch, tmp_path: Path):
+    _fake_toolchain(monkeypatch)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\nprint('hi')\n", encoding="utf-8")
+    events = []
+
+    build_report(py, progress=events.append)
+
+    assert [(e.name, e.kind) for e in events[:4]] == [("convert", "start"), ("convert", "end"), ("execute", "start"), ("execute", "end")]
+    assert events[1].metrics.name == "convert" and not events[1].failed
+
+
+def test_failed_build_resumes_at_pandoc_without_re_executing(monkeypatch, tmp_path: Path):
+    calls = []
+    _fake_toolchain(monkeypatch, calls)
+    real_run = report_mod._run
+    broken = {"pandoc": True}
+
+    def run(cmd, *, cwd, **_):
+        if cmd[0] == "pandoc" and broken["pandoc"]:
+            raise ReportBuildError("LaTeX error")
+        return real_run(cmd, cwd=cwd)
+
+    monkeypatch.setattr(report_mod, "_run", run)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\nprint('hi')\n", encoding="utf-8")
+
+    with pytest.raises(ReportBuildError):
+        build_report(py)
+    retained = tmp_path / "_build_spp" / "demo.resume"
+    assert (retained / "demo.md").is_file() and (retained / "spp-manifest.json").is_file()
+
+    broken["pandoc"] = False
+    calls.clear()
+    res = build_report(py, resume=True, result=True)
+
+    assert [c[0] for c in calls] == ["pandoc"]
+    assert [s.name for s in res.stages] == ["pandoc", "cleanup"]
+    assert not (tmp_path / "_build_spp").exists()
+
+
+def test_resume_restarts_when_retained_outputs_changed(monkeypatch, tmp_path: Path):
+    calls = []
+    _fake_toolchain(monkeypatch, calls)
+    real_run = report_mod._run
+
+    def failing_pandoc(cmd, *, cwd, **_):
+        if cmd[0] == "pandoc":
+            raise ReportBuildError("LaTeX error")
+        return real_run(cmd, cwd=cwd)
+
+    monkeypatch.setattr(report_mod, "_run", failing_pandoc)
+    py = tmp_path / "demo.py"
+    py.write_text("#%%\nprint('hi')\n", encoding="utf-8")
+    with pytest.raises(ReportBuildError):
+        build_report(py)
+
+    (tmp_path / "_build_spp" / "demo.resume" / "demo.md").write_text("edited\n", encoding="utf-8")
+    monkeypatch.setattr(report_mod, "_run", real_run)
+    calls.clear()
+    with pytest.warns(UserWarning, match="the execute outputs are missing or changed"):
+        res = build_report(py, from_stage="pandoc", result=True)
+
+    assert [s.name for s in res.stages] == ["execute", "sanitize", "pandoc", "cleanup"]
+    assert [c[0] for c in calls] == ["jupyter", "pandoc"]
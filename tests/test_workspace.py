@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pytest
+
+from sympy_paper_printer.workspace import WorkspaceLockTimeout, acquire_workspace, atomic_output
+
+
+def test_unique_workspaces_are_distinct_and_cleaned(tmp_path: Path):
+    root = tmp_path / "_build_spp"
+    a = acquire_workspace(root, "doc")
+    b = acquire_workspace(root, "doc")
+    assert a.path != b.path
+
+    (a.path / "doc.md").write_text("x")
+    a.release(clean=True)
+    b.release(clean=True)
+
+    assert not root.exists()
+
+
+def test_kept_unique_workspaces_are_removed_by_the_next_build(tmp_path: Path):
+    kept = acquire_workspace(tmp_path, "doc")
+    kept.release(clean=False)
+    running = acquire_workspace(tmp_path, "doc")
+    other = acquire_workspace(tmp_path, "doc-2")
+    other.release(clean=False)
+
+    new = acquire_workspace(tmp_path, "doc")
+
+    assert not kept.path.exists()
+    assert running.path.is_dir() and other.path.is_dir() and new.path.is_dir()
+
+
+def test_reuse_workspace_is_locked(tmp_path: Path):
+    first = acquire_workspace(tmp_path, "doc", mode="reuse")
+    with pytest.raises(WorkspaceLockTimeout):
+        acquire_workspace(tmp_path, "doc", mode="reuse", lock_timeout=0.2)
+
+    first.release(clean=True)  # reusable workspaces stay warm
+    again = acquire_workspace(tmp_path, "doc", mode="reuse", lock_timeout=0.2)
+    assert again.path == first.path and again.path.is_dir()
+    again.release(clean=False)
+
+
+def test_stale_lock_is_broken(tmp_path: Path):
+    (tmp_path / "doc.lock").write_text("999999999")
+    ws = acquire_workspace(tmp_path, "doc", mode="reuse", lock_timeout=0.2)
+    ws.release(clean=False)
+
+
+def test_atomic_output_publishes_only_on_success(tmp_path: Path):
+    out = tmp_path / "report.pdf"
+    out.write_bytes(b"old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_output(out) as partial:
+            assert partial.suffix == ".pdf"
+            partial.write_bytes(b"half")
+            raise RuntimeError("pandoc failed")
+    assert out.read_bytes() == b"old"
+
+    with atomic_output(out) as partial:
+        partial.write_bytes(b"new")
+    assert out.read_bytes() == b"new"
+    assert [p.name for p in tmp_path.iterdir()] == ["report.pdf"]